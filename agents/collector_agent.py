@@ -1,9 +1,11 @@
 from typing import Dict
 import json
+from utils.tracing import set_attributes, traced
 
 class RequirementCollector:
     """Collects and processes user requirements."""
     
+    @traced('collect_requirements')
     def collect_requirements(self) -> Dict:
         """
         Collect and process user requirements for code generation.
@@ -15,20 +17,30 @@ class RequirementCollector:
             # In a real implementation, this could be a GUI or API endpoint
             requirements = input("Please describe your application requirements: ")
             
-            # Basic requirement processing
-            processed_requirements = {
-                "raw_input": requirements,
-                "timestamp": None,  # Would use actual timestamp
-                "framework_preferences": self._extract_framework_preferences(requirements),
-                "specifications": self._process_specifications(requirements)
-            }
-            
-            return processed_requirements
+            return self.process_requirements(requirements)
             
         except Exception as e:
             print(f"Error collecting requirements: {str(e)}")
             raise
 
+    def process_requirements(self, requirements: str) -> Dict:
+        """
+        Process a requirements description obtained from any source.
+        
+        Args:
+            requirements: Free-text description of the application
+            
+        Returns:
+            Dict: Processed requirements including framework preferences and specifications
+        """
+        set_attributes(input_bytes=len(requirements))
+        return {
+            "raw_input": requirements,
+            "timestamp": None,  # Would use actual timestamp
+            "framework_preferences": self._extract_framework_preferences(requirements),
+            "specifications": self._process_specifications(requirements)
+        }
+
     def _extract_framework_preferences(self, requirements: str) -> Dict:
         """Extract framework preferences from requirements."""
         # Basic framework detection - would be more sophisticated in practice
@@ -1,30 +1,38 @@
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 import logging
 import json
-from datetime import datetime
+from utils.history import TASK_HISTORY_CAPACITY, ErrorHistory, RingBuffer, TaskEvent
 
 class TaskCoordinator:
     """Coordinates workflow between agents and manages task progression."""
     
-    def __init__(self):
+    def __init__(self, history_capacity: int = TASK_HISTORY_CAPACITY):
+        """
+        Args:
+            history_capacity: Task events kept; older ones are dropped, so a
+                long-running worker's history stays bounded
+        """
         self.logger = logging.getLogger(__name__)
-        self.task_history = []
+        self.task_history = RingBuffer(history_capacity)
+        # Validation errors seen across reassignments, counted by fingerprint
+        self.error_history = ErrorHistory()
         
-    def reassign_task(self, generator_agent, errors: list) -> None:
+    def reassign_task(self, generator_agent, errors: Union[list, Dict]) -> None:
         """
         Reassign task to code generator with error context.
         
         Args:
             generator_agent: The code generator agent
-            errors: List of errors from validation
+            errors: List of errors from validation, or the validator's error
+                context with them under 'validation_errors'
         """
         try:
+            if isinstance(errors, dict):
+                errors = errors.get('validation_errors', [])
             # Log the reassignment
-            self.task_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'action': 'reassign',
-                'errors': errors
-            })
+            self.task_history.append(TaskEvent('reassign', errors=errors))
+            for error in errors:
+                self.error_history.record('validation', str(error))
             
             self.logger.info(f"Reassigning task due to errors: {errors}")
             
@@ -49,12 +57,11 @@ class TaskCoordinator:
             docs = self._generate_documentation(code_package)
             
             # Log successful completion
-            self.task_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'action': 'complete',
-                'framework': code_package.get('framework'),
-                'type': code_package.get('type')
-            })
+            self.task_history.append(TaskEvent(
+                'complete',
+                framework=code_package.get('framework'),
+                app_type=code_package.get('type')
+            ))
             
             # Output results
             print("\n=== Generated Code Documentation ===")
@@ -87,5 +94,9 @@ class TaskCoordinator:
         return "\n".join(docs)
 
     def get_task_history(self) -> list:
-        """Return the task execution history."""
-        return self.task_history 
\ No newline at end of file
+        """Return the retained task execution history, oldest first."""
+        return [event.to_dict() for event in self.task_history]
+
+    def get_error_summary(self) -> list:
+        """Return reassignment errors aggregated by fingerprint, most frequent first."""
+        return self.error_history.summaries()
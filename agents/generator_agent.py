@@ -1,16 +1,40 @@
-from typing import Dict
+from typing import Dict, List, Optional
+from pathlib import Path
 import os
+from utils.template_engine import TemplateEngine
+from utils.tracing import set_attributes, traced
+
+TEMPLATES_DIR = Path(__file__).parent.parent / 'examples' / 'templates'
+
+# Values for template slots the requirements do not set
+DEFAULT_TEMPLATE_VALUES = {
+    'debug': True,
+    'environment': 'development',
+    'version': '1.0.0',
+    'additional_config': '',
+    'additional_routes': '',
+    'additional_tests': '',
+    'memory_limit': '512M',
+    'cpu_limit': '0.5',
+    'host': '0.0.0.0',
+    'port': 8000
+}
 
 class CodeGenerator:
     """Generates code based on requirements and structured data."""
     
-    def generate_code(self, requirements: Dict, structured_data: Dict) -> Dict:
+    def __init__(self, template_engine: Optional[TemplateEngine] = None):
+        self.template_engine = template_engine or TemplateEngine(TEMPLATES_DIR)
+    
+    @traced('generate_code')
+    def generate_code(self, requirements: Dict, structured_data: Dict, variant: int = 0) -> Dict:
         """
         Generate code based on requirements and structured data.
         
         Args:
             requirements: Processed user requirements
             structured_data: Processed data from NeMo
+            variant: Which of candidate_variants to render
             
         Returns:
             Dict containing generated code and metadata
@@ -20,11 +44,12 @@ class CodeGenerator:
             app_type = requirements['specifications']['type']
             
             # Generate appropriate code based on framework and type
-            if framework == "flask" and app_type == "web_crawler":
+            if self._is_fixed_text(framework, app_type):
                 code = self._generate_flask_crawler()
             else:
-                code = self._generate_basic_app(framework)
+                code = self._generate_basic_app(framework, self.candidate_variants(requirements)[variant])
             
+            set_attributes(framework=framework, type=app_type, code_bytes=len(code), variant=variant)
             return {
                 "code": code,
                 "framework": framework,
@@ -36,6 +61,24 @@ class CodeGenerator:
             print(f"Error generating code: {str(e)}")
             raise
 
+    def candidate_variants(self, requirements: Dict) -> List[Dict]:
+        """
+        Template values for each distinct candidate, most preferred first.
+
+        The first is ``requirements['template_values']``; each entry of
+        ``requirements['template_variants']`` is layered over it for another
+        candidate. Apps generated from fixed text have a single variant.
+        """
+        framework = requirements['framework_preferences']['backend']
+        app_type = requirements['specifications']['type']
+        values = requirements.get('template_values', {})
+        if self._is_fixed_text(framework, app_type):
+            return [values]
+        return [values] + [{**values, **variant} for variant in requirements.get('template_variants', [])]
+
+    def _is_fixed_text(self, framework: str, app_type: str) -> bool:
+        return framework == "flask" and app_type == "web_crawler"
+
     def _generate_flask_crawler(self) -> str:
         """Generate Flask web crawler boilerplate."""
         return """
@@ -62,6 +105,14 @@ if __name__ == '__main__':
     app.run(debug=True)
 """
 
+    def _generate_basic_app(self, framework: str, values: Dict) -> str:
+        """Render the framework's web application template."""
+        return self.template_engine.render(
+            framework,
+            'web_app',
+            {**DEFAULT_TEMPLATE_VALUES, **values}
+        )
+
     def _get_dependencies(self, framework: str) -> Dict:
         """Get required dependencies for the generated code."""
         deps = {
@@ -1,21 +1,78 @@
-from typing import Dict, Optional
-import docker
-import tempfile
+from functools import partial
+from typing import Dict, List, Optional
+import json
 import os
+from utils import metrics
+from utils.dependency_index import DependencyResolver, ImageEnvironment
+from utils.lazy_import import lazy_import
+from utils.parsed_code import ParsedCode, parse_code
 from utils.rag_manager import RAGManager
-from utils.security import SecurityManager
+from utils.sandbox import SandboxScheduler, get_scheduler
+from utils.security import SANDBOX_IMAGE, SecurityManager
+from utils.speculative import CancelToken, Cancelled
+from utils.test_impact import CONFIG_FILE, RUNNER_FILE, TestImpact, parse_report, runner_source, strip_report
+from utils.tracing import set_attributes, span, traced
 from agents.generator_agent import CodeGenerator
 from agents.coordinator_agent import TaskCoordinator
 
+docker = lazy_import('docker')
+
+VALIDATIONS = metrics.counter('validator_validations_total', 'Validation runs by outcome', ['result'])
+FIX_ATTEMPTS = metrics.counter('validator_fix_attempts_total', 'Regeneration attempts after a failed validation')
+CHECK_SECONDS = metrics.histogram('validator_check_seconds', 'Duration of each validation check', ['check'])
+DOCKER_RUN_SECONDS = metrics.histogram('validator_docker_run_seconds', 'Duration of container test runs')
+TEST_SECONDS_SAVED = metrics.histogram(
+    'validator_test_seconds_saved',
+    'Test time saved per validation by sharding, and by test-impact selection when earlier results are passed in'
+)
+
+# Basic tests run against every generated app
+APP_TESTS = """
+import pytest
+from app import app
+
+def test_app_creates():
+    assert app is not None
+
+def test_app_configuration():
+    assert app.debug is True
+"""
+
+
+def check_syntax(code: str, filename: str = '<string>') -> List[str]:
+    """Return syntax errors in ``code``; needs no Docker, models or services."""
+    return ParsedCode(code, filename).syntax_errors
+
 class CodeValidator:
     """Validates generated code through testing and security checks."""
     
-    def __init__(self):
-        self.docker_client = docker.from_env()
+    def __init__(
+        self,
+        rag_manager: Optional[RAGManager] = None,
+        security_manager: Optional[SecurityManager] = None,
+        docker_client=None,
+        scheduler: Optional[SandboxScheduler] = None,
+        test_shards: int = 2,
+        dependency_resolver: Optional[DependencyResolver] = None
+    ):
+        """
+        Args:
+            test_shards: pytest processes the tests are spread over inside
+                the sandbox; they share the run's CPU limit
+            dependency_resolver: Checks code dependencies; defaults to one
+                indexing the sandbox image
+        """
+        self.docker_client = docker_client or docker.from_env()
+        # Shared by all validators in the process, so the CPU/memory budget is global
+        self.scheduler = scheduler or get_scheduler()
+        self.test_shards = test_shards
+        self.dependency_resolver = dependency_resolver or DependencyResolver(
+            ImageEnvironment(self.docker_client, SANDBOX_IMAGE, self.scheduler)
+        )
         self.code_generator = CodeGenerator()
         self.task_coordinator = TaskCoordinator()
-        self.rag_manager = RAGManager()
-        self.security_manager = SecurityManager()
+        self.rag_manager = rag_manager or RAGManager()
+        self.security_manager = security_manager or SecurityManager()
         
         # Define paths for code execution and Docker
         self.base_path = os.path.join(os.getcwd(), 'project', 'generated')
@@ -24,10 +81,29 @@ class CodeValidator:
         # Ensure Docker directory exists
         os.makedirs(self.docker_path, exist_ok=True)
 
-    def validate_code(self, code_package: Dict) -> Dict:
+    @traced('validate_code')
+    def validate_code(
+        self,
+        code_package: Dict,
+        test_impact: Optional[TestImpact] = None,
+        cancel: Optional[CancelToken] = None
+    ) -> Dict:
         """
         Validates the generated code through multiple checks.
         Uses RAG for context-aware validation.
+        
+        Args:
+            code_package: Generated code and its dependencies
+            test_impact: Test results of an earlier validation of related
+                code; only the tests the changes affect are re-run. The
+                pipeline passes none: TaskCoordinator.reassign_task does
+                not regenerate code yet, so there are no fix attempts to
+                carry results across
+            cancel: Stops the validation between checks and kills its
+                test container once cancelled
+
+        Raises:
+            Cancelled: ``cancel`` was cancelled before the validation finished
         """
         try:
             results = {
@@ -37,21 +113,53 @@ class CodeValidator:
                 'performance_metrics': {}
             }
             
+            set_attributes(code_bytes=len(code_package['code']))
+            
+            # Parsed once; the syntax and security checks share it
+            parsed = parse_code(code_package['code'])
+            test_impact = test_impact or TestImpact()
+            
             # Run validation checks with RAG context
-            self._validate_syntax(code_package['code'], results)
-            self._run_security_checks(code_package, results)
-            self._test_in_container(code_package, results)
-            self._check_dependencies(code_package['dependencies'], results)
+            checks = [
+                ('syntax', self._validate_syntax, parsed),
+                ('security', self._run_security_checks, code_package),
+                ('container_tests', partial(self._test_in_container, test_impact=test_impact, cancel=cancel), code_package),
+                ('dependencies', self._check_dependencies, code_package['dependencies'])
+            ]
+            for check_name, check, argument in checks:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                with span(f"validate_code.{check_name}") as check_span:
+                    errors_before = len(results['errors'])
+                    check(argument, results)
+                    check_span.set_attribute('errors', len(results['errors']) - errors_before)
+                results['performance_metrics'][check_name] = check_span.duration
+                CHECK_SECONDS.labels(check=check_name).observe(check_span.duration)
+            
+            set_attributes(
+                valid=results['valid'],
+                errors=len(results['errors']),
+                security_issues=len(results['security_issues'])
+            )
             
-            # If validation failed, attempt to fix with RAG context
+            VALIDATIONS.labels(result='valid' if results['valid'] else 'invalid').inc()
+            
+            # If validation failed, attempt to fix with RAG context. The
+            # coordinator does not regenerate code yet, so no fixed package
+            # comes back and test-impact selection across attempts is unused.
             if not results['valid']:
+                FIX_ATTEMPTS.inc()
                 fixed_code = self._attempt_code_fix(code_package, results)
                 if fixed_code:
-                    return self.validate_code(fixed_code)
+                    return self.validate_code(fixed_code, test_impact, cancel)
             
             return results
             
+        except Cancelled:
+            VALIDATIONS.labels(result='cancelled').inc()
+            raise
         except Exception as e:
+            VALIDATIONS.labels(result='error').inc()
             return {
                 'valid': False,
                 'errors': [str(e)],
@@ -82,21 +190,22 @@ class CodeValidator:
             self.logger.error(f"Error attempting to fix code: {str(e)}")
             return None
 
-    def _validate_syntax(self, code: str, results: Dict) -> None:
+    def _validate_syntax(self, parsed: ParsedCode, results: Dict) -> None:
         """Validate Python syntax with RAG context."""
-        try:
-            compile(code, '<string>', 'exec')
-            
-            # Get RAG validation context
-            rag_validation = self.rag_manager.validate_with_context(code)
-            
-            # Add RAG-based suggestions
-            if rag_validation['suggestions']:
-                results['rag_suggestions'] = rag_validation['suggestions']
-                
-        except SyntaxError as e:
+        syntax_errors = parsed.syntax_errors
+        if syntax_errors:
             results['valid'] = False
-            results['errors'].append(f"Syntax error: {str(e)}")
+            results['errors'].extend(syntax_errors)
+            return
+            
+        # Get RAG validation context
+        rag_validation = self.rag_manager.validate_with_context(parsed.source)
+        
+        # Add RAG-based suggestions
+        if rag_validation['suggestions']:
+            results['rag_suggestions'] = rag_validation['suggestions']
+        if rag_validation['similar_examples']:
+            results['similar_examples'] = rag_validation['similar_examples']
 
     def _run_security_checks(self, code_package: Dict, results: Dict) -> None:
         """Run security checks using SecurityManager."""
@@ -104,57 +213,89 @@ class CodeValidator:
         results['security_issues'].extend(security_results['vulnerabilities'])
         results['security_score'] = security_results['security_score']
 
-    def _test_in_container(self, code_package: Dict, results: Dict) -> None:
-        """Run code in isolated Docker container."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            try:
-                # Create test environment
-                self._setup_test_environment(tmpdir, code_package)
-                
-                # Run tests in container
-                self.docker_client.containers.run(
-                    'python:3.9-slim',
-                    command=['python', '-m', 'pytest'],
-                    volumes={tmpdir: {'bind': '/app', 'mode': 'ro'}},
-                    working_dir='/app',
-                    remove=True
-                )
-            except docker.errors.ContainerError as e:
-                results['valid'] = False
-                results['errors'].append(f"Tests failed: {str(e)}")
+    def _test_in_container(
+        self,
+        code_package: Dict,
+        results: Dict,
+        test_impact: Optional[TestImpact] = None,
+        cancel: Optional[CancelToken] = None
+    ) -> None:
+        """Run the tests in an isolated Docker container, sharded and limited to those affected."""
+        test_impact = test_impact or TestImpact()
+        files = self._workspace_files(code_package)
+        selected = test_impact.select(files)
+        skipped_seconds = test_impact.skipped_seconds(selected)
+        
+        if selected == []:
+            # No test covers anything that changed; the previous results stand
+            results['test_impact'] = {
+                'tests_run': 0,
+                'tests_skipped': len(test_impact.tests),
+                'shards': 0,
+                'seconds_saved': skipped_seconds
+            }
+            TEST_SECONDS_SAVED.observe(skipped_seconds)
+            return
+        
+        # Files are streamed into a fresh container; no host directory is mounted.
+        # Waits for CPU and memory under the scheduler's budget.
+        workspace = dict(files)
+        workspace[RUNNER_FILE] = runner_source()
+        workspace[CONFIG_FILE] = json.dumps({
+            'select': selected,
+            'shards': self.test_shards,
+            'durations': test_impact.durations()
+        })
+        with DOCKER_RUN_SECONDS.time():
+            outcome = self.scheduler.run(
+                self.docker_client,
+                SANDBOX_IMAGE,
+                ['python', RUNNER_FILE],
+                workspace,
+                cancel=cancel
+            )
+        if cancel is not None:
+            # A killed run says nothing about the code
+            cancel.raise_if_cancelled()
+        set_attributes(
+            workspace_id=outcome.workspace_id,
+            exit_code=outcome.exit_code,
+            queue_seconds=outcome.queue_seconds
+        )
+        
+        report = parse_report(outcome.output)
+        test_impact.record(files, report, selected)
+        if report is not None:
+            serial_seconds = sum(test['duration'] for test in report['tests'].values())
+            seconds_saved = skipped_seconds + max(0.0, serial_seconds - report['wall_seconds'])
+            results['test_impact'] = {
+                'tests_run': len(report['tests']),
+                'tests_skipped': len(test_impact.tests) - len(report['tests']),
+                'shards': report['shards'],
+                'seconds_saved': seconds_saved
+            }
+            TEST_SECONDS_SAVED.observe(seconds_saved)
+        
+        if outcome.timed_out:
+            results['valid'] = False
+            results['errors'].append(f"Tests timed out after {self.scheduler.limits.timeout:.0f}s")
+        elif outcome.exit_code != 0:
+            results['valid'] = False
+            results['errors'].append(
+                f"Tests failed (exit code {outcome.exit_code}): {strip_report(outcome.output)}"
+            )
 
     def _check_dependencies(self, dependencies: Dict, results: Dict) -> None:
-        """Verify all required dependencies are available and compatible."""
+        """Verify all required dependencies are available and compatible in the sandbox."""
         try:
-            import pkg_resources
-            
-            for dep in dependencies.get('requirements', []):
-                try:
-                    pkg_resources.require(dep)
-                except pkg_resources.DistributionNotFound:
-                    results['errors'].append(f"Missing dependency: {dep}")
-                except pkg_resources.VersionConflict:
-                    results['errors'].append(f"Version conflict for: {dep}")
-                    
+            results['errors'].extend(self.dependency_resolver.check(dependencies.get('requirements', [])))
         except Exception as e:
             results['errors'].append(f"Dependency check failed: {str(e)}")
 
-    def _setup_test_environment(self, tmpdir: str, code_package: Dict) -> None:
-        """Set up testing environment in temporary directory."""
-        # Write code to file
-        with open(os.path.join(tmpdir, 'app.py'), 'w') as f:
-            f.write(code_package['code'])
-            
-        # Create basic test file
-        test_content = f"""
-import pytest
-from app import app
-
-def test_app_creates():
-    assert app is not None
-
-def test_app_configuration():
-    assert app.debug is True
-"""
-        with open(os.path.join(tmpdir, 'test_app.py'), 'w') as f:
-            f.write(test_content) 
\ No newline at end of file
+    def _workspace_files(self, code_package: Dict) -> Dict[str, str]:
+        """Code, tests and any fixtures from ``code_package['files']``, by path."""
+        return {
+            **code_package.get('files', {}),
+            'app.py': code_package['code'],
+            'test_app.py': APP_TESTS
+        }
@@ -0,0 +1,77 @@
+"""
+Code artifact storage benchmark.
+
+Stores repeated templated outputs and fix-loop iterations through the
+content-addressed ArtifactStore and reports bytes stored versus raw text,
+plus per-artifact encode (write) and decode (read) latency.
+
+Usage: python -m benchmarks.artifact_storage [--tasks N] [--iterations N]
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List
+from agents.generator_agent import CodeGenerator
+from utils.artifact_store import ArtifactStore, compress
+
+
+def _fix_iterations(code: str, iterations: int) -> List[str]:
+    """Successive attempts that each change a couple of lines."""
+    versions = [code]
+    lines = code.splitlines(keepends=True)
+    for i in range(1, iterations):
+        lines = list(lines)
+        position = (i * 7) % len(lines)
+        lines[position] = f"    # fix attempt {i}\n" + lines[position]
+        versions.append(''.join(lines))
+    return versions
+
+
+def run_benchmark(tasks: int = 200, iterations: int = 4) -> Dict[str, float]:
+    """Return storage and latency figures for ``tasks`` runs of ``iterations`` attempts each."""
+    template = CodeGenerator()._generate_flask_crawler()
+    artifacts = []
+    for task in range(tasks):
+        # Half the runs regenerate the unchanged template, half go through fixes
+        versions = [template] if task % 2 else _fix_iterations(template + f"# task {task}\n" * 3, iterations)
+        artifacts.extend((task, code) for code in versions)
+
+    store = ArtifactStore()
+    blobs = {}
+    digests = []
+    start = time.perf_counter()
+    for task, code in artifacts:
+        digest, blob = store.encode(task, code)
+        if blob is not None:
+            blobs[digest] = blob
+            store.confirm(digest)
+        digests.append(digest)
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for digest in digests:
+        store.decode(digest, blobs.get)
+    read_time = time.perf_counter() - start
+
+    raw_bytes = sum(len(code.encode('utf-8')) for _, code in artifacts)
+    compressed_only = sum(len(compress(code.encode('utf-8'))[1]) for _, code in artifacts)
+    stored_bytes = sum(len(blob['data']) for blob in blobs.values())
+    return {
+        'artifacts': len(artifacts),
+        'blobs': len(blobs),
+        'raw_bytes': raw_bytes,
+        'compressed_only_bytes': compressed_only,
+        'stored_bytes': stored_bytes,
+        'savings_ratio': 1 - stored_bytes / raw_bytes,
+        'write_us_per_artifact': write_time / len(artifacts) * 1e6,
+        'read_us_per_artifact': read_time / len(artifacts) * 1e6
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.tasks, args.iterations), indent=2))
@@ -0,0 +1,106 @@
+"""
+Stage checkpoint benchmark.
+
+Times a pipeline run on the offline fakes from scratch and the rerun of a
+run that died during validation, which resumes scrape, process and
+generate from their checkpoints. Searches get a simulated latency, as the
+real scrape is dominated by network round trips. Also reports the size and
+the write and read time of a processed-data checkpoint holding embeddings,
+next to the same data as JSON.
+
+Usage: python -m benchmarks.checkpoint_resume [--runs N] [--search-latency S]
+                                              [--embeddings N]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict
+from main import run_pipeline
+from utils.checkpoint import CheckpointStore, loads
+from utils.fakes import EMBEDDING_DIMENSION, build_offline_components
+
+REQUIREMENTS = "Create a Flask web app with a REST API and health checks"
+
+
+class _DyingValidator:
+    def validate_code(self, code_package):
+        raise RuntimeError("worker killed")
+
+
+def _processed_data(embeddings: int) -> Dict:
+    # Dense vectors like a real model's, rather than the sparse FakeEmbeddings ones
+    rng = random.Random(0)
+    texts = [f"def handler_{index}():\n    return {index}\n" for index in range(embeddings)]
+    return {
+        'embeddings': {
+            'code_embeddings': [[rng.gauss(0, 1) for _ in range(EMBEDDING_DIMENSION)] for _ in texts]
+        },
+        'structured_examples': [
+            {'processed_code': text, 'category': 'handler', 'relevance_score': 0.95} for text in texts
+        ],
+        'metadata': {'model_version': 'nemo-1.0', 'dimension': EMBEDDING_DIMENSION}
+    }
+
+
+def run_benchmark(runs: int = 10, search_latency: float = 0.05, embeddings: int = 1000) -> Dict[str, float]:
+    """Return full and resumed run latency, and checkpoint size and speed."""
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        components = build_offline_components()
+        components['firecrawl'].client.latency = search_latency
+        requirements = components['collector'].process_requirements(REQUIREMENTS)
+        validator = components['validator']
+        # Warm-up: lazy imports and caches
+        run_pipeline(components, requirements)
+
+        full = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run_pipeline(components, requirements)
+            full.append(time.perf_counter() - start)
+
+        components['checkpoints'] = CheckpointStore(root)
+        resumed = []
+        for run in range(runs):
+            # Each run has its own requirements, so nothing is shared between runs
+            run_requirements = {**requirements, 'template_values': {'port': 8000 + run}}
+            components['validator'] = _DyingValidator()
+            try:
+                run_pipeline(components, run_requirements, run_id=f"run-{run}")
+            except RuntimeError:
+                pass
+            components['validator'] = validator
+            start = time.perf_counter()
+            outcome = run_pipeline(components, run_requirements, run_id=f"run-{run}")
+            resumed.append(time.perf_counter() - start)
+            assert outcome['resumed'] == ['scrape', 'process', 'generate']
+
+        results['full_run_ms'] = statistics.median(full) * 1000
+        results['resumed_run_ms'] = statistics.median(resumed) * 1000
+        results['resume_speedup'] = results['full_run_ms'] / results['resumed_run_ms']
+
+        store = CheckpointStore(root)
+        data = _processed_data(embeddings)
+        key = store.stage_key('process', 'benchmark')
+        start = time.perf_counter()
+        results['checkpoint_bytes'] = store.save(key, data)
+        results['checkpoint_write_ms'] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        store.load(key)
+        results['checkpoint_read_ms'] = (time.perf_counter() - start) * 1000
+        results['json_bytes'] = len(json.dumps(data).encode('utf-8'))
+        assert len(loads(store._object_path(key).read_bytes())['embeddings']['code_embeddings']) == embeddings
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--search-latency', type=float, default=0.05)
+    parser.add_argument('--embeddings', type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.runs, args.search_latency, args.embeddings), indent=2))
@@ -0,0 +1,93 @@
+"""
+Knowledge-base chunking benchmark.
+
+Ingests a corpus of Python files (examples/templates by default) with the
+AST-aware CodeSplitter and, for comparison, with 1000/200 character windows
+like the RecursiveCharacterTextSplitter it replaced. Reports chunk counts,
+embedded characters and tokens, ingestion time with the offline embeddings,
+and a retrieval hit rate: each function or method is queried by its name and
+docstring, and the lookup is a hit if the top chunk contains its definition.
+
+Usage: python -m benchmarks.chunking [--corpus DIR] [--repeat N]
+"""
+
+import argparse
+import ast
+import json
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from utils.code_splitter import CodeSplitter
+from utils.fakes import FakeCollection, FakeEmbeddings
+
+TEMPLATES_DIR = Path(__file__).parent.parent / 'examples' / 'templates'
+
+_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def character_windows(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> List[str]:
+    """Fixed-size windows with overlap, as the previous splitter produced."""
+    step = chunk_size - chunk_overlap
+    chunks = (text[start:start + chunk_size] for start in range(0, len(text), step))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _queries(sources: Dict[str, str]) -> List[Tuple[str, str]]:
+    """(query, expected definition line) for every function and method."""
+    queries = []
+    for text in sources.values():
+        for node in ast.walk(ast.parse(text)):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                query = f"{node.name} {ast.get_docstring(node) or ''}".strip()
+                queries.append((query, f"def {node.name}("))
+    return queries
+
+
+def _measure(sources: Dict[str, str], split: Callable[[str], List[str]], repeat: int) -> Dict[str, float]:
+    best = float('inf')
+    for _ in range(repeat):
+        embeddings, collection = FakeEmbeddings(), FakeCollection()
+        start = time.perf_counter()
+        for text in sources.values():
+            for chunk in split(text):
+                collection.insert_one({'content': chunk, '$vector': embeddings.embed_query(chunk)})
+        best = min(best, time.perf_counter() - start)
+
+    contents = [document['content'] for document in collection.documents]
+    queries = _queries(sources)
+    hits = 0
+    for query, definition in queries:
+        top = collection.find_many({'$vector': embeddings.embed_query(query)}, limit=1)
+        hits += bool(top) and definition in top[0]['content']
+    return {
+        'chunks': len(contents),
+        'embedded_chars': sum(len(content) for content in contents),
+        'embedded_tokens': sum(len(_TOKEN_PATTERN.findall(content)) for content in contents),
+        'ingest_ms': best * 1000,
+        'hit_rate': hits / len(queries) if queries else 0.0
+    }
+
+
+def run_benchmark(corpus: Path = TEMPLATES_DIR, repeat: int = 5) -> Dict[str, float]:
+    """Return chunking and retrieval metrics for both splitters."""
+    sources = {path.name: path.read_text() for path in sorted(Path(corpus).glob('*.py'))}
+    splitter = CodeSplitter(max_chunk_size=1000)
+    ast_results = _measure(sources, splitter.split_text, repeat)
+    window_results = _measure(sources, character_windows, repeat)
+
+    results = {'corpus_chars': sum(len(text) for text in sources.values())}
+    for name, value in ast_results.items():
+        results[f"ast_{name}"] = value
+    for name, value in window_results.items():
+        results[f"window_{name}"] = value
+    results['token_ratio'] = window_results['embedded_tokens'] / ast_results['embedded_tokens']
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', type=Path, default=TEMPLATES_DIR, help="Directory of .py files")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.corpus, args.repeat), indent=2))
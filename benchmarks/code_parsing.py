@@ -0,0 +1,87 @@
+"""
+Validator parsing benchmark.
+
+Runs the syntax check, the bandit scan and the dangerous-pattern scans the
+way the validator did before ParsedCode (compile per check, a bandit run per
+validation, raw substring scans) and with a shared ParsedCode, both for new
+code (cold caches) and for re-validating code seen before (warm caches).
+Bandit runs through the offline FakeCommandRunner, so its cost shows up as
+the number of subprocess launches rather than in the timings.
+
+Usage: python -m benchmarks.code_parsing [--validations N]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+from utils.fakes import FakeCommandRunner, FakeDockerClient
+from utils.parsed_code import parse_code
+from utils.security import SecurityManager
+
+TEMPLATES_DIR = Path(__file__).parent.parent / 'examples' / 'templates'
+
+PATTERNS = ['eval(', 'exec(', 'os.system(', '__import__(', 'subprocess.call(', 'input(', 'pickle.loads(',
+            'os.chmod(', 'os.access(', 'os.chown(', 'open(', 'file.', 'socket.']
+
+
+def _legacy_checks(code: str, manager: SecurityManager) -> List:
+    """The checks as they ran before ParsedCode: each consumer starts from the raw string."""
+    try:
+        compile(code, '<string>', 'exec')
+    except SyntaxError:
+        pass
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.py') as temp_file:
+        temp_file.write(code)
+        temp_file.flush()
+        process = manager.run_command(['bandit', '-r', temp_file.name, '-f', 'json'], capture_output=True, text=True)
+        issues = json.loads(process.stdout)['results']
+    return issues + [pattern for pattern in PATTERNS if pattern in code]
+
+
+def _shared_checks(code: str, manager: SecurityManager) -> None:
+    parsed = parse_code(code)
+    results = {'vulnerabilities': [], 'security_score': 1.0, 'code_issues': []}
+    parsed.syntax_errors
+    manager._run_bandit_scan(parsed, results)
+    manager._scan_for_vulnerabilities(parsed, results)
+    manager._check_permissions(parsed, results)
+
+
+def run_benchmark(validations: int = 300) -> Dict[str, float]:
+    """Return microseconds per validation and bandit launches for each variant."""
+    sources: List[str] = [path.read_text() for path in sorted(TEMPLATES_DIR.glob('*.py'))]
+    results = {}
+
+    for name, checks, warm in [
+        ('legacy', _legacy_checks, False),
+        ('shared_cold', _shared_checks, False),
+        ('shared_warm', _shared_checks, True)
+    ]:
+        runner = FakeCommandRunner()
+        manager = SecurityManager(docker_client=FakeDockerClient(), command_runner=runner)
+        # Distinct code per validation unless measuring re-validation
+        codes = [sources[i % len(sources)] + ('' if warm else f"\n# variant {i}\n") for i in range(validations)]
+        parse_code.cache_clear()
+        if warm:
+            for code in set(codes):
+                checks(code, manager)
+            runner.commands.clear()
+
+        start = time.perf_counter()
+        for code in codes:
+            checks(code, manager)
+        elapsed = time.perf_counter() - start
+        results[f"{name}_us_per_validation"] = elapsed / validations * 1e6
+        results[f"{name}_bandit_runs"] = len(runner.commands)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--validations', type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.validations), indent=2))
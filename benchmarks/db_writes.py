@@ -0,0 +1,103 @@
+"""
+AstraDB write path benchmark.
+
+Compares synchronous, bounded asynchronous and buffered batch writes against
+a session that simulates a fixed network round trip per request.
+
+Usage: python -m benchmarks.db_writes [--rows N] [--latency-ms MS]
+"""
+
+import argparse
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+from utils.db_manager import AstraDBManager
+
+
+class _LatencyFuture:
+    def __init__(self, future):
+        self._future = future
+
+    def add_callbacks(self, callback, errback):
+        def _done(future):
+            error = future.exception()
+            if error is None:
+                callback(future.result())
+            else:
+                errback(error)
+        self._future.add_done_callback(_done)
+
+    def result(self):
+        return self._future.result()
+
+
+class LatencySession:
+    """Session stand-in where every request costs one simulated round trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+        self._executor = ThreadPoolExecutor(max_workers=256)
+
+    def prepare(self, query: str) -> str:
+        return query.replace('?', '%s')
+
+    def execute(self, statement, params=None):
+        self.requests += 1
+        time.sleep(self.latency)
+        return []
+
+    def execute_async(self, statement, params=None):
+        self.requests += 1
+        return _LatencyFuture(self._executor.submit(time.sleep, self.latency))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown()
+
+
+def _task(task_ids: List[uuid.UUID], i: int) -> Dict:
+    return {
+        'task_id': task_ids[i % len(task_ids)],
+        'timestamp': datetime.now(),
+        'action': f"step-{i}",
+        'errors': []
+    }
+
+
+def run_benchmark(rows: int = 2000, latency: float = 0.002, tasks: int = 20) -> Dict[str, float]:
+    """Return task events/sec for each write path."""
+    results = {}
+    task_ids = [uuid.uuid4() for _ in range(tasks)]
+
+    session = LatencySession(latency)
+    manager = AstraDBManager(session=session, max_in_flight=64)
+    start = time.perf_counter()
+    for i in range(rows):
+        manager.save_task_history(_task(task_ids, i))
+    results['sync_events_per_sec'] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(rows):
+        manager.save_task_history_async(_task(task_ids, i))
+    manager.wait_for_writes()
+    results['async_events_per_sec'] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with manager.buffered_writer(batch_size=50, flush_interval=0.05) as writer:
+        for i in range(rows):
+            writer.save_task_history(_task(task_ids, i))
+    results['buffered_events_per_sec'] = rows / (time.perf_counter() - start)
+
+    session.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.rows, args.latency_ms / 1000), indent=2))
@@ -0,0 +1,94 @@
+"""
+Dependency check benchmark.
+
+Compares the validator's old dependency check (import pkg_resources, then
+pkg_resources.require per requirement) with DependencyResolver over this
+interpreter's environment. Cold numbers run in a fresh interpreter and
+include the imports and building the index; warm numbers are per check in
+a process that has already done one, including the resolver's digest check
+of the environment.
+
+Usage: python -m benchmarks.dependency_check [--checks N]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+REQUIREMENTS = ['pytest', 'packaging>=20', 'pluggy', 'iniconfig', 'missing-distribution']
+
+LEGACY = """
+import time
+start = time.perf_counter()
+import pkg_resources
+for requirement in {requirements!r}:
+    try:
+        pkg_resources.require(requirement)
+    except (pkg_resources.DistributionNotFound, pkg_resources.VersionConflict):
+        pass
+print((time.perf_counter() - start) * 1000)
+"""
+
+INDEXED = """
+import time
+start = time.perf_counter()
+from utils.dependency_index import DependencyResolver, LocalEnvironment
+DependencyResolver(LocalEnvironment()).check({requirements!r})
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _cold_ms(script: str, requirements: List[str], runs: int = 3) -> float:
+    """Best in-process time of ``script`` across fresh interpreters."""
+    timings = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, '-c', script.format(requirements=requirements)],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        timings.append(float(process.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def run_benchmark(checks: int = 200) -> Dict[str, float]:
+    """Return cold milliseconds and warm microseconds per check for each variant."""
+    import warnings
+    with warnings.catch_warnings():
+        # pkg_resources warns that it is deprecated on import
+        warnings.simplefilter('ignore')
+        import pkg_resources
+    from utils.dependency_index import DependencyResolver, LocalEnvironment
+
+    results = {
+        'pkg_resources_cold_ms': _cold_ms(LEGACY, REQUIREMENTS),
+        'index_cold_ms': _cold_ms(INDEXED, REQUIREMENTS)
+    }
+
+    start = time.perf_counter()
+    for _ in range(checks):
+        for requirement in REQUIREMENTS:
+            try:
+                pkg_resources.require(requirement)
+            except (pkg_resources.DistributionNotFound, pkg_resources.VersionConflict):
+                pass
+    results['pkg_resources_warm_us'] = (time.perf_counter() - start) / checks * 1e6
+
+    resolver = DependencyResolver(LocalEnvironment())
+    resolver.check(REQUIREMENTS)
+    start = time.perf_counter()
+    for _ in range(checks):
+        resolver.check(REQUIREMENTS)
+    results['index_warm_us'] = (time.perf_counter() - start) / checks * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--checks', type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.checks), indent=2))
@@ -0,0 +1,114 @@
+"""
+Error and task history memory benchmark.
+
+Records the same stream of events in the unbounded lists the coordinator and
+the error_handler template used (a dict per event, errors with their full
+traceback and call arguments) and in the bounded stores from utils.history,
+and reports the memory each still holds afterwards, measured with
+tracemalloc. Every error event carries its own code package, as each
+validation does, and the errors come from a handful of distinct failures
+with varying values.
+
+Usage: python -m benchmarks.history_memory [--events N]
+"""
+
+import argparse
+import json
+import time
+import traceback
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+from utils.history import ErrorHistory, RingBuffer, TaskEvent
+
+CODE = "from flask import Flask\napp = Flask(__name__)\n" + "\n".join(
+    f"@app.route('/r{i}')\ndef r{i}():\n    return 'ok {i}'\n" for i in range(40)
+)
+
+
+def _raise(index: int) -> None:
+    kind = index % 4
+    if kind == 0:
+        raise KeyError(f"user_{index}")
+    if kind == 1:
+        raise ValueError(f"invalid literal for int() with base 10: 'v{index}'")
+    if kind == 2:
+        raise TimeoutError(f"request timed out after {index % 30} seconds")
+    raise RuntimeError("Tests failed (exit code 1)")
+
+
+def _errors(events: int):
+    for index in range(events):
+        package = {'code': CODE + f"# variant {index}\n", 'dependencies': {'requirements': ['flask']}}
+        try:
+            _raise(index)
+        except Exception as e:
+            yield e, {'function': 'validate_code', 'args': (package,), 'kwargs': {}}
+
+
+def _retained_bytes(fill: Callable[[], object]) -> Dict[str, float]:
+    """Bytes still allocated by what ``fill`` returns, and its time per call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = fill()
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return {'bytes': retained, 'seconds': elapsed}
+
+
+def run_benchmark(events: int = 100_000) -> Dict[str, float]:
+    """Return retained bytes and microseconds per event for each store."""
+
+    def legacy_errors() -> List:
+        history = []
+        for error, context in _errors(events):
+            history.append({
+                'type': error.__class__.__name__,
+                'message': str(error),
+                'traceback': ''.join(traceback.format_exception(type(error), error, error.__traceback__)),
+                'context': context
+            })
+        return history
+
+    def bounded_errors() -> ErrorHistory:
+        history = ErrorHistory()
+        for error, context in _errors(events):
+            history.record_exception(error, context)
+        return history
+
+    def legacy_tasks() -> List:
+        history = []
+        for index in range(events):
+            history.append({
+                'timestamp': datetime.now().isoformat(),
+                'action': 'reassign',
+                'errors': [f"Tests failed (exit code 1): {index % 5} failed"]
+            })
+        return history
+
+    def bounded_tasks() -> RingBuffer:
+        history = RingBuffer(1000)
+        for index in range(events):
+            history.append(TaskEvent('reassign', errors=[f"Tests failed (exit code 1): {index % 5} failed"]))
+        return history
+
+    results = {}
+    for name, fill in [
+        ('legacy_errors', legacy_errors),
+        ('bounded_errors', bounded_errors),
+        ('legacy_tasks', legacy_tasks),
+        ('bounded_tasks', bounded_tasks)
+    ]:
+        measured = _retained_bytes(fill)
+        results[f"{name}_bytes"] = measured['bytes']
+        results[f"{name}_us_per_event"] = measured['seconds'] / events * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=100_000)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.events), indent=2))
@@ -0,0 +1,82 @@
+"""
+Logging per-call overhead benchmark.
+
+Measures the time a caller spends in ``logger.debug`` while several threads
+log concurrently, for handlers attached directly to the root logger (the
+previous configuration) and for the LogManager queue pipeline.
+
+Usage: python -m benchmarks.logging_overhead [--threads N] [--calls N]
+"""
+
+import argparse
+import json
+import logging
+import logging.handlers
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+from utils.logger import LogManager
+
+
+def _measure(threads: int, calls: int) -> float:
+    """Mean caller-side nanoseconds per log call across all threads."""
+    logger = logging.getLogger('benchmarks.logging_overhead')
+    barrier = threading.Barrier(threads)
+    totals = []
+
+    def worker():
+        barrier.wait()
+        start = time.perf_counter_ns()
+        for i in range(calls):
+            logger.debug("processed item %d of %d", i, calls)
+        totals.append(time.perf_counter_ns() - start)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(totals) / (threads * calls)
+
+
+def _direct_handlers(log_dir: Path) -> logging.Handler:
+    handler = logging.handlers.RotatingFileHandler(
+        str(log_dir / 'direct.log'), maxBytes=10485760, backupCount=5
+    )
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    return handler
+
+
+def run_benchmark(threads: int = 8, calls: int = 20000) -> Dict[str, float]:
+    """Return caller-side ns/call for each logging setup."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_dir = Path(tmpdir)
+
+        handler = _direct_handlers(log_dir)
+        results['direct_ns_per_call'] = _measure(threads, calls)
+        logging.getLogger().removeHandler(handler)
+        handler.close()
+
+        LogManager(log_dir)
+        results['queue_ns_per_call'] = _measure(threads, calls)
+        LogManager.shutdown()
+
+        LogManager(log_dir, json_output=True)
+        results['queue_json_ns_per_call'] = _measure(threads, calls)
+        LogManager.shutdown()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.threads, args.calls), indent=2))
@@ -0,0 +1,77 @@
+"""
+Metrics update overhead benchmark.
+
+Measures nanoseconds per counter increment and histogram observation, for
+unlabelled metrics, cached label children and a ``labels()`` lookup on every
+call, against an empty function call and a lock-protected integer counter.
+
+Usage: python -m benchmarks.metrics_overhead [--threads N] [--calls N]
+"""
+
+import argparse
+import json
+import threading
+import time
+from typing import Callable, Dict
+from utils.metrics import MetricsRegistry
+
+
+def _measure(operation: Callable[[], None], threads: int, calls: int) -> float:
+    """Mean nanoseconds per operation with ``threads`` threads calling it."""
+    barrier = threading.Barrier(threads)
+    totals = []
+
+    def worker():
+        barrier.wait()
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            operation()
+        totals.append(time.perf_counter_ns() - start)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(totals) / (threads * calls)
+
+
+def run_benchmark(threads: int = 4, calls: int = 200000) -> Dict[str, float]:
+    """Return ns/operation for each kind of update."""
+    registry = MetricsRegistry()
+    counter = registry.counter('bench_total', 'Benchmark counter')
+    labelled = registry.counter('bench_labelled_total', 'Benchmark counter', ['stage'])
+    child = labelled.labels(stage='generate')
+    histogram = registry.histogram('bench_seconds', 'Benchmark histogram', ['stage']).labels(stage='generate')
+
+    lock = threading.Lock()
+    locked_value = [0]
+
+    def locked_increment():
+        with lock:
+            locked_value[0] += 1
+
+    def noop():
+        pass
+
+    operations = {
+        'noop_call': noop,
+        'locked_int': locked_increment,
+        'counter_inc': counter.inc,
+        'labelled_child_inc': child.inc,
+        'labels_lookup_inc': lambda: labelled.labels(stage='generate').inc(),
+        'histogram_observe': lambda: histogram.observe(0.042)
+    }
+    results = {}
+    for name, operation in operations.items():
+        results[f"{name}_ns"] = _measure(operation, threads, calls)
+    results['exposition_us'] = _measure(registry.exposition, 1, 1000) / 1000
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.threads, args.calls), indent=2))
@@ -0,0 +1,96 @@
+"""
+Sandbox test execution benchmark.
+
+Replays a fix loop against a generated app: every attempt edits one
+function body, and the validator's container tests run after each edit,
+once re-running the whole suite in a single pytest process per attempt (as
+before test-impact selection) and once with selection and sharding. The
+containers are ProcessDockerClient processes, so each run pays real pytest
+start-up and test time; each test sleeps to stand in for real work.
+
+Usage: python -m benchmarks.sandbox_tests [--functions N] [--attempts N]
+                                          [--test-seconds S] [--shards N]
+"""
+
+import argparse
+import json
+import time
+from typing import Dict
+from agents.validator_agent import CodeValidator
+from utils.fakes import FakeCollection, FakeCommandRunner, FakeEmbeddings, ProcessDockerClient
+from utils.rag_manager import RAGManager
+from utils.sandbox import SandboxLimits, SandboxScheduler
+from utils.security import SecurityManager
+from utils.test_impact import TestImpact
+
+
+def _app(functions: int, edited: int) -> str:
+    lines = ["class App:\n    debug = True\n\napp = App()\n"]
+    for index in range(functions):
+        # The edited functions change their body, not their result
+        value = f"{index} + 0" if index < edited else f"{index}"
+        lines.append(f"\ndef step_{index}():\n    return {value}\n")
+    return ''.join(lines)
+
+
+def _tests(functions: int, test_seconds: float) -> str:
+    lines = ["import time\nimport app\n"]
+    for index in range(functions):
+        lines.append(
+            f"\ndef test_step_{index}():\n    time.sleep({test_seconds})\n"
+            f"    assert app.step_{index}() == {index}\n"
+        )
+    return ''.join(lines)
+
+
+def _validator(shards: int) -> CodeValidator:
+    docker_client = ProcessDockerClient()
+    return CodeValidator(
+        rag_manager=RAGManager(embeddings=FakeEmbeddings(), collection=FakeCollection()),
+        security_manager=SecurityManager(docker_client=docker_client, command_runner=FakeCommandRunner()),
+        docker_client=docker_client,
+        scheduler=SandboxScheduler(cpu_budget=shards, memory_budget='4g', limits=SandboxLimits(cpus=shards)),
+        test_shards=shards
+    )
+
+
+def run_benchmark(
+    functions: int = 16,
+    attempts: int = 4,
+    test_seconds: float = 0.05,
+    shards: int = 2
+) -> Dict[str, float]:
+    """Return milliseconds per fix loop and tests run for each variant."""
+    tests = {'test_steps.py': _tests(functions, test_seconds)}
+    results = {}
+
+    for name, selective, test_shards in [('full', False, 1), ('impact', True, shards)]:
+        validator = _validator(test_shards)
+        impact = TestImpact()
+        tests_run = 0
+        seconds_saved = 0.0
+        start = time.perf_counter()
+        for attempt in range(attempts + 1):
+            outcome = {'valid': True, 'errors': []}
+            code_package = {'code': _app(functions, attempt), 'files': tests}
+            validator._test_in_container(code_package, outcome, impact if selective else TestImpact())
+            if not outcome['valid']:
+                raise RuntimeError(f"Benchmark tests failed: {outcome['errors']}")
+            tests_run += outcome['test_impact']['tests_run']
+            seconds_saved += outcome['test_impact']['seconds_saved']
+        results[f"{name}_ms"] = (time.perf_counter() - start) * 1000
+        results[f"{name}_tests_run"] = tests_run
+        results[f"{name}_reported_seconds_saved"] = seconds_saved
+
+    results['speedup'] = results['full_ms'] / results['impact_ms']
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--functions', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=4)
+    parser.add_argument('--test-seconds', type=float, default=0.05)
+    parser.add_argument('--shards', type=int, default=2)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.functions, args.attempts, args.test_seconds, args.shards), indent=2))
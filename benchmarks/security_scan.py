@@ -0,0 +1,62 @@
+"""
+Security scan latency benchmark.
+
+Scans distinct code packages with the Docker posture checks run on every
+scan (as before the posture cache), revalidated against the image and
+daemon fingerprints on every scan (posture_ttl=0), and reused within the
+default TTL. Daemon queries go to FakeDockerClient with a simulated
+round-trip latency; bandit and safety run through FakeCommandRunner.
+
+Usage: python -m benchmarks.security_scan [--scans N] [--api-latency S]
+"""
+
+import argparse
+import json
+import time
+from typing import Dict
+from utils.fakes import FakeCommandRunner, FakeDockerClient
+from utils.security import DOCKER_POSTURE_TTL, SecurityManager
+
+
+def _uncached(manager: SecurityManager) -> SecurityManager:
+    def check(results: Dict) -> None:
+        findings = manager._inspect_docker_security()
+        results['vulnerabilities'].extend(findings['vulnerabilities'])
+        results['security_score'] *= findings['security_score']
+
+    manager._check_docker_security = check
+    return manager
+
+
+def run_benchmark(scans: int = 200, api_latency: float = 0.002) -> Dict[str, float]:
+    """Return milliseconds and daemon queries per scan for each variant."""
+    results = {}
+    for name, ttl, uncached in [
+        ('uncached', DOCKER_POSTURE_TTL, True),
+        ('revalidated', 0.0, False),
+        ('cached', DOCKER_POSTURE_TTL, False)
+    ]:
+        docker_client = FakeDockerClient(api_latency=api_latency)
+        manager = SecurityManager(docker_client=docker_client, command_runner=FakeCommandRunner(), posture_ttl=ttl)
+        if uncached:
+            _uncached(manager)
+
+        start = time.perf_counter()
+        for index in range(scans):
+            manager.run_security_scan({
+                'code': f"def handler_{index}():\n    return {index}\n",
+                'dependencies': {'requirements': []}
+            })
+        elapsed = time.perf_counter() - start
+        results[f"{name}_ms_per_scan"] = elapsed / scans * 1000
+        results[f"{name}_daemon_queries_per_scan"] = docker_client.api_calls / scans
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scans', type=int, default=200)
+    parser.add_argument('--api-latency', type=float, default=0.002)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.scans, args.api_latency), indent=2))
@@ -0,0 +1,127 @@
+"""
+Speculative generation latency benchmark.
+
+Compares the time to a passing package when candidates are validated one
+after another (as the fix-and-revalidate cycle does) with speculative runs
+that validate several candidates concurrently and keep the first to pass.
+Candidates come from CodeGenerator with template variants; validation is
+simulated with a fixed duration and a seeded pass/fail draw per attempt,
+so both modes see the same outcomes. A speculative run without a pass is
+followed by another round of candidates.
+
+Usage: python -m benchmarks.speculative_generation [--runs N] [--pass-rate P]
+                                                   [--validate-seconds S]
+                                                   [--candidates N]
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+from agents.generator_agent import CodeGenerator
+from utils.speculative import Cancelled, SpeculativeValidator
+
+MAX_ATTEMPTS = 32
+PORT = re.compile(r"port=(\d+)")
+
+
+class SimulatedValidator:
+    """Passes attempt ``offset + variant`` of a run with probability ``pass_rate``."""
+
+    def __init__(self, pass_rate: float, seconds: float):
+        self.pass_rate = pass_rate
+        self.seconds = seconds
+        self.run = 0
+        self.offset = 0
+        self.validations = 0
+        self._lock = threading.Lock()
+
+    def passes(self, attempt: int) -> bool:
+        return random.Random(self.run * MAX_ATTEMPTS + attempt).random() < self.pass_rate
+
+    def validate_code(self, code_package: Dict, cancel=None) -> Dict:
+        with self._lock:
+            self.validations += 1
+        variant = int(PORT.search(code_package['code']).group(1)) - 8000
+        stopped = threading.Event()
+        if cancel is not None:
+            cancel.on_cancel(stopped.set)
+        if stopped.wait(self.seconds):
+            raise Cancelled("cancelled")
+        valid = self.passes(self.offset + variant)
+        return {'valid': valid, 'errors': [] if valid else ["Tests failed (exit code 1)"]}
+
+
+def _requirements() -> Dict:
+    return {
+        'framework_preferences': {'backend': 'flask'},
+        'specifications': {'type': 'web_app'},
+        'template_values': {'port': 8000},
+        'template_variants': [{'port': 8000 + variant} for variant in range(1, MAX_ATTEMPTS)]
+    }
+
+
+def _summary(name: str, latencies: List[float], validations: int, runs: int) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        f"{name}_p50_ms": statistics.median(ordered) * 1000,
+        f"{name}_p95_ms": ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)] * 1000,
+        f"{name}_validations_per_run": validations / runs
+    }
+
+
+def run_benchmark(
+    runs: int = 100,
+    pass_rate: float = 0.5,
+    validate_seconds: float = 0.02,
+    candidates: Optional[int] = None
+) -> Dict[str, float]:
+    """Return latency percentiles and validations per run for both modes."""
+    generator = CodeGenerator()
+    requirements = _requirements()
+
+    validator = SimulatedValidator(pass_rate, validate_seconds)
+    serial = []
+    for run in range(runs):
+        validator.run = run
+        start = time.perf_counter()
+        for attempt in range(MAX_ATTEMPTS):
+            package = generator.generate_code(requirements, {}, attempt)
+            if validator.validate_code(package)['valid']:
+                break
+        serial.append(time.perf_counter() - start)
+    results = _summary('serial', serial, validator.validations, runs)
+
+    validator = SimulatedValidator(pass_rate, validate_seconds)
+    speculation = SpeculativeValidator(generator, validator, candidates)
+    speculative = []
+    counts = []
+    for run in range(runs):
+        validator.run = run
+        validator.offset = 0
+        start = time.perf_counter()
+        while validator.offset < MAX_ATTEMPTS:
+            package, validation = speculation.validate(speculation.generate(requirements, {}))
+            counts.append(validation['speculation']['candidates'])
+            if validation['valid']:
+                break
+            validator.offset += validation['speculation']['candidates']
+        speculative.append(time.perf_counter() - start)
+    results.update(_summary('speculative', speculative, validator.validations, runs))
+    results['speculative_mean_candidates'] = statistics.mean(counts)
+    results['p95_speedup'] = results['serial_p95_ms'] / results['speculative_p95_ms']
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--pass-rate', type=float, default=0.5)
+    parser.add_argument('--validate-seconds', type=float, default=0.02)
+    parser.add_argument('--candidates', type=int, help="Fixed candidate count (default: tuned)")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.runs, args.pass_rate, args.validate_seconds, args.candidates), indent=2))
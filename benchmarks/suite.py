@@ -0,0 +1,232 @@
+"""
+Benchmark suite with stored baselines and regression flags.
+
+Runs the pipeline end to end on the offline fakes from utils.fakes, recording
+per-stage latency percentiles, plus the component benchmarks in this
+package. Results are compared with a baseline JSON file; a metric that got
+worse by more than the threshold is reported as a regression and the
+command exits with status 1.
+
+Usage: python -m benchmarks.suite [--only NAME ...] [--iterations N]
+                                  [--baseline FILE] [--save-baseline]
+                                  [--threshold FRACTION]
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_BASELINE = Path("data/benchmarks/baseline.json")
+
+# Varied inputs the bundled templates can serve
+REQUIREMENTS = [
+    "Create a Flask web app with a REST API and health checks",
+    "Create a Flask web crawler that stores results",
+    "Build a small Flask web app with user login"
+]
+
+# Smaller workloads than the standalone defaults so the suite stays quick
+COMPONENT_BENCHMARKS: Dict[str, Dict] = {
+    'db_writes': {'rows': 500, 'latency': 0.001},
+    'artifact_storage': {'tasks': 50, 'iterations': 4},
+    'template_render': {'variants': 2000},
+    'logging_overhead': {'threads': 4, 'calls': 5000},
+    'metrics_overhead': {'threads': 2, 'calls': 50000},
+    'chunking': {'repeat': 3},
+    'code_parsing': {'validations': 100},
+    'sandbox_tests': {'functions': 8, 'attempts': 2, 'test_seconds': 0.01},
+    'dependency_check': {'checks': 50},
+    'security_scan': {'scans': 100},
+    'history_memory': {'events': 10000},
+    'speculative_generation': {'runs': 30, 'validate_seconds': 0.01},
+    'checkpoint_resume': {'runs': 3, 'search_latency': 0.02, 'embeddings': 200}
+}
+
+# Metric name fragments saying which direction is an improvement
+HIGHER_IS_BETTER = ('_per_sec', 'speedup', 'ratio')
+LOWER_IS_BETTER = ('_ms', '_us', '_ns', '_bytes')
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def pipeline_benchmark(iterations: int = 30, rounds: int = 3) -> Dict[str, float]:
+    """
+    Per-stage and end-to-end latency of run_pipeline on offline components.
+
+    Each metric is the best of ``rounds`` rounds of ``iterations`` runs, which
+    filters out most interference from other work on the machine.
+    """
+    from main import run_pipeline
+    from utils.fakes import build_offline_components
+
+    start = time.perf_counter()
+    components = build_offline_components()
+    results = {'build_components_ms': (time.perf_counter() - start) * 1000}
+
+    requirements = [components['collector'].process_requirements(text) for text in REQUIREMENTS]
+    # Warm-up: first runs pay for lazy imports and caches
+    for requirement in requirements:
+        run_pipeline(components, requirement)
+
+    for _ in range(rounds):
+        stage_times: Dict[str, List[float]] = {}
+        start = time.perf_counter()
+        for i in range(iterations):
+            outcome = run_pipeline(components, requirements[i % len(requirements)])
+            for stage, seconds in outcome['timings'].items():
+                stage_times.setdefault(stage, []).append(seconds * 1000)
+            stage_times.setdefault('total', []).append(sum(outcome['timings'].values()) * 1000)
+        elapsed = time.perf_counter() - start
+
+        round_results = {'runs_per_sec': iterations / elapsed}
+        for stage, values in stage_times.items():
+            round_results[f"{stage}_ms_p50"] = statistics.median(values)
+            round_results[f"{stage}_ms_p95"] = _percentile(values, 0.95)
+        for metric, value in round_results.items():
+            better = max if metric_direction(metric) > 0 else min
+            results[metric] = better(results.get(metric, value), value)
+    return results
+
+
+def _component_benchmark(name: str) -> Callable[[], Dict[str, float]]:
+    def run() -> Dict[str, float]:
+        module = importlib.import_module(f"benchmarks.{name}")
+        return module.run_benchmark(**COMPONENT_BENCHMARKS[name])
+    return run
+
+
+def run_suite(names: Optional[List[str]] = None, iterations: int = 30) -> Dict[str, Dict[str, float]]:
+    """
+    Run the selected benchmarks.
+
+    Args:
+        names: Benchmarks to run; 'pipeline' and the COMPONENT_BENCHMARKS
+            keys. All of them when omitted.
+        iterations: Pipeline runs measured after warm-up
+
+    Returns:
+        Metrics by benchmark name
+    """
+    benchmarks: Dict[str, Callable[[], Dict[str, float]]] = {
+        'pipeline': lambda: pipeline_benchmark(iterations)
+    }
+    benchmarks.update({name: _component_benchmark(name) for name in COMPONENT_BENCHMARKS})
+
+    unknown = set(names or []) - set(benchmarks)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    return {name: benchmark() for name, benchmark in benchmarks.items() if not names or name in names}
+
+
+def metric_direction(metric: str) -> int:
+    """1 if higher is better, -1 if lower is better, 0 if not compared."""
+    if any(fragment in metric for fragment in HIGHER_IS_BETTER):
+        return 1
+    if any(fragment in metric for fragment in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = 0.25
+) -> List[Dict]:
+    """
+    Metrics that moved in the wrong direction by more than ``threshold``.
+
+    Args:
+        results: Current metrics by benchmark
+        baseline: Baseline metrics by benchmark
+        threshold: Allowed relative change, e.g. 0.25 for 25%
+
+    Returns:
+        One dict per regressed metric with the baseline and current values
+    """
+    regressions = []
+    for benchmark, metrics in results.items():
+        for metric, value in metrics.items():
+            direction = metric_direction(metric)
+            previous = baseline.get(benchmark, {}).get(metric)
+            if not direction or not previous:
+                continue
+            change = (value - previous) / previous
+            if change * direction < -threshold:
+                regressions.append({
+                    'benchmark': benchmark,
+                    'metric': metric,
+                    'baseline': previous,
+                    'current': value,
+                    'change': change
+                })
+    return regressions
+
+
+def load_baseline(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, float]]) -> None:
+    """Store results with the environment they were measured in."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }, indent=2))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="Run only these benchmarks")
+    parser.add_argument('--iterations', type=int, default=30, help="Measured pipeline runs")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help="Write the results as the new baseline instead of comparing"
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.25,
+        help="Relative change counted as a regression (default: 0.25)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = run_suite(args.only, args.iterations)
+    report = {'results': results}
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        report['baseline_saved'] = str(args.baseline)
+    else:
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            report['baseline'] = None
+        else:
+            report['baseline'] = str(args.baseline)
+            report['regressions'] = find_regressions(results, baseline['results'], args.threshold)
+
+    print(json.dumps(report, indent=2))
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -46,7 +46,8 @@ class EnvironmentManager:
             'secure_connect_bundle': os.getenv('ASTRA_DB_BUNDLE'),
             'client_id': os.getenv('ASTRA_DB_CLIENT_ID'),
             'client_secret': os.getenv('ASTRA_DB_CLIENT_SECRET'),
-            'keyspace': os.getenv('ASTRA_DB_KEYSPACE', 'agent_system')
+            'keyspace': os.getenv('ASTRA_DB_KEYSPACE', 'agent_system'),
+            'max_in_flight': int(os.getenv('ASTRA_DB_MAX_IN_FLIGHT', 64))
         }
 
     def get_milvus_config(self) -> Dict[str, Any]:
@@ -74,10 +75,23 @@ class EnvironmentManager:
             'docker_image_prefix': os.getenv('DOCKER_IMAGE_PREFIX')
         }
 
+    def get_sandbox_config(self) -> Dict[str, Any]:
+        """Get sandbox scheduling configuration from environment."""
+        return {
+            'cpu_budget': float(os.getenv('SANDBOX_CPU_BUDGET', os.cpu_count() or 1)),
+            'memory_budget': os.getenv('SANDBOX_MEMORY_BUDGET', '4g'),
+            'cpus': float(os.getenv('SANDBOX_CPUS', 0.5)),
+            'memory': os.getenv('SANDBOX_MEMORY', '512m'),
+            'timeout': float(os.getenv('SANDBOX_TIMEOUT', 60)),
+            'max_queue': int(os.getenv('SANDBOX_MAX_QUEUE', 32))
+        }
+
     def get_api_config(self) -> Dict[str, Any]:
         """Get API configuration from environment."""
         return {
             'host': os.getenv('API_HOST', '0.0.0.0'),
             'port': int(os.getenv('API_PORT', 8000)),
-            'debug': os.getenv('DEBUG_MODE', 'True').lower() == 'true'
+            'debug': os.getenv('DEBUG_MODE', 'True').lower() == 'true',
+            'workers': int(os.getenv('API_WORKERS', 2)),
+            'max_queue': int(os.getenv('API_MAX_QUEUE', 16))
         } 
\ No newline at end of file
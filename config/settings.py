@@ -1,33 +1,63 @@
 import os
+import threading
 from pathlib import Path
+from typing import Any, Callable, Dict
 from .env_manager import EnvironmentManager
 
-# Initialize environment manager
-env_manager = EnvironmentManager()
-
 # Base paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / 'data'
 CACHE_DIR = DATA_DIR / 'cache'
 
-# Create directories if they don't exist
-DATA_DIR.mkdir(exist_ok=True)
-CACHE_DIR.mkdir(exist_ok=True)
+_env_manager = None
+_env_lock = threading.Lock()
+
+def get_env_manager() -> EnvironmentManager:
+    """
+    Create the environment manager on first use.
 
-# Database settings
-ASTRA_DB_CONFIG = env_manager.get_db_config()
+    Loading '.env', validating required variables and creating the data
+    directories are deferred until a setting is actually read, so commands
+    that never touch configuration start without them.
+    """
+    global _env_manager
+    if _env_manager is None:
+        with _env_lock:
+            if _env_manager is None:
+                manager = EnvironmentManager()
 
-# Vector DB settings (Milvus)
-MILVUS_CONFIG = env_manager.get_milvus_config()
+                # Create directories if they don't exist
+                DATA_DIR.mkdir(exist_ok=True)
+                CACHE_DIR.mkdir(exist_ok=True)
 
-# NeMo settings
-NEMO_CONFIG = env_manager.get_nemo_config()
+                _env_manager = manager
+    return _env_manager
 
-# Security settings
-SECURITY_CONFIG = env_manager.get_security_config()
+# Settings computed from the environment on first access
+_LAZY_SETTINGS: Dict[str, Callable[[], Any]] = {
+    'env_manager': get_env_manager,
+    # Database settings
+    'ASTRA_DB_CONFIG': lambda: get_env_manager().get_db_config(),
+    # Vector DB settings (Milvus)
+    'MILVUS_CONFIG': lambda: get_env_manager().get_milvus_config(),
+    # NeMo settings
+    'NEMO_CONFIG': lambda: get_env_manager().get_nemo_config(),
+    # Security settings
+    'SECURITY_CONFIG': lambda: get_env_manager().get_security_config(),
+    # Sandbox scheduling settings
+    'SANDBOX_CONFIG': lambda: get_env_manager().get_sandbox_config(),
+    # API settings
+    'API_CONFIG': lambda: get_env_manager().get_api_config()
+}
 
-# API settings
-API_CONFIG = env_manager.get_api_config()
+def __getattr__(name: str) -> Any:
+    """Resolve environment-backed settings lazily and cache them (PEP 562)."""
+    factory = _LAZY_SETTINGS.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = factory()
+    globals()[name] = value
+    return value
 
 # Logging configuration
 LOGGING_CONFIG = {
@@ -59,4 +89,4 @@ LOGGING_CONFIG = {
             'propagate': True
         }
     }
-} 
\ No newline at end of file
+}
@@ -1,22 +1,63 @@
 """
 Error Handler Template
 This template provides error handling and recovery mechanisms.
+
+Framework: python
+Type: error_handler
 """
 
 import logging
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable
+from collections import deque
 from functools import wraps
+import hashlib
+import re
+import time
 import traceback
 import sys
 
 logger = logging.getLogger(__name__)
 
+# Variable parts of error messages, replaced before fingerprinting; the same
+# rules as the pipeline's own error history, so fingerprints match across both
+_VARIABLE_PARTS = [
+    (re.compile(r"0x[0-9a-fA-F]+"), '<addr>'),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), '<str>'),
+    (re.compile(r"(?:/[\w.\-]+)+"), '<path>'),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), '<num>')
+]
+
+class ErrorRecord:
+    """One distinct error and how often it occurred."""
+    
+    __slots__ = ('fingerprint', 'type', 'message', 'function', 'count', 'last_seen')
+    
+    def __init__(self, fingerprint: str, error_type: str, message: str, function: Optional[str]):
+        self.fingerprint = fingerprint
+        self.type = error_type
+        self.message = message[:500]
+        self.function = function
+        self.count = 0
+        self.last_seen = 0.0
+
+def error_fingerprint(error: Exception) -> str:
+    """Same value for repeats of an error that differ only in addresses, strings, paths or numbers."""
+    message = str(error)
+    for pattern, placeholder in _VARIABLE_PARTS:
+        message = pattern.sub(placeholder, message)
+    frames = traceback.extract_tb(error.__traceback__)
+    location = f"{frames[-1].filename}:{frames[-1].name}" if frames else ''
+    return hashlib.sha1(f"{error.__class__.__name__}|{message}|{location}".encode()).hexdigest()[:12]
+
 class ErrorRecoveryManager:
     """Manages error recovery strategies."""
     
-    def __init__(self):
+    def __init__(self, history_size: int = 1000, max_fingerprints: int = 256):
         self.recovery_strategies: Dict[str, Callable] = {}
-        self.error_history: List[Dict[str, Any]] = []
+        # Newest occurrences only, as fingerprints; arguments and tracebacks are not kept
+        self.error_history: deque = deque(maxlen=history_size)
+        self.error_counts: Dict[str, ErrorRecord] = {}
+        self.max_fingerprints = max_fingerprints
         
     def register_strategy(self, error_type: str, strategy: Callable) -> None:
         """Register a recovery strategy for an error type."""
@@ -26,13 +67,19 @@ class ErrorRecoveryManager:
         """Handle an error using registered strategies."""
         error_type = error.__class__.__name__
         
-        # Log the error
-        self.error_history.append({
-            'type': error_type,
-            'message': str(error),
-            'traceback': traceback.format_exc(),
-            'context': context
-        })
+        # Log the error, aggregated with earlier occurrences
+        fingerprint = error_fingerprint(error)
+        record = self.error_counts.get(fingerprint)
+        if record is None:
+            if len(self.error_counts) >= self.max_fingerprints:
+                oldest = min(self.error_counts.values(), key=lambda r: r.last_seen)
+                del self.error_counts[oldest.fingerprint]
+            function = getattr(context.get('function'), '__name__', context.get('function'))
+            record = self.error_counts[fingerprint] = ErrorRecord(fingerprint, error_type, str(error), function)
+        record.count += 1
+        record.last_seen = time.time()
+        self.error_history.append((record.last_seen, fingerprint))
+        logger.debug(f"{error_type} ({fingerprint}) seen {record.count} times", exc_info=error)
         
         # Attempt recovery
         if error_type in self.recovery_strategies:
@@ -43,6 +90,11 @@ class ErrorRecoveryManager:
                 return None
                 
         return None
+    
+    def get_error_summary(self) -> List[Dict[str, Any]]:
+        """Distinct errors, most frequent first."""
+        records = sorted(self.error_counts.values(), key=lambda r: r.count, reverse=True)
+        return [{name: getattr(record, name) for name in ErrorRecord.__slots__} for record in records]
 
 def with_error_recovery(recovery_manager: ErrorRecoveryManager):
     """Decorator for functions that need error recovery."""
@@ -52,8 +104,9 @@ def with_error_recovery(recovery_manager: ErrorRecoveryManager):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
+                # Passed to the strategy only; the history does not keep it
                 context = {
-                    'function': func.__name__,
+                    'function': func,
                     'args': args,
                     'kwargs': kwargs
                 }
@@ -2,11 +2,16 @@
 Flask Application Template
 This template is used by the generator agent to create Flask applications.
 Variables in {{brackets}} will be replaced with actual values.
+
+Framework: flask
+Type: web_app
 """
 
 from flask import Flask, jsonify, request
 from typing import Dict, Any
 import logging
+import os
+import secrets
 from datetime import datetime
 
 # Configure logging
@@ -23,7 +28,8 @@ def load_config() -> Dict[str, Any]:
     """Load application configuration."""
     config = {
         'DEBUG': {{debug}},
-        'SECRET_KEY': '{{secret_key}}',
+        # Never rendered into the source; a per-process key when the environment sets none
+        'SECRET_KEY': os.environ.get('SECRET_KEY') or secrets.token_hex(16),
         'ENVIRONMENT': '{{environment}}',
         'API_VERSION': '{{version}}',
         'CREATED_AT': datetime.utcnow().isoformat()
@@ -1,6 +1,9 @@
 """
 Test Template
 This template is used to generate test cases for the application.
+
+Framework: flask
+Type: test
 """
 
 import pytest
@@ -1,55 +1,508 @@
 from agents.collector_agent import RequirementCollector
 from agents.generator_agent import CodeGenerator
-from agents.validator_agent import CodeValidator
+from agents.validator_agent import CodeValidator, check_syntax
 from agents.coordinator_agent import TaskCoordinator
 from utils.firecrawl_wrapper import FirecrawlWrapper
 from utils.nemo_utils import NeMoUtils
 from utils.security import SecurityManager
 from utils.rag_manager import RAGManager
 from utils.logger import LogManager
+from utils.checkpoint import DEFAULT_CHECKPOINT_DIR, CheckpointStore, input_hash
+from utils.metrics import REGISTRY, histogram
+from utils.profiling import PROFILE_MODES, maybe_profile, profile_dir
+from utils.sandbox import sandbox_priority
+from utils.speculative import SpeculativeValidator
+from utils.tracing import configure_tracing, span
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, TextIO
+import argparse
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import sys
+import time
 
-def main():
-    # Initialize logging
-    logger = LogManager(Path("data/logs")).get_logger(__name__)
-    
-    try:
-        # Initialize components
-        collector = RequirementCollector()
-        generator = CodeGenerator()
-        validator = CodeValidator()
-        coordinator = TaskCoordinator()
-        rag_manager = RAGManager()
-        security_manager = SecurityManager()
-        
-        # Initialize utilities
-        firecrawl = FirecrawlWrapper()
-        nemo_utils = NeMoUtils()
+# Components of the current batch worker process, built once by _init_worker
+_worker_components: Optional[Dict] = None
+# Where the batch worker dumps its metrics after each job, if anywhere
+_worker_metrics_path: Optional[Path] = None
 
-        # Step 1: Collect Requirements
-        user_requirements = collector.collect_requirements()
+STAGE_SECONDS = histogram('pipeline_stage_seconds', 'Duration of each pipeline stage', ['stage'])
+
+def build_components(candidates: Optional[int] = 1, checkpoint_dir: Optional[Path] = None) -> Dict:
+    """
+    Create the pipeline components; expensive, so done once per process.
+
+    Args:
+        candidates: Candidates generated and validated concurrently per
+            run; None tunes the count from measured pass rates
+        checkpoint_dir: Where stage outputs are checkpointed; no
+            checkpoints when omitted
+    """
+    rag_manager = RAGManager()
+    security_manager = SecurityManager()
+    components = {
+        'collector': RequirementCollector(),
+        'generator': CodeGenerator(),
+        'validator': CodeValidator(rag_manager=rag_manager, security_manager=security_manager),
+        'coordinator': TaskCoordinator(),
+        'firecrawl': FirecrawlWrapper(),
+        'nemo_utils': NeMoUtils()
+    }
+    if candidates != 1:
+        components['speculation'] = SpeculativeValidator(
+            components['generator'], components['validator'], candidates
+        )
+    if checkpoint_dir is not None:
+        components['checkpoints'] = CheckpointStore(checkpoint_dir)
+    return components
+
+def close_components(components: Dict) -> None:
+    """Release what build_components started, i.e. the speculative candidate pool."""
+    speculation = components.get('speculation')
+    if speculation is not None:
+        speculation.close()
+
+def run_pipeline(
+    components: Dict,
+    user_requirements: Dict,
+    on_stage: Optional[Callable[[str, float], None]] = None,
+    run_id: Optional[str] = None
+) -> Dict:
+    """
+    Run the scrape, process, generate and validate stages for one requirement.
+
+    Args:
+        components: Pipeline components from build_components
+        user_requirements: Processed requirements
+        on_stage: Called with the stage name and its duration as each stage completes
+        run_id: Identifies the run in the checkpoint store; rerunning with
+            the same id and requirements resumes after the last completed stage
+
+    Each stage runs in a tracing span nested under a 'pipeline' span. With a
+    'speculation' component, several candidates are generated and the
+    validate stage ends when the first of them passes.
 
+    With a 'checkpoints' component, the output of each stage before
+    validation is checkpointed and reused on a rerun. Scrape, process and
+    generate outputs depend only on the requirements and are shared between
+    runs; speculative candidate lists, whose size is tuned per run, are
+    only reused by the same run id.
+
+    Returns:
+        Dict with the generated code package, validation results,
+        per-stage timings in seconds and, with checkpoints, the stages
+        that were resumed
+    """
+    timings = {}
+    checkpoints = components.get('checkpoints')
+    resumed = []
+
+    def timed(stage, func, *args, key=None):
+        with span(f"stage.{stage}") as stage_span:
+            if key is None:
+                result = func(*args)
+            else:
+                result, from_checkpoint = checkpoints.run_stage(stage, key, func, *args, run_id=run_id)
+                stage_span.set_attribute('resumed', from_checkpoint)
+                if from_checkpoint:
+                    resumed.append(stage)
+        timings[stage] = stage_span.duration
+        STAGE_SECONDS.labels(stage=stage).observe(timings[stage])
+        if on_stage is not None:
+            on_stage(stage, timings[stage])
+        return result
+
+    speculation = components.get('speculation')
+    keys = {}
+    if checkpoints is not None:
+        keys['scrape'] = checkpoints.stage_key('scrape', input_hash(user_requirements))
+        keys['process'] = checkpoints.stage_key('process', keys['scrape'])
+        if speculation is None:
+            keys['generate'] = checkpoints.stage_key('generate', keys['process'])
+        elif run_id is not None:
+            keys['generate'] = checkpoints.stage_key('generate_candidates', keys['process'], run_id)
+
+    with span('pipeline') as pipeline_span:
         # Step 2: Gather relevant data
-        data = firecrawl.scrape_data(user_requirements)
+        data = timed('scrape', components['firecrawl'].scrape_data, user_requirements, key=keys.get('scrape'))
 
         # Step 3: Process data with NeMo
-        structured_data = nemo_utils.process_data(data)
+        structured_data = timed('process', components['nemo_utils'].process_data, data, key=keys.get('process'))
+
+        if speculation is None:
+            # Step 4: Generate Code
+            generated_code = timed(
+                'generate', components['generator'].generate_code, user_requirements, structured_data,
+                key=keys.get('generate')
+            )
+
+            # Step 5: Validate Code
+            validation_results = timed('validate', components['validator'].validate_code, generated_code)
+        else:
+            # Steps 4 and 5: Generate candidates and keep the first that validates
+            candidates = timed(
+                'generate', speculation.generate, user_requirements, structured_data, key=keys.get('generate')
+            )
+            generated_code, validation_results = timed('validate', speculation.validate, candidates)
+        pipeline_span.set_attribute('valid', validation_results['valid'])
+
+    outcome = {
+        'code_package': generated_code,
+        'validation': validation_results,
+        'timings': timings
+    }
+    if checkpoints is not None:
+        outcome['resumed'] = resumed
+    return outcome
+
+def main(candidates: Optional[int] = 1, checkpoint_dir: Optional[Path] = None, run_id: Optional[str] = None):
+    # Initialize logging
+    logger = LogManager(Path("data/logs")).get_logger(__name__)
 
-        # Step 4: Generate Code
-        generated_code = generator.generate_code(user_requirements, structured_data)
+    components = {}
+    try:
+        # Initialize components
+        components = build_components(candidates, checkpoint_dir)
+
+        # Step 1: Collect Requirements
+        user_requirements = components['collector'].collect_requirements()
 
-        # Step 5: Validate Code
-        validation_results = validator.validate_code(generated_code)
+        outcome = run_pipeline(components, user_requirements, run_id=run_id)
+        generated_code = outcome['code_package']
+        validation_results = outcome['validation']
 
         # Step 6: Handle validation results
+        coordinator = components['coordinator']
         if not validation_results['valid']:
-            coordinator.reassign_task(generator, validation_results['errors'])
+            coordinator.reassign_task(components['generator'], validation_results['errors'])
         else:
             coordinator.provide_feedback(generated_code)
 
     except Exception as e:
         logger.error(f"Error in main execution: {str(e)}")
         raise
+    finally:
+        close_components(components)
+
+def read_jobs(source: TextIO) -> Iterator[Dict]:
+    """
+    Read requirement records from JSONL.
+
+    Each line is either a JSON string with the requirements text or an
+    object with a 'requirements' field, an optional 'id', an optional
+    'profile' mode and an optional sandbox 'priority' for that job. A line
+    that is neither yields a record with only its line number as 'id' and
+    an 'error', so one bad line does not stop the batch.
+    """
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield {'id': line_number, 'error': f"Invalid JSON on line {line_number}: {str(e)}"}
+            continue
+        if isinstance(record, str):
+            record = {'requirements': record}
+        if not isinstance(record, dict):
+            yield {'id': line_number, 'error': f"Line {line_number} is not a string or an object"}
+            continue
+        record.setdefault('id', line_number)
+        yield record
+
+def _init_worker(
+    trace_options: Optional[Dict] = None,
+    metrics_path: Optional[str] = None,
+    candidates: Optional[int] = 1,
+    checkpoint_dir: Optional[Path] = None
+) -> None:
+    """Build the components once for each worker process."""
+    global _worker_components, _worker_metrics_path
+    LogManager(Path("data/logs"))
+    if trace_options:
+        configure_tracing(**trace_options)
+    if metrics_path:
+        # One file per worker, as each process has its own registry
+        path = Path(metrics_path)
+        _worker_metrics_path = path.with_name(f"{path.stem}-{os.getpid()}{path.suffix}")
+    _worker_components = build_components(candidates, checkpoint_dir)
+    # Workers exit without running atexit hooks, but do run multiprocessing finalizers
+    multiprocessing.util.Finalize(None, close_components, args=(_worker_components,), exitpriority=10)
+
+def _run_job(
+    job: Dict,
+    submitted_at: float,
+    profile: Optional[str] = None,
+    run_id: Optional[str] = None
+) -> Dict:
+    """Run one batch job in a worker; failures are reported, not raised."""
+    started_at = time.time()
+    start = time.perf_counter()
+    result = {
+        'id': job['id'],
+        'worker': os.getpid(),
+        'timings': {'queue_wait': started_at - submitted_at}
+    }
+    profile = job.get('profile', profile)
+    run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+    output_dir = profile_dir(run_id, job['id'])
+    if profile:
+        result['profile_dir'] = str(output_dir)
+    try:
+        with maybe_profile(profile, output_dir), span('job', job_id=job['id']), \
+                sandbox_priority(job.get('priority', 0)):
+            requirements = _worker_components['collector'].process_requirements(job['requirements'])
+            outcome = run_pipeline(_worker_components, requirements, run_id=f"{run_id}-{job['id']}")
+        result['status'] = 'valid' if outcome['validation']['valid'] else 'invalid'
+        result['code_package'] = outcome['code_package']
+        result['validation'] = outcome['validation']
+        result['timings'].update(outcome['timings'])
+        if 'resumed' in outcome:
+            result['resumed'] = outcome['resumed']
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    result['timings']['total'] = time.perf_counter() - start
+    if _worker_metrics_path is not None:
+        REGISTRY.write(_worker_metrics_path)
+    return result
+
+def run_batch(
+    source: TextIO,
+    output: TextIO,
+    workers: int,
+    trace_options: Optional[Dict] = None,
+    profile: Optional[str] = None,
+    run_id: Optional[str] = None,
+    metrics_path: Optional[str] = None,
+    candidates: Optional[int] = 1,
+    checkpoint_dir: Optional[Path] = None
+) -> int:
+    """
+    Fan requirement records out to a worker process pool.
+
+    Results are written to ``output`` as JSONL in completion order. At most
+    twice the worker count of jobs are queued at a time, so arbitrarily
+    long inputs are streamed rather than loaded up front.
+
+    If a worker process dies, the pool is replaced and the jobs that were
+    in it are rerun one at a time; a job that kills its worker again is
+    reported as an error and the rest of the batch carries on.
+
+    Args:
+        source: JSONL requirement records
+        output: Destination for JSONL results
+        workers: Number of worker processes
+        trace_options: configure_tracing arguments applied in each worker
+        profile: Profile mode applied to every job unless a record sets its own
+        run_id: Groups the per-job profiles under data/logs/profiles/<run_id>;
+            with checkpoints, each job resumes under '<run_id>-<job id>'
+        metrics_path: Each worker writes its metrics next to this path,
+            suffixed with its process id
+        candidates: Candidates per job, as for build_components
+        checkpoint_dir: Where each worker checkpoints stage outputs
+
+    Returns:
+        Number of jobs that did not produce valid code
+    """
+    # fork lets workers inherit the already imported modules
+    start_methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in start_methods else None)
+
+    failures = 0
+    jobs = read_jobs(source)
+    # Jobs in flight when a worker died; rerun one at a time to find the culprit
+    suspects = deque()
+
+    def write_result(result: Dict) -> None:
+        nonlocal failures
+        failures += result['status'] != 'valid'
+        output.write(json.dumps(result, default=str) + '\n')
+        output.flush()
+
+    while True:
+        pending = {}
+        broken = False
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(trace_options, metrics_path, candidates, checkpoint_dir)
+        ) as pool:
+            while True:
+                # Once the pool is broken, only collect the jobs still in it
+                if not broken and suspects:
+                    if not pending:
+                        job = suspects.popleft()
+                        pending[pool.submit(_run_job, job, time.time(), profile, run_id)] = (job, True)
+                elif not broken:
+                    for job in jobs:
+                        if 'error' in job:
+                            write_result({'id': job['id'], 'status': 'error', 'error': job['error']})
+                            continue
+                        try:
+                            pending[pool.submit(_run_job, job, time.time(), profile, run_id)] = (job, False)
+                        except BrokenProcessPool:
+                            broken = True
+                            suspects.append(job)
+                            break
+                        if len(pending) >= workers * 2:
+                            break
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, isolated = pending.pop(future)
+                    try:
+                        write_result(future.result())
+                    except BrokenProcessPool:
+                        broken = True
+                        if isolated:
+                            write_result({'id': job['id'], 'status': 'error',
+                                          'error': "Worker process died while running the job"})
+                        else:
+                            suspects.append(job)
+                    except Exception as e:
+                        write_result({'id': job['id'], 'status': 'error', 'error': str(e)})
+        if not broken:
+            return failures
+
+def _candidate_count(value: str) -> Optional[int]:
+    if value == 'auto':
+        return None
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"candidate count must be at least 1, got {count}")
+    return count
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate and validate applications from requirements.")
+    parser.add_argument(
+        '--batch',
+        metavar='FILE',
+        help="JSONL file of requirement records, or '-' for stdin"
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for batch mode (default: CPU count)"
+    )
+    parser.add_argument(
+        '--output',
+        metavar='FILE',
+        help="Write batch results to FILE instead of stdout"
+    )
+    parser.add_argument(
+        '--syntax-only',
+        metavar='FILE',
+        nargs='+',
+        help="Only check the syntax of existing code files and exit"
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='DIR',
+        default=os.getenv('TRACE_DIR'),
+        help="Write per-stage tracing spans to DIR (default: $TRACE_DIR)"
+    )
+    parser.add_argument(
+        '--trace-format',
+        choices=['jsonl', 'chrome'],
+        default=os.getenv('TRACE_FORMAT', 'jsonl'),
+        help="Span file format; 'chrome' opens in chrome://tracing or Perfetto"
+    )
+    parser.add_argument(
+        '--metrics',
+        metavar='FILE',
+        help="Write Prometheus text-format metrics to FILE when the run ends "
+             "(per worker in batch mode)"
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='cpu',
+        choices=PROFILE_MODES,
+        help="Profile the run (per job in batch mode) into data/logs/profiles/<run-id>: "
+             "'cpu' sampling flame graph (default) of the run's thread and the pool threads "
+             "working for it, 'cprofile' of the run's thread only, or 'memory' (tracemalloc)"
+    )
+    parser.add_argument(
+        '--candidates',
+        type=_candidate_count,
+        default=1,
+        metavar='N',
+        help="Generate N candidates and validate them concurrently, keeping the first "
+             "that passes; 'auto' picks N from measured pass rates (default: 1)"
+    )
+    parser.add_argument(
+        '--run-id',
+        help="Name of this run; give an interrupted run's id to resume it from its "
+             "checkpoints (default: a timestamp)"
+    )
+    parser.add_argument(
+        '--checkpoints',
+        metavar='DIR',
+        default=os.getenv('CHECKPOINT_DIR', str(DEFAULT_CHECKPOINT_DIR)),
+        help="Checkpoint stage outputs under DIR (default: $CHECKPOINT_DIR or %(default)s)"
+    )
+    parser.add_argument(
+        '--no-checkpoints',
+        dest='checkpoints',
+        action='store_const',
+        const=None,
+        help="Do not checkpoint or resume stages"
+    )
+    return parser.parse_args(argv)
+
+def run_syntax_check(paths) -> int:
+    """Print syntax errors for each file; returns the number of failing files."""
+    failures = 0
+    for path in paths:
+        errors = check_syntax(Path(path).read_text(), filename=str(path))
+        for error in errors:
+            print(f"{path}: {error}")
+        failures += bool(errors)
+    return failures
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    run_id = args.run_id or time.strftime('%Y%m%d-%H%M%S')
+    checkpoint_dir = Path(args.checkpoints) if args.checkpoints else None
+    trace_options = None
+    if args.trace:
+        trace_options = {
+            'trace_dir': args.trace,
+            'trace_format': args.trace_format,
+            'run_id': run_id
+        }
+    if args.syntax_only:
+        sys.exit(1 if run_syntax_check(args.syntax_only) else 0)
+    elif args.batch is None:
+        if trace_options:
+            configure_tracing(**trace_options)
+        try:
+            with maybe_profile(args.profile, profile_dir(run_id)):
+                main(args.candidates, checkpoint_dir, run_id)
+        finally:
+            if args.metrics:
+                REGISTRY.write(Path(args.metrics))
+    else:
+        source = sys.stdin if args.batch == '-' else open(args.batch)
+        output = open(args.output, 'w') if args.output else sys.stdout
+        try:
+            LogManager(Path("data/logs"))
+            sys.exit(1 if run_batch(
+                source, output, args.workers, trace_options, args.profile, run_id, args.metrics,
+                args.candidates, checkpoint_dir
+            ) else 0)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,401 @@
+"""
+Long-running HTTP job service.
+
+Keeps the pipeline components resident across requests and runs generation
+jobs on a fixed pool of workers fed by a bounded queue.
+
+Endpoints:
+    POST /jobs              Submit {"requirements": "..."}, optionally with
+                            "profile": "cpu" | "cprofile" | "memory" and an
+                            integer "priority" for its sandbox runs (higher
+                            first) and an "id" of letters, digits, "_", "-"
+                            and "."; 202, 409 if the id is taken, or 429
+                            with Retry-After when the queue is full
+    GET  /jobs/<id>         Job status, stage events and result
+    GET  /jobs/<id>/events  Stream stage events as JSON lines until done
+    GET  /health            200 once the workers are warm, 503 before
+    GET  /metrics           Prometheus text exposition
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+import uuid
+from main import build_components, close_components, run_pipeline
+from utils import metrics
+from utils.profiling import PROFILE_MODES, maybe_profile, profile_dir
+from utils.sandbox import sandbox_priority
+from utils.tracing import configure_tracing, span
+
+REASONS = {
+    200: 'OK',
+    202: 'Accepted',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Content Too Large',
+    429: 'Too Many Requests',
+    503: 'Service Unavailable'
+}
+
+JOBS = metrics.counter('service_jobs_total', 'Jobs by final status', ['status'])
+REJECTED_JOBS = metrics.counter('service_jobs_rejected_total', 'Submissions rejected because the queue was full')
+QUEUE_DEPTH = metrics.gauge('service_queue_depth', 'Jobs waiting for a worker')
+JOB_SECONDS = metrics.histogram('service_job_seconds', 'Time from a worker picking up a job to its completion')
+
+# Caller-chosen ids are used in URLs and profile paths
+JOB_ID_PATTERN = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}')
+
+# Largest request body read; requirements are prose, far below this
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class JobExistsError(Exception):
+    """A job with the submitted id is already known."""
+
+
+class RequestTooLargeError(Exception):
+    """A request declared a body larger than MAX_BODY_BYTES."""
+
+
+class Job:
+    """State of one submitted job."""
+
+    def __init__(self, job_id: str, requirements: str, profile: Optional[str] = None, priority: int = 0):
+        self.id = job_id
+        self.requirements = requirements
+        self.profile = profile
+        self.priority = priority
+        self.status = 'queued'
+        self.events: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('valid', 'invalid', 'error')
+
+    def to_dict(self) -> Dict:
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'events': self.events,
+            'result': self.result,
+            'error': self.error
+        }
+        if self.profile:
+            data['profile_dir'] = str(profile_dir(self.id))
+        return data
+
+
+class JobService:
+    """Bounded job queue, resident worker pool and the HTTP front end."""
+
+    def __init__(
+        self,
+        components_factory: Callable[[], Dict],
+        workers: int = 2,
+        max_queue: int = 16,
+        max_jobs: int = 1000
+    ):
+        """
+        Args:
+            components_factory: Builds one set of pipeline components; called
+                once per worker at startup
+            workers: Number of jobs run concurrently
+            max_queue: Jobs that may wait before submissions are rejected
+            max_jobs: Finished jobs kept for status queries
+        """
+        self.logger = logging.getLogger(__name__)
+        self.components_factory = components_factory
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        QUEUE_DEPTH.set_function(self.queue.qsize)
+        self.jobs: OrderedDict = OrderedDict()
+        self.ready = False
+        self._durations: List[float] = []
+        self._tasks: List[asyncio.Task] = []
+        self._executors: List[ThreadPoolExecutor] = []
+        self._components: List[Dict] = []
+
+    async def start(self) -> None:
+        """Warm up one component set per worker and start the workers."""
+        loop = asyncio.get_running_loop()
+        for index in range(self.workers):
+            # One thread per worker so its components are never shared
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"job-worker-{index}")
+            components = await loop.run_in_executor(executor, self.components_factory)
+            self._executors.append(executor)
+            self._components.append(components)
+            self._tasks.append(asyncio.create_task(self._work(executor, components)))
+        self.ready = True
+        self.logger.info(f"Job service ready with {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for executor, components in zip(self._executors, self._components):
+            # Queued behind any job still running on the worker thread
+            executor.submit(close_components, components)
+            executor.shutdown(wait=False)
+
+    def submit(
+        self,
+        requirements: str,
+        job_id: Optional[str] = None,
+        profile: Optional[str] = None,
+        priority: int = 0
+    ) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            requirements: Requirements text
+            job_id: Caller-chosen id; generated when omitted
+            profile: Profile mode for this job, written to data/logs/profiles/<job id>
+            priority: Sandbox scheduling priority; higher runs first
+
+        Raises:
+            ValueError: If ``job_id`` does not match JOB_ID_PATTERN
+            JobExistsError: If a job with ``job_id`` is already known
+            asyncio.QueueFull: If the queue is at capacity
+        """
+        if job_id is not None:
+            if not isinstance(job_id, str) or not JOB_ID_PATTERN.fullmatch(job_id):
+                raise ValueError(f"Invalid job id: {job_id!r}")
+            if job_id in self.jobs:
+                raise JobExistsError(f"Job {job_id} already exists")
+        job = Job(job_id or uuid.uuid4().hex, requirements, profile, priority)
+        self.queue.put_nowait(job)
+        self.jobs[job.id] = job
+        self._evict_finished()
+        return job
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up."""
+        recent = self._durations[-20:]
+        average = sum(recent) / len(recent) if recent else 1.0
+        return max(1, math.ceil(average * self.queue.qsize() / self.workers))
+
+    async def _work(self, executor: ThreadPoolExecutor, components: Dict) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            start = time.perf_counter()
+            await self._update(job, status='running')
+
+            def on_stage(stage: str, seconds: float, job=job) -> None:
+                asyncio.run_coroutine_threadsafe(
+                    self._update(job, event={'stage': stage, 'seconds': seconds}), loop
+                )
+
+            def run(job=job) -> Dict:
+                with maybe_profile(job.profile, profile_dir(job.id)), span('job', job_id=job.id), \
+                        sandbox_priority(job.priority):
+                    requirements = components['collector'].process_requirements(job.requirements)
+                    return run_pipeline(components, requirements, on_stage=on_stage)
+
+            try:
+                outcome = await loop.run_in_executor(executor, run)
+                job.result = outcome
+                status = 'valid' if outcome['validation']['valid'] else 'invalid'
+            except Exception as e:
+                self.logger.error(f"Job {job.id} failed: {str(e)}")
+                job.error = str(e)
+                status = 'error'
+            finally:
+                self.queue.task_done()
+
+            self._durations.append(time.perf_counter() - start)
+            del self._durations[:-100]
+            JOB_SECONDS.observe(self._durations[-1])
+            JOBS.labels(status=status).inc()
+            await self._update(job, status=status)
+
+    async def _update(self, job: Job, status: Optional[str] = None, event: Optional[Dict] = None) -> None:
+        async with job.changed:
+            if status is not None:
+                job.status = status
+                job.events.append({'status': status, 'time': time.time()})
+            if event is not None:
+                job.events.append(event)
+            job.changed.notify_all()
+
+    def _evict_finished(self) -> None:
+        while len(self.jobs) > self.max_jobs:
+            oldest = next(iter(self.jobs.values()))
+            if not oldest.finished:
+                break
+            self.jobs.popitem(last=False)
+
+    # HTTP front end
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await self._read_request(reader)
+            await self._dispatch(method, path, body, writer)
+        except RequestTooLargeError as e:
+            await self._respond(writer, 413, {'error': str(e)})
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self._respond(writer, 400, {'error': str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        parts = [part for part in path.split('?')[0].split('/') if part]
+
+        if parts == ['health']:
+            status = 200 if self.ready else 503
+            await self._respond(writer, status, {
+                'status': 'healthy' if self.ready else 'starting',
+                'queue_depth': self.queue.qsize(),
+                'workers': self.workers
+            })
+        elif parts == ['metrics']:
+            body = metrics.REGISTRY.exposition().encode()
+            writer.write(self._head(200, [
+                ('Content-Type', metrics.CONTENT_TYPE), ('Content-Length', str(len(body)))
+            ]) + body)
+            await writer.drain()
+        elif parts == ['jobs']:
+            if method != 'POST':
+                await self._respond(writer, 405, {'error': 'Use POST to submit jobs'})
+                return
+            payload = json.loads(body or b'{}')
+            if not isinstance(payload, dict) or not isinstance(payload.get('requirements'), str):
+                await self._respond(writer, 400, {'error': "Body must be a JSON object with 'requirements'"})
+                return
+            if payload.get('profile') not in (None,) + PROFILE_MODES:
+                await self._respond(writer, 400, {'error': f"'profile' must be one of {', '.join(PROFILE_MODES)}"})
+                return
+            priority = payload.get('priority', 0)
+            if not isinstance(priority, int) or isinstance(priority, bool):
+                await self._respond(writer, 400, {'error': "'priority' must be an integer"})
+                return
+            try:
+                job = self.submit(payload['requirements'], payload.get('id'), payload.get('profile'), priority)
+            except ValueError:
+                await self._respond(writer, 400, {
+                    'error': "'id' must be 1-64 letters, digits, '_', '-' or '.', not starting with '.'"
+                })
+                return
+            except JobExistsError as e:
+                await self._respond(writer, 409, {'error': str(e)})
+                return
+            except asyncio.QueueFull:
+                REJECTED_JOBS.inc()
+                retry_after = self.retry_after()
+                await self._respond(
+                    writer, 429, {'error': 'Job queue is full', 'retry_after': retry_after},
+                    headers=[('Retry-After', str(retry_after))]
+                )
+                return
+            await self._respond(writer, 202, {'id': job.id, 'status': job.status})
+        elif len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['events']):
+            job = self.jobs.get(parts[1])
+            if job is None:
+                await self._respond(writer, 404, {'error': f"Unknown job {parts[1]}"})
+            elif len(parts) == 2:
+                await self._respond(writer, 200, job.to_dict())
+            else:
+                await self._stream_events(job, writer)
+        else:
+            await self._respond(writer, 404, {'error': f"No route for {path}"})
+
+    async def _stream_events(self, job: Job, writer: asyncio.StreamWriter) -> None:
+        """Write job events as JSON lines until the job finishes."""
+        writer.write(self._head(200, [('Content-Type', 'application/x-ndjson')]))
+        sent = 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.events) > sent or job.finished)
+                events = job.events[sent:]
+                finished = job.finished
+            for event in events:
+                writer.write(json.dumps(event).encode() + b'\n')
+            sent += len(events)
+            await writer.drain()
+            if finished:
+                break
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Dict,
+        headers: Optional[List[Tuple[str, str]]] = None
+    ) -> None:
+        body = json.dumps(payload, default=str).encode()
+        headers = [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))] + (headers or [])
+        writer.write(self._head(status, headers) + body)
+        await writer.drain()
+
+    @staticmethod
+    def _head(status: int, headers: List[Tuple[str, str]]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", 'Connection: close']
+        lines.extend(f"{name}: {value}" for name, value in headers)
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        if not request_line:
+            raise ValueError("Empty request")
+        method, path, _ = request_line.split(' ', 2)
+
+        content_length = 0
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                content_length = int(value.strip())
+
+        # Checked before reading, so an oversized body is never buffered
+        if content_length < 0:
+            raise ValueError(f"Invalid Content-Length {content_length}")
+        if content_length > MAX_BODY_BYTES:
+            raise RequestTooLargeError(f"Body of {content_length} bytes exceeds the {MAX_BODY_BYTES} byte limit")
+        body = await reader.readexactly(content_length) if content_length else b''
+        return method.upper(), path, body
+
+
+async def serve(host: str, port: int, **service_options) -> None:
+    """Accept connections immediately and warm the workers in the background."""
+    # Built inside the running loop; asyncio primitives bind to it on 3.9
+    service = JobService(build_components, **service_options)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    service.logger.info(f"Job service listening on {host}:{port}")
+    async with server:
+        await service.start()
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from config.settings import API_CONFIG
+    from utils.logger import LogManager
+
+    LogManager(Path("data/logs"))
+    # Spans go to TRACE_DIR when it is set
+    configure_tracing()
+    asyncio.run(serve(
+        API_CONFIG['host'],
+        API_CONFIG['port'],
+        workers=API_CONFIG['workers'],
+        max_queue=API_CONFIG['max_queue']
+    ))
@@ -4,17 +4,38 @@ import tempfile
 import shutil
 import docker
 
+# Values for the settings EnvironmentManager requires, so tests need no '.env'
+TEST_ENVIRONMENT = {
+    'ASTRA_DB_BUNDLE': 'test-bundle.zip',
+    'ASTRA_DB_CLIENT_ID': 'test-client-id',
+    'ASTRA_DB_CLIENT_SECRET': 'test-client-secret',
+    'NEMO_API_KEY': 'test-nemo-key',
+    'SECURITY_SECRET_KEY': 'test-secret-key'
+}
+
+
+@pytest.fixture(autouse=True)
+def test_environment(monkeypatch):
+    """Required settings with test values instead of a '.env' file."""
+    from config.env_manager import EnvironmentManager
+    for name, value in TEST_ENVIRONMENT.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(EnvironmentManager, '_load_env', lambda self: None)
+
+
 @pytest.fixture(scope="session")
 def temp_dir():
     """Create temporary directory for tests."""
     with tempfile.TemporaryDirectory() as tmpdir:
         yield Path(tmpdir)
 
+
 @pytest.fixture(scope="session")
 def docker_client():
     """Create Docker client for tests."""
     return docker.from_env()
 
+
 @pytest.fixture(scope="function")
 def mock_code_package():
     """Create mock code package for testing."""
@@ -25,4 +46,20 @@ def mock_code_package():
         'dependencies': {
             'requirements': ['flask', 'requests']
         }
-    } 
\ No newline at end of file
+    }
+
+
+@pytest.fixture(scope="function")
+def offline_components():
+    """Pipeline components backed by in-memory fakes instead of live services."""
+    from utils.fakes import build_offline_components
+    return build_offline_components()
+
+
+@pytest.fixture(autouse=True)
+def fresh_dependencies():
+    """Start each test with closed circuit breakers and full retry budgets."""
+    from utils.resilience import reset_dependencies
+    reset_dependencies()
+    yield
+    reset_dependencies()
@@ -0,0 +1,89 @@
+import pytest
+from utils.artifact_store import ArtifactStore, MAX_DELTA_CHAIN, apply_delta, make_delta
+
+BASE = "".join(f"line {i}\n" for i in range(200))
+
+
+def _store_all(store, task_id, versions):
+    blobs = {}
+    digests = []
+    for code in versions:
+        digest, blob = store.encode(task_id, code)
+        if blob is not None:
+            blobs[digest] = blob
+            store.confirm(digest)
+        digests.append(digest)
+    return blobs, digests
+
+
+def test_delta_round_trip():
+    target = BASE.replace("line 10\n", "changed\n").replace("line 150\n", "") + "tail"
+    assert apply_delta(BASE, make_delta(BASE, target)) == target
+
+
+def test_identical_code_is_stored_once():
+    store = ArtifactStore()
+    blobs, digests = _store_all(store, "a", [BASE, BASE])
+    _, more = _store_all(store, "b", [BASE])
+    assert len(blobs) == 1
+    assert digests[0] == digests[1] == more[0]
+
+
+def test_fix_iterations_stored_as_deltas():
+    store = ArtifactStore()
+    versions = [BASE.replace(f"line {i}\n", f"fixed {i}\n") for i in range(MAX_DELTA_CHAIN + 2)]
+    blobs, digests = _store_all(store, "task", versions)
+
+    depths = [blobs[d]['depth'] for d in digests]
+    assert depths[0] == 0
+    assert depths[1] == 1
+    assert max(depths) == MAX_DELTA_CHAIN
+    assert blobs[digests[1]]['size'] > len(blobs[digests[1]]['data']) * 10
+
+    for digest, code in zip(digests, versions):
+        assert store.decode(digest, blobs.get) == code
+
+
+def test_forgotten_blob_is_stored_again():
+    store = ArtifactStore()
+    digest, blob = store.encode("task", BASE)
+    store.forget(digest)
+    again, blob_again = store.encode("task", BASE)
+    assert again == digest
+    assert blob_again is not None
+
+
+def test_looping_delta_chain_is_rejected():
+    blobs = {
+        'd': {'codec': 'delta', 'base_digest': 'e', 'data': b''},
+        'e': {'codec': 'delta', 'base_digest': 'd', 'data': b''}
+    }
+    with pytest.raises(ValueError):
+        ArtifactStore().decode('d', blobs.get)
+
+
+def test_deltas_only_build_on_confirmed_blobs():
+    store = ArtifactStore()
+    first = BASE
+    second = BASE.replace("line 1\n", "fixed 1\n")
+    third = BASE.replace("line 2\n", "fixed 2\n")
+
+    base_digest, _ = store.encode("task", first)
+    # The base write has not been confirmed, so the next version is a full copy
+    digest, blob = store.encode("task", second)
+    assert blob['base_digest'] is None
+    store.forget(base_digest)
+    store.confirm(digest)
+
+    _, blob = store.encode("task", third)
+    assert blob['base_digest'] == digest and blob['depth'] == 1
+
+
+def test_confirm_takes_the_stored_depth():
+    store = ArtifactStore()
+    digest, _ = store.encode("task", BASE)
+    # Another process had already stored this code as a delta
+    store.confirm(digest, stored_depth=MAX_DELTA_CHAIN)
+
+    _, blob = store.encode("task", BASE.replace("line 1\n", "fixed 1\n"))
+    assert blob['base_digest'] is None
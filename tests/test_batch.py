@@ -0,0 +1,98 @@
+import io
+import json
+import main
+import os
+
+
+def _fake_components(candidates=1, checkpoint_dir=None):
+    from agents.collector_agent import RequirementCollector
+    from agents.generator_agent import CodeGenerator
+
+    class Passthrough:
+        def scrape_data(self, requirements):
+            return {}
+
+        def process_data(self, data):
+            return {}
+
+    class Validator:
+        def validate_code(self, code_package):
+            return {'valid': 'crawler' not in code_package['type'], 'errors': []}
+
+    return {
+        'collector': RequirementCollector(),
+        'generator': CodeGenerator(),
+        'validator': Validator(),
+        'firecrawl': Passthrough(),
+        'nemo_utils': Passthrough()
+    }
+
+
+def test_read_jobs_accepts_strings_and_objects():
+    source = io.StringIO('"flask app"\n\n{"id": "b", "requirements": "django app"}\n')
+    jobs = list(main.read_jobs(source))
+    assert jobs == [
+        {'requirements': 'flask app', 'id': 1},
+        {'id': 'b', 'requirements': 'django app'}
+    ]
+
+
+def test_malformed_lines_become_error_results(monkeypatch):
+    monkeypatch.setattr(main, 'build_components', _fake_components)
+    monkeypatch.setattr(main, 'LogManager', lambda *args, **kwargs: None)
+    source = io.StringIO('{"requirements": \n[1, 2]\n7\n"flask app"\n')
+    output = io.StringIO()
+
+    failures = main.run_batch(source, output, workers=1)
+
+    results = {r['id']: r for r in map(json.loads, output.getvalue().splitlines())}
+    assert failures == 3
+    assert [results[i]['status'] for i in (1, 2, 3, 4)] == ['error', 'error', 'error', 'valid']
+    assert 'Invalid JSON on line 1' in results[1]['error']
+
+
+def test_run_batch_streams_results(monkeypatch):
+    monkeypatch.setattr(main, 'build_components', _fake_components)
+    monkeypatch.setattr(main, 'LogManager', lambda *args, **kwargs: None)
+    records = [{'id': i, 'requirements': 'flask app'} for i in range(5)]
+    records.append({'id': 'crawler', 'requirements': 'flask crawler'})
+    source = io.StringIO(''.join(json.dumps(r) + '\n' for r in records))
+    output = io.StringIO()
+
+    failures = main.run_batch(source, output, workers=2)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert failures == 1
+    assert sorted(str(r['id']) for r in results) == sorted(str(r['id']) for r in records)
+    assert all('generate' in r['timings'] and 'total' in r['timings'] for r in results)
+    assert {r['status'] for r in results} == {'valid', 'invalid'}
+
+
+def test_worker_crash_fails_only_its_job(monkeypatch):
+    def components(candidates=1, checkpoint_dir=None):
+        built = _fake_components(candidates, checkpoint_dir)
+
+        class CrashingValidator:
+            def validate_code(self, code_package):
+                if 'crawler' in code_package['type']:
+                    os._exit(1)
+                return {'valid': True, 'errors': []}
+
+        built['validator'] = CrashingValidator()
+        return built
+
+    monkeypatch.setattr(main, 'build_components', components)
+    monkeypatch.setattr(main, 'LogManager', lambda *args, **kwargs: None)
+    records = [{'id': i, 'requirements': 'flask app'} for i in range(4)]
+    records.append({'id': 'crawler', 'requirements': 'flask crawler'})
+    source = io.StringIO(''.join(json.dumps(r) + '\n' for r in records))
+    output = io.StringIO()
+
+    failures = main.run_batch(source, output, workers=2)
+
+    results = {str(r['id']): r for r in map(json.loads, output.getvalue().splitlines())}
+    assert failures == 1
+    assert sorted(results) == sorted(str(r['id']) for r in records)
+    assert results['crawler']['status'] == 'error'
+    assert 'died' in results['crawler']['error']
+    assert all(results[str(i)]['status'] == 'valid' for i in range(4))
@@ -0,0 +1,17 @@
+from benchmarks.suite import find_regressions, metric_direction
+
+
+def test_metric_direction():
+    assert metric_direction('validate_ms_p50') == -1
+    assert metric_direction('async_events_per_sec') == 1
+    assert metric_direction('savings_ratio') == 1
+    assert metric_direction('artifacts') == 0
+
+
+def test_find_regressions_respects_direction_and_threshold():
+    baseline = {'pipeline': {'total_ms_p50': 10.0, 'runs_per_sec': 100.0, 'generate_ms_p50': 1.0}}
+    results = {'pipeline': {'total_ms_p50': 13.0, 'runs_per_sec': 90.0, 'generate_ms_p50': 0.5, 'new_ms': 1.0}}
+
+    regressions = find_regressions(results, baseline, threshold=0.2)
+
+    assert [(r['metric'], round(r['change'], 2)) for r in regressions] == [('total_ms_p50', 0.3)]
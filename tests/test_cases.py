@@ -1,9 +1,7 @@
 import pytest
 from agents.collector_agent import RequirementCollector
 from agents.generator_agent import CodeGenerator
-from agents.validator_agent import CodeValidator
 from agents.coordinator_agent import TaskCoordinator
-from utils.rag_manager import RAGManager
 
 def test_requirement_collector():
     collector = RequirementCollector()
@@ -22,8 +20,8 @@ def test_code_generator():
     assert 'code' in result
     assert 'flask' in result['framework']
 
-def test_validator():
-    validator = CodeValidator()
+def test_validator(offline_components):
+    validator = offline_components['validator']
     code_package = {
         'code': 'print("Hello, World!")',
         'dependencies': {'requirements': ['pytest']}
@@ -44,21 +42,22 @@ def test_coordinator():
     history = coordinator.get_task_history()
     assert len(history) > 0 
 
-def test_rag_integration():
-    validator = CodeValidator()
-    rag_manager = RAGManager()
+def test_rag_integration(offline_components):
+    validator = offline_components['validator']
+    rag_manager = validator.rag_manager
     
     code_package = {
         'code': 'print("Hello, World!")',
         'dependencies': {'requirements': ['pytest']}
     }
+    rag_manager.add_document(code_package['code'], {'source': 'hello.py', 'type': 'python'})
     
     # Validate with RAG context
     results = validator.validate_code(code_package)
     assert 'rag_suggestions' in results or 'similar_examples' in results
 
-def test_security_integration():
-    validator = CodeValidator()
+def test_security_integration(offline_components):
+    validator = offline_components['validator']
     code_package = {
         'code': 'os.system("rm -rf /")',  # Código inseguro para prueba
         'dependencies': {'requirements': ['pytest']}
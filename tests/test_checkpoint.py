@@ -0,0 +1,64 @@
+import json
+import pytest
+from main import run_pipeline
+from utils.checkpoint import MISSING, CheckpointStore, dumps, loads
+from utils.fakes import build_offline_components
+
+STAGE_OUTPUT = {
+    'embeddings': {'code': [[0.25, -1.5, 3.0]] * 100},
+    'structured_examples': [{'processed_code': 'def f():\n    return 1\n', 'relevance_score': 0.95}],
+    'metadata': {'model_version': 'nemo-1.0', 'processing_timestamp': None, 'count': 2 ** 70}
+}
+
+
+class DyingValidator:
+    def validate_code(self, code_package):
+        raise RuntimeError("worker killed")
+
+
+def test_stage_outputs_round_trip_with_float32_embeddings():
+    data = dumps(STAGE_OUTPUT)
+
+    assert loads(data) == STAGE_OUTPUT
+    # 300 floats take 4 bytes each, not a JSON number each
+    assert len(dumps({'embeddings': [0.1 * i for i in range(300)]})) < len(json.dumps([0.1 * i for i in range(300)])) / 2
+    assert loads(dumps({'vector': [0.1]}))['vector'] == [pytest.approx(0.1, rel=1e-6)]
+    # Floats elsewhere keep full precision
+    assert loads(dumps({'scores': [0.1]}))['scores'] == [0.1]
+
+
+def test_damaged_checkpoints_are_misses(tmp_path):
+    store = CheckpointStore(tmp_path)
+    key = store.stage_key('process', 'abc')
+    store.save(key, STAGE_OUTPUT)
+    path = next((tmp_path / 'objects').rglob('*.ckpt'))
+
+    path.write_bytes(path.read_bytes()[:-10])
+    assert store.load(key) is MISSING
+    assert store.load(store.stage_key('process', 'other')) is MISSING
+
+
+def test_rerun_resumes_after_last_completed_stage(tmp_path):
+    components = build_offline_components()
+    components['checkpoints'] = CheckpointStore(tmp_path)
+    requirements = components['collector'].process_requirements("Create a Flask web app with a REST API")
+    validator = components['validator']
+
+    components['validator'] = DyingValidator()
+    with pytest.raises(RuntimeError):
+        run_pipeline(components, requirements, run_id='run-1')
+    assert set(components['checkpoints'].run('run-1')['stages']) == {'scrape', 'process', 'generate'}
+
+    components['validator'] = validator
+    client = components['firecrawl'].client
+    searches = len(client.searches)
+
+    resumed = run_pipeline(components, requirements, run_id='run-1')
+    assert resumed['resumed'] == ['scrape', 'process', 'generate']
+    assert len(client.searches) == searches
+    assert resumed['validation']['valid']
+
+    # Rendering is deterministic, so another run with the same requirements reuses the code too
+    other = run_pipeline(components, requirements, run_id='run-2')
+    assert other['resumed'] == ['scrape', 'process', 'generate']
+    assert other['code_package']['code'] == resumed['code_package']['code']
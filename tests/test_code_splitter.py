@@ -0,0 +1,70 @@
+from utils.code_splitter import CodeSplitter
+from utils.fakes import FakeCollection, FakeEmbeddings
+from utils.rag_manager import RAGManager
+
+SOURCE = '''"""Module docstring."""
+import os
+
+DEBUG = True
+
+
+# Handles the index route
+@app.route('/')
+def index():
+    return 'ok'
+
+
+class Store:
+    """Key-value store."""
+
+    def get(self, key):
+        return self.data[key]
+
+    def put(self, key, value):
+        self.data[key] = value
+'''
+
+
+def test_chunks_follow_definitions():
+    chunks = CodeSplitter().split(SOURCE)
+
+    assert [(c.symbol, c.kind, c.start_line, c.end_line) for c in chunks] == [
+        ('', 'module', 1, 6),
+        ('index', 'function', 7, 10),
+        ('Store', 'class', 13, 20)
+    ]
+    # Decorators and the comment above a definition stay with it
+    assert chunks[1].content.startswith('# Handles the index route\n@app.route')
+
+
+def test_oversized_class_is_split_per_method_without_overlap():
+    chunks = CodeSplitter(max_chunk_size=60).split(SOURCE)
+
+    symbols = [c.symbol for c in chunks]
+    assert 'Store.get' in symbols and 'Store.put' in symbols
+    assert all(len(c.content) <= 60 for c in chunks)
+    spans = [(c.start_line, c.end_line) for c in chunks]
+    assert all(previous[1] < current[0] for previous, current in zip(spans, spans[1:]))
+    # Every non-blank line lands in exactly one chunk
+    lines = [line for c in chunks for line in c.content.splitlines() if line.strip()]
+    assert lines == [line for line in SOURCE.splitlines() if line.strip()]
+
+
+def test_unparseable_source_falls_back_to_lines():
+    text = "def broken(:\n" + "x = 1\n" * 50
+
+    chunks = CodeSplitter(max_chunk_size=100).split(text)
+
+    assert {c.kind for c in chunks} == {'text'}
+    assert ''.join(c.content for c in chunks) == text
+    assert all(c.content.endswith('\n') for c in chunks)
+
+
+def test_knowledge_base_chunks_carry_symbol_metadata():
+    manager = RAGManager(embeddings=FakeEmbeddings(), collection=FakeCollection())
+
+    metadata = [doc['metadata'] for doc in manager.collection.documents]
+    assert {'source': 'error_handler.py', 'type': 'error', 'symbol': 'retry_strategy'}.items() <= next(
+        m for m in metadata if m['symbol'] == 'retry_strategy'
+    ).items()
+    assert all(m['start_line'] <= m['end_line'] for m in metadata)
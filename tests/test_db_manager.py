@@ -0,0 +1,261 @@
+import time
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from cassandra.query import BatchStatement
+from utils.db_manager import AstraDBManager
+from utils.fakes import FakeSession
+from utils.resilience import CircuitOpenError, DeadlineExceeded, Dependency, Policy
+
+TASK_ID = uuid.uuid4()
+
+
+def _task(action='complete'):
+    return {
+        'task_id': TASK_ID,
+        'timestamp': datetime.now(),
+        'action': action,
+        'framework': 'flask',
+        'type': 'web_app'
+    }
+
+
+def test_statements_prepared_once():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    prepared = len(session.prepared)
+
+    for _ in range(3):
+        manager.save_task_history(_task())
+    manager.save_code_artifact({'task_id': TASK_ID, 'code': 'print(1)', 'validation_status': True})
+
+    assert len(session.prepared) == prepared
+    assert session.executed[-1][0] == manager.statements['code_artifact']
+
+
+def test_async_writes_release_in_flight_slots():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=2)
+    for _ in range(10):
+        manager.save_task_history_async(_task())
+    manager.wait_for_writes()
+    assert sum(1 for statement, _ in session.executed if statement == manager.statements['task_event_by_task']) == 10
+
+
+def test_task_history_writes_respect_the_breaker():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=1)
+    manager.save_task_history(_task())
+
+    for _ in range(manager.resilience.breaker.failure_threshold):
+        manager.resilience.breaker.record_failure()
+    executed = len(session.executed)
+    with pytest.raises(CircuitOpenError):
+        manager.save_task_history(_task())
+    assert len(session.executed) == executed
+
+
+def test_buffered_writer_flushes_unlogged_batches_by_partition():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    with manager.buffered_writer(batch_size=100, flush_interval=60) as writer:
+        for _ in range(5):
+            writer.save_task_history(_task())
+        writer.save_code_artifact({'task_id': str(TASK_ID), 'code': 'print(1)', 'validation_status': False})
+        assert not any(isinstance(s, BatchStatement) for s, _ in session.executed)
+
+    batches = [s for s, _ in session.executed if isinstance(s, BatchStatement)]
+    # One partition each for the task, the day bucket, the artifact and its blob
+    assert len(batches) == 4
+    assert sum(len(batch) for batch in batches) == 12
+
+
+def test_buffered_writer_flushes_on_size():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    writer = manager.buffered_writer(batch_size=4, flush_interval=60)
+    for _ in range(2):
+        writer.save_task_history(_task())
+    assert sum(isinstance(s, BatchStatement) for s, _ in session.executed) == 2
+    writer.close()
+
+
+def test_artifacts_linked_to_task():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    manager.save_code_artifact({'task_id': str(TASK_ID), 'code': 'x = 1', 'validation_status': True})
+    assert session.executed[-1][1][0] == TASK_ID
+
+
+def test_task_history_pagination_cursor():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    now = datetime(2026, 1, 2, 12)
+    rows = [
+        {'task_id': TASK_ID, 'event_time': now - timedelta(minutes=i), 'event_id': uuid.uuid1(), 'action': 'step'}
+        for i in range(3)
+    ]
+    session.results[manager.statements['select_task_events']] = rows[:2]
+    session.results[manager.statements['select_task_events_before']] = rows[2:]
+
+    first = manager.get_task_history(TASK_ID, page_size=2)
+    assert first['next_page'] == (rows[1]['event_time'], rows[1]['event_id'])
+
+    second = manager.get_task_history(TASK_ID, page_size=2, before=first['next_page'])
+    assert second['events'] == rows[2:]
+    assert second['next_page'] is None
+    assert session.executed[-1][1] == (TASK_ID, *first['next_page'], 2)
+
+
+def test_recent_events_walk_day_buckets():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    now = datetime(2026, 1, 2, 12)
+    by_day = {
+        now.date(): [{'event_time': now, 'event_id': uuid.uuid1()}],
+        (now - timedelta(days=1)).date(): [
+            {'event_time': now - timedelta(days=1), 'event_id': uuid.uuid1()},
+            {'event_time': now - timedelta(days=1, hours=1), 'event_id': uuid.uuid1()}
+        ]
+    }
+    day_rows = lambda params: by_day.get(params[0], [])[:params[-1]]
+    session.results[manager.statements['select_day_events']] = day_rows
+    session.results[manager.statements['select_day_events_before']] = day_rows
+
+    page = manager.get_recent_events(
+        page_size=2, since=now - timedelta(days=7), before=(now + timedelta(seconds=1), uuid.uuid1())
+    )
+    assert [e['event_time'] for e in page['events']] == [now, now - timedelta(days=1)]
+    assert page['next_page'] is not None
+
+    cursor = (now + timedelta(seconds=1), uuid.uuid1())
+    page = manager.get_recent_events(page_size=10, since=now - timedelta(hours=1), before=cursor)
+    assert len(page['events']) == 1
+    assert page['next_page'] is None
+
+
+def test_recent_events_window_does_not_follow_the_cursor():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    now = datetime.utcnow()
+    events = [
+        {'event_time': now - timedelta(days=days), 'event_id': uuid.uuid1()}
+        for days in range(0, 12, 2)
+    ]
+    day_rows = lambda params: [e for e in events if e['event_time'].date() == params[0]][:params[-1]]
+    session.results[manager.statements['select_day_events']] = day_rows
+    session.results[manager.statements['select_day_events_before']] = lambda params: [
+        e for e in day_rows(params) if e['event_time'] < params[1]
+    ]
+
+    first = manager.get_recent_events(page_size=3)
+    second = manager.get_recent_events(page_size=3, before=first['next_page'])
+    # Days 0-6 only: the window stays seven days back from now on every page
+    assert second['events'] == events[3:4]
+    assert second['next_page'] is None
+
+    aware = manager.get_recent_events(page_size=10, since=(now - timedelta(days=3)).replace(tzinfo=timezone.utc))
+    assert len(aware['events']) == 2
+
+
+def test_identical_artifacts_store_one_blob():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    blobs = {}
+    original_execute = session.execute
+
+    def execute(statement, params=None):
+        if statement == manager.statements['code_blob']:
+            blobs[params[0]] = dict(zip(['digest', 'codec', 'base_digest', 'depth', 'data', 'size'], params))
+        if statement == manager.statements['select_code_blob']:
+            return [blobs[params[0]]] if params[0] in blobs else []
+        return original_execute(statement, params)
+
+    session.execute = execute
+    code = 'from flask import Flask\napp = Flask(__name__)\n' * 20
+    for _ in range(3):
+        manager.save_code_artifact({'task_id': TASK_ID, 'code': code, 'validation_status': False})
+    fixed = code.replace('Flask(__name__)', 'Flask("app")', 1)
+    manager.save_code_artifact({'task_id': TASK_ID, 'code': fixed, 'validation_status': True})
+
+    assert len(blobs) == 2
+    digest = [p for s, p in session.executed if s == manager.statements['code_artifact']][-1][3]
+    assert blobs[digest]['base_digest'] is not None
+    assert manager.load_code(digest) == fixed
+
+
+def test_failed_blob_write_is_retried():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    original_execute = session.execute
+    failing = [True]
+
+    def execute(statement, params=None):
+        if statement == manager.statements['code_blob'] and failing[0]:
+            raise RuntimeError("write timeout")
+        return original_execute(statement, params)
+
+    session.execute = execute
+    code_data = {'task_id': TASK_ID, 'code': 'print(1)', 'validation_status': True}
+    with pytest.raises(RuntimeError):
+        manager.save_code_artifact(code_data)
+    failing[0] = False
+    manager.save_code_artifact(code_data)
+
+    assert any(s == manager.statements['code_blob'] for s, _ in session.executed)
+
+
+def test_slow_writes_are_not_hedged():
+    session = FakeSession()
+    policy = Policy(timeout=2.0, hedge_after=0.01)
+    manager = AstraDBManager(session=session, max_in_flight=4, resilience=Dependency('cassandra-test', policy))
+    original_execute = session.execute
+
+    def slow_execute(statement, params=None):
+        rows = original_execute(statement, params)
+        time.sleep(0.05)
+        return rows
+
+    session.execute = slow_execute
+    manager.save_code_artifact({'task_id': TASK_ID, 'code': 'print(1)', 'validation_status': True})
+    blob_writes = [s for s, _ in session.executed if s == manager.statements['code_blob']]
+    assert len(blob_writes) == 1
+
+    rows = manager._execute(manager.statements['select_code_blob'], ('digest',))
+    assert list(rows) == []
+    selects = [s for s, _ in session.executed if s == manager.statements['select_code_blob']]
+    assert len(selects) == 2
+
+
+def test_stalled_task_history_write_hits_its_deadline():
+    session = FakeSession()
+    policy = Policy(timeout=0.05, deadline=0.2, retries=1)
+    manager = AstraDBManager(session=session, max_in_flight=4, resilience=Dependency('cassandra-test', policy))
+    session.execute = lambda statement, params=None: time.sleep(1.0)
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        manager.save_task_history(_task())
+    assert time.perf_counter() - start < 0.5
+
+
+def test_unapplied_blob_insert_keeps_the_stored_depth():
+    session = FakeSession()
+    manager = AstraDBManager(session=session, max_in_flight=4)
+    code = "".join(f"line {i}\n" for i in range(200))
+    stored = {}
+
+    def insert_blob(params):
+        # Another process already wrote this digest at the end of a delta chain
+        stored['digest'] = params[0]
+        return [{'[applied]': False, 'digest': params[0], 'depth': 8}]
+
+    session.results[manager.statements['code_blob']] = insert_blob
+    manager.save_code_artifact({'task_id': TASK_ID, 'code': code, 'validation_status': False})
+    del session.results[manager.statements['code_blob']]
+    manager.save_code_artifact({'task_id': TASK_ID, 'code': code.replace('line 1\n', 'x\n'), 'validation_status': True})
+
+    blob_rows = [p for s, p in session.executed if s == manager.statements['code_blob']]
+    # A ninth delta would exceed MAX_DELTA_CHAIN, so a full copy is stored
+    assert blob_rows[-1][2] is None
+    assert manager.artifact_store._known_blobs[stored['digest']] == 8
@@ -0,0 +1,57 @@
+from utils.dependency_index import DependencyResolver, ImageEnvironment, LocalEnvironment
+from utils.fakes import ProcessDockerClient
+from utils.sandbox import SandboxLimits, SandboxScheduler
+
+
+def _install(site, name: str, version: str, requires=()) -> None:
+    dist_info = site / f"{name}-{version}.dist-info"
+    dist_info.mkdir()
+    lines = [f"Name: {name}", f"Version: {version}"] + [f"Requires-Dist: {line}" for line in requires]
+    (dist_info / 'METADATA').write_text('\n'.join(lines) + '\n')
+
+
+class CountingEnvironment(LocalEnvironment):
+    builds = 0
+
+    def describe(self):
+        self.builds += 1
+        return super().describe()
+
+
+def test_requirements_are_checked_with_their_dependencies(tmp_path):
+    _install(tmp_path, 'Flask', '2.0.0', ['Werkzeug>=2.0', 'itsdangerous>=2.0', 'pywin32; sys_platform == "win32"'])
+    _install(tmp_path, 'Werkzeug', '2.0.1')
+    _install(tmp_path, 'requests', '2.31.0', ['PySocks>=1.5.6; extra == "socks"'])
+    resolver = DependencyResolver(LocalEnvironment([str(tmp_path)]))
+
+    assert resolver.check(['werkzeug', 'requests>=2.0']) == []
+    assert resolver.check(['flask']) == ['Missing dependency: itsdangerous>=2.0 (required by flask)']
+    assert resolver.check(['requests<2']) == ['Version conflict for: requests<2, 2.31.0 is installed']
+    assert resolver.check(['requests[socks]']) == ['Missing dependency: PySocks>=1.5.6; extra == "socks" (required by requests)']
+    assert resolver.check(['beautifulsoup4']) == ['Missing dependency: beautifulsoup4']
+
+
+def test_index_is_rebuilt_only_when_the_environment_changes(tmp_path):
+    _install(tmp_path, 'requests', '2.31.0')
+    environment = CountingEnvironment([str(tmp_path)])
+    resolver = DependencyResolver(environment)
+
+    assert resolver.check(['flask']) == ['Missing dependency: flask']
+    assert resolver.check(['requests']) == []
+    assert environment.builds == 1
+
+    _install(tmp_path, 'flask', '2.0.0')
+    assert resolver.check(['flask']) == []
+    assert environment.builds == 2
+
+
+def test_image_index_comes_from_the_sandbox():
+    docker_client = ProcessDockerClient()
+    scheduler = SandboxScheduler(cpu_budget=1, memory_budget='1g', limits=SandboxLimits())
+    resolver = DependencyResolver(ImageEnvironment(docker_client, 'python:3.9-slim', scheduler))
+
+    index = resolver.index()
+    assert index.version('pytest') is not None
+    assert index.digest == docker_client.images.get('python:3.9-slim').id
+    assert resolver.index() is index
+    assert len(docker_client.containers.created) == 1
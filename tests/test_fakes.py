@@ -0,0 +1,49 @@
+from main import run_pipeline
+from utils.fakes import FakeCommandRunner, FakeDockerClient, FakeEmbeddings, build_offline_components
+from utils.security import SANDBOX_IMAGE, SecurityManager
+
+
+def test_offline_pipeline_runs_end_to_end():
+    docker_client = FakeDockerClient()
+    components = build_offline_components(docker_client)
+    requirements = components['collector'].process_requirements("Create a Flask web app")
+
+    outcome = run_pipeline(components, requirements)
+
+    assert outcome['validation']['valid'] is True
+    assert 'flask' in outcome['code_package']['code'].lower()
+    assert docker_client.containers.runs[0]['image'] == SANDBOX_IMAGE
+    # Scraped examples were added to the knowledge base
+    sources = [doc['metadata']['source'] for doc in components['validator'].rag_manager.collection.documents]
+    assert any(source.startswith('https://example.com/flask') for source in sources)
+
+
+def test_security_scan_reports_docker_posture_and_scanner_results():
+    docker_client = FakeDockerClient(image_user='root')
+    docker_client._info['SecurityOptions'] = []
+    runner = FakeCommandRunner(
+        bandit_results=[{'issue_severity': 'HIGH', 'issue_confidence': 'HIGH', 'issue_text': 'shell=True'}],
+        vulnerable=['insecure-package']
+    )
+    manager = SecurityManager(docker_client=docker_client, command_runner=runner)
+
+    results = manager.run_security_scan({
+        'code': 'import os\nos.system("ls")\n',
+        'dependencies': {'requirements': ['insecure-package', 'flask']}
+    })
+
+    assert results['code_issues'][0]['description'] == 'shell=True'
+    assert any('insecure-package' in issue for issue in results['vulnerabilities'])
+    assert any('runs as root' in issue for issue in results['vulnerabilities'])
+    assert any('seccomp' in issue for issue in results['vulnerabilities'])
+    assert any('os.system(' in issue for issue in results['vulnerabilities'])
+    assert [command[0] for command in runner.commands] == ['safety', 'safety', 'bandit']
+
+
+def test_fake_embeddings_are_deterministic_and_lexical():
+    embeddings = FakeEmbeddings()
+    query = embeddings.embed_query("flask route handler")
+    assert query == FakeEmbeddings().embed_query("flask route handler")
+    related = embeddings.embed_query("a flask route")
+    unrelated = embeddings.embed_query("numpy matrix")
+    assert sum(a * b for a, b in zip(query, related)) > sum(a * b for a, b in zip(query, unrelated))
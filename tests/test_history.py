@@ -0,0 +1,89 @@
+import importlib.util
+import traceback
+from pathlib import Path
+from agents.coordinator_agent import TaskCoordinator
+from utils import history
+from utils.fakes import build_offline_components
+from utils.history import ErrorHistory, RingBuffer, error_fingerprint
+
+
+def test_ring_buffer_keeps_newest_items():
+    buffer = RingBuffer(3)
+    for i in range(5):
+        buffer.append(i)
+
+    assert list(buffer) == [2, 3, 4]
+    assert len(buffer) == 3
+    assert buffer.dropped == 2
+
+
+def test_fingerprint_ignores_values():
+    assert error_fingerprint('KeyError', "'user_1' at line 10") == error_fingerprint('KeyError', "'user_2' at line 12")
+    assert error_fingerprint('KeyError', "'user_1'") != error_fingerprint('ValueError', "'user_1'")
+
+
+def test_error_history_aggregates_and_spills(tmp_path):
+    history = ErrorHistory(capacity=4, max_fingerprints=2, spill_path=tmp_path / 'errors.jsonl')
+
+    def fail(value):
+        raise KeyError(f"user_{value}")
+
+    for value in range(6):
+        try:
+            fail(value)
+        except KeyError as e:
+            fingerprint = history.record_exception(e, {'code': 'x' * 10000})
+    history.record('validation', 'Syntax error: invalid syntax (line 3)')
+
+    summaries = history.summaries()
+    assert [(summary['type'], summary['count']) for summary in summaries] == [('KeyError', 6), ('validation', 1)]
+    assert summaries[0]['location'] == 'test_history.py:fail'
+    assert len(history) == 4
+    detail = history.detail(fingerprint)
+    assert "KeyError: 'user_5'" in detail['traceback']
+    assert len(detail['context']['code']) == 10000
+
+    history.record('validation', 'Missing dependency: flask')
+    # The least recently seen fingerprint was evicted
+    assert {summary['type'] for summary in history.summaries()} == {'validation'}
+
+
+def test_coordinator_history_is_bounded():
+    coordinator = TaskCoordinator(history_capacity=10)
+    for _ in range(25):
+        coordinator.reassign_task(None, ['Tests failed (exit code 1): 1 failed'])
+
+    history = coordinator.get_task_history()
+    assert len(history) == 10
+    assert history[-1]['action'] == 'reassign'
+    assert history[-1]['errors'] == ['Tests failed (exit code 1): 1 failed']
+    assert coordinator.get_error_summary()[0]['count'] == 25
+
+
+def test_failed_validation_records_its_errors():
+    validator = build_offline_components()['validator']
+    package = {'code': "def broken(:\n    pass\n", 'dependencies': {'requirements': []}}
+
+    results = validator.validate_code(package)
+
+    assert not results['valid']
+    history = validator.task_coordinator.get_task_history()
+    assert history[-1]['action'] == 'reassign'
+    assert history[-1]['errors'] == results['errors']
+    summaries = validator.task_coordinator.get_error_summary()
+    assert {summary['message'] for summary in summaries} == set(results['errors'])
+
+
+def test_error_handler_template_fingerprints_like_the_history():
+    path = Path(__file__).parent.parent / 'examples' / 'templates' / 'error_handler.py'
+    spec = importlib.util.spec_from_file_location('error_handler_template', path)
+    template = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(template)
+
+    assert [(p.pattern, r) for p, r in template._VARIABLE_PARTS] == [(p.pattern, r) for p, r in history._VARIABLE_PARTS]
+    try:
+        open('/tmp/missing-42/file.txt')
+    except OSError as error:
+        frames = traceback.extract_tb(error.__traceback__)
+        location = f"{frames[-1].filename}:{frames[-1].name}"
+        assert template.error_fingerprint(error) == error_fingerprint(type(error).__name__, str(error), location)
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = {'torch', 'nemo', 'docker', 'langchain', 'langchain_community', 'astrapy', 'cassandra', 'bandit', 'safety'}
+# Cumulative import budget for main, in microseconds
+MAIN_IMPORT_BUDGET_US = 500_000
+
+
+def _import_times(statement):
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.replace('import time:', '').split('|')
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def test_main_import_skips_heavy_dependencies():
+    times = _import_times('import main')
+    loaded = {name.split('.')[0] for name in times}
+    assert not loaded & HEAVY_MODULES
+    assert times['main'] < MAIN_IMPORT_BUDGET_US
+
+
+def test_settings_are_resolved_lazily():
+    completed = subprocess.run(
+        [sys.executable, '-c', 'import config.settings as s; print(s._env_manager is None)'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert completed.stdout.strip() == 'True'
+
+
+def test_help_runs_without_configuration():
+    completed = subprocess.run(
+        [sys.executable, 'main.py', '--help'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    assert completed.returncode == 0
+    assert '--batch' in completed.stdout
@@ -0,0 +1,60 @@
+from utils.fakes import FakeCollection, FakeEmbeddings
+from utils.lexical_index import BM25Index, has_semantic_content, reciprocal_rank_fusion, tokenize_code
+from utils.rag_manager import RAGManager
+
+
+def test_tokenize_splits_snake_and_camel_case():
+    tokens = tokenize_code("raise HTTPServerError(handle_error)")
+
+    assert tokens == ['raise', 'httpservererror', 'http', 'server', 'error', 'handle_error', 'handle', 'error']
+
+
+def test_semantic_content_detection():
+    assert not has_semantic_content("fix KeyError: 'user_id' in handle_error")
+    assert has_semantic_content("retry failed requests with exponential backoff")
+
+
+def test_bm25_ranks_exact_identifiers_and_updates_incrementally():
+    index = BM25Index()
+    index.add('a', "def handle_error(error):\n    log(error)\n")
+    index.add('b', "def retry_strategy(func):\n    return func\n")
+
+    assert [doc_id for doc_id, _ in index.search("handle_error")] == ['a']
+
+    index.add('c', "class RetryError(Exception): pass\nretry_strategy(RetryError)\n")
+    # Parts of the identifier match too, but the exact name ranks first
+    assert [doc_id for doc_id, _ in index.search("RetryError")] == ['c', 'a', 'b']
+    assert len(index) == 3
+
+    index.remove('c')
+    assert 'c' not in index
+    assert index.search("retryerror") == []
+
+
+def test_reciprocal_rank_fusion_favours_agreement():
+    fused = reciprocal_rank_fusion([['a', 'b', 'c'], ['b', 'd']])
+
+    assert [doc_id for doc_id, _ in fused] == ['b', 'a', 'd', 'c']
+
+
+def test_identifier_queries_skip_the_embedding():
+    embeddings = FakeEmbeddings()
+    manager = RAGManager(embeddings=embeddings, collection=FakeCollection())
+    calls = embeddings.calls
+
+    context = manager.get_relevant_context("fix ErrorRecoveryManager register_strategy", k=1)
+
+    assert embeddings.calls == calls
+    assert context[0]['metadata']['symbol'] == 'ErrorRecoveryManager.register_strategy' \
+        or 'def register_strategy' in context[0]['content']
+
+
+def test_descriptive_queries_fuse_both_retrievers():
+    embeddings = FakeEmbeddings()
+    manager = RAGManager(embeddings=embeddings, collection=FakeCollection())
+    calls = embeddings.calls
+
+    context = manager.get_relevant_context("retry the wrapped call with exponential backoff delay", k=2)
+
+    assert embeddings.calls == calls + 1
+    assert any('def retry_strategy' in item['content'] for item in context)
@@ -0,0 +1,31 @@
+import json
+import logging
+from utils.logger import JsonFormatter, LogManager
+
+
+def test_log_manager_configures_once(temp_dir):
+    root = logging.getLogger()
+    before = len(root.handlers)
+    try:
+        LogManager(temp_dir / 'logs')
+        LogManager(temp_dir / 'logs')
+        assert len(root.handlers) == before + 1
+    finally:
+        LogManager.shutdown()
+    assert len(root.handlers) == before
+
+
+def test_records_reach_file_after_shutdown(temp_dir):
+    log_dir = temp_dir / 'queued'
+    logger = LogManager(log_dir).get_logger('tests.logger')
+    logger.debug("queued %s", "message")
+    LogManager.shutdown()
+    contents = "".join(path.read_text() for path in log_dir.glob('*.log'))
+    assert "queued message" in contents
+
+
+def test_json_formatter():
+    record = logging.LogRecord('tests', logging.INFO, __file__, 1, "value %d", (3,), None)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['message'] == "value 3"
+    assert entry['level'] == "INFO"
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from utils.metrics import MetricsRegistry
+
+
+def test_counter_sums_across_threads():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ['result'])
+
+    def worker():
+        for _ in range(10000):
+            requests.labels(result='ok').inc()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert requests.labels(result='ok').value == 40000
+    assert 'requests_total{result="ok"} 40000' in registry.exposition()
+
+
+def test_cells_of_ended_threads_are_folded():
+    registry = MetricsRegistry()
+    requests = registry.counter('short_lived_total', 'Requests from short-lived threads')
+
+    for _ in range(20):
+        thread = threading.Thread(target=requests.inc)
+        thread.start()
+        thread.join()
+    assert requests.labels().value == 20
+    assert len(requests.labels()._cells._cells) == 0
+
+
+def test_histogram_exposition_is_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    lines = registry.exposition().splitlines()
+    assert lines[:2] == ['# HELP latency_seconds Latency', '# TYPE latency_seconds histogram']
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 3.65',
+        'latency_seconds_count 4'
+    ]
+
+
+def test_registry_reuses_metrics_and_writes_file(temp_dir):
+    registry = MetricsRegistry()
+    assert registry.counter('jobs_total', 'Jobs') is registry.counter('jobs_total', 'Jobs')
+    with pytest.raises(ValueError):
+        registry.gauge('jobs_total', 'Jobs')
+
+    depth = registry.gauge('queue_depth', 'Depth')
+    depth.set_function(lambda: 7)
+    registry.write(temp_dir / 'metrics.prom')
+    assert 'queue_depth 7' in (temp_dir / 'metrics.prom').read_text()
+    assert not list(temp_dir.glob('.metrics.prom.*'))
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from utils.nemo_integration import NeMoModelManager
+
+VOCAB = ["def ", "app", "():", "\n", "```", " pass", "\n", "# trailing"]
+
+
+class FakeTokenizer:
+    def text_to_ids(self, text):
+        return [0]
+
+    def ids_to_text(self, ids):
+        return "".join(VOCAB[i] for i in ids)
+
+
+class FakeModel:
+    device = "cpu"
+
+    def __init__(self, token_seconds=0.0):
+        self.tokenizer = FakeTokenizer()
+        self.steps = 0
+        self.token_seconds = token_seconds
+
+    def generate(self, inputs, streamer=None, stopping_criteria=(), **kwargs):
+        for token_id in [0, 1, 2, 5, 3, 4, 6, 7]:
+            if any(criterion(None, None) for criterion in stopping_criteria):
+                break
+            time.sleep(self.token_seconds)
+            self.steps += 1
+            streamer.put([token_id])
+
+
+def _manager(token_seconds=0.0):
+    manager = NeMoModelManager(model=FakeModel(token_seconds))
+    # Token ids as a plain list; the real step builds a torch tensor
+    manager._encode_prompt = lambda prompt: [[0]]
+    return manager
+
+
+def test_stream_code_stops_at_code_block_end():
+    manager = _manager()
+    chunks = list(manager.stream_code("prompt"))
+    assert "".join(chunks) == "def app(): pass"
+    assert len(chunks) > 1
+    assert manager.generation_metrics['stopped_early'] is True
+    assert manager.model.steps < 8
+    assert manager.generation_metrics['time_to_first_token'] <= manager.generation_metrics['total_latency']
+
+
+def test_stream_code_without_stop_sequences():
+    manager = _manager()
+    text = "".join(manager.stream_code("prompt", stop_sequences=[]))
+    assert text == "def app(): pass\n```\n# trailing"
+
+
+def test_astream_code():
+    manager = _manager()
+
+    async def collect():
+        return [chunk async for chunk in manager.astream_code("prompt")]
+
+    assert "".join(asyncio.run(collect())) == "def app(): pass"
+
+
+def test_cancelled_astream_code_stops_generation():
+    manager = _manager(token_seconds=0.05)
+
+    async def consume_then_cancel():
+        received = []
+
+        async def consume():
+            async for chunk in manager.astream_code("prompt"):
+                received.append(chunk)
+
+        task = asyncio.ensure_future(consume())
+        while not received:
+            await asyncio.sleep(0.01)
+        # Cancelled while waiting for the next token
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return received
+
+    assert asyncio.run(consume_then_cancel())
+    # At most the token in progress is finished
+    time.sleep(0.1)
+    steps = manager.model.steps
+    time.sleep(0.2)
+    assert manager.model.steps == steps < 8
@@ -0,0 +1,53 @@
+from agents.validator_agent import check_syntax
+from utils.fakes import FakeCommandRunner, FakeDockerClient
+from utils.parsed_code import ParsedCode, parse_code
+from utils.security import SecurityManager
+
+
+def test_parsed_code_derives_artifacts_lazily():
+    parsed = ParsedCode("import os\n\nos.system('ls')\n")
+
+    assert parsed.syntax_errors == []
+    assert parsed._tree is None and parsed._uses is None and parsed._tokens is None
+    assert parsed.find('os.system(') == 3
+    assert parsed.tree.body[0].names[0].name == 'os'
+    assert parsed.uses == {'os.system(': 3, 'os.': 3}
+    assert parsed.sha256 == ParsedCode(parsed.source).sha256
+    assert parsed.tokens[0].string == 'import'
+    assert ParsedCode("x = (1,\n").tokens == []
+
+
+def test_syntax_errors_include_compile_time_errors():
+    assert check_syntax("return 1\n")[0].startswith("Syntax error: 'return' outside function")
+    assert ParsedCode("def broken(:\n").tree is None
+    assert check_syntax("x = 1\n") == []
+
+
+def test_security_scan_reuses_parse_and_bandit_results():
+    runner = FakeCommandRunner(bandit_results=[
+        {'issue_severity': 'LOW', 'issue_confidence': 'HIGH', 'issue_text': 'subprocess import'}
+    ])
+    manager = SecurityManager(docker_client=FakeDockerClient(), command_runner=runner)
+    package = {'code': "import pickle\n\ndata = pickle.loads(blob)\n", 'dependencies': {}}
+
+    first = manager.run_security_scan(package)
+    second = manager.run_security_scan(dict(package))
+
+    assert parse_code(package['code']) is parse_code(package['code'])
+    assert [command[0] for command in runner.commands] == ['bandit']
+    assert first['code_issues'] == second['code_issues']
+    assert "Potentially dangerous function used: pickle.loads( (line 3)" in second['vulnerabilities']
+
+
+def test_pattern_checks_ignore_strings_and_comments():
+    manager = SecurityManager(docker_client=FakeDockerClient(), command_runner=FakeCommandRunner())
+    code = (
+        "# never call eval( here\n"
+        "message = 'use os.system( with care'\n"
+        "from urllib.request import urlopen\n"
+        "page = urlopen('http://example.com')\n"
+        "result = eval(page.read())\n"
+    )
+    results = manager.run_security_scan({'code': code, 'dependencies': {}})
+
+    assert results['vulnerabilities'] == ["Potentially dangerous function used: eval( (line 5)"]
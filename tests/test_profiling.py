@@ -0,0 +1,75 @@
+import time
+from utils import profiling
+from utils.profiling import maybe_profile, profile_run
+
+
+def _busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_cpu_profile_writes_collapsed_stacks(temp_dir):
+    with profile_run(temp_dir / 'cpu', 'cpu') as profiler:
+        _busy_loop(0.2)
+    assert profiler.sample_count > 0
+
+    lines = (temp_dir / 'cpu' / 'stacks.collapsed').read_text().splitlines()
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert any('_busy_loop' in line for line in lines)
+    assert 'Self time' in (temp_dir / 'cpu' / 'summary.txt').read_text()
+
+
+def test_memory_profile_reports_allocations(temp_dir):
+    with profile_run(temp_dir / 'memory', 'memory'):
+        retained = [bytearray(1024) for _ in range(200)]
+    summary = (temp_dir / 'memory' / 'summary.txt').read_text()
+    assert 'test_profiling.py' in summary
+    assert (temp_dir / 'memory' / 'allocations.collapsed').stat().st_size > 0
+    assert len(retained) == 200
+
+
+def test_cprofile_and_disabled_modes(temp_dir):
+    with profile_run(temp_dir / 'det', 'cprofile'):
+        _busy_loop(0.01)
+    assert (temp_dir / 'det' / 'profile.pstats').exists()
+    assert '_busy_loop' in (temp_dir / 'det' / 'summary.txt').read_text()
+
+    with maybe_profile(None, temp_dir / 'off'):
+        _busy_loop(0.01)
+    assert not (temp_dir / 'off').exists()
+
+
+def test_batch_job_profile_is_per_job(temp_dir, monkeypatch):
+    import main
+    from tests.test_batch import _fake_components
+
+    monkeypatch.setattr(profiling, 'PROFILES_DIR', temp_dir / 'profiles')
+    monkeypatch.setattr(main, '_worker_components', _fake_components())
+    result = main._run_job({'id': 'a', 'requirements': 'flask web app', 'profile': 'cprofile'}, time.time(), run_id='run')
+    assert result['status'] == 'valid'
+    assert result['profile_dir'] == str(temp_dir / 'profiles' / 'run' / 'a')
+    assert (temp_dir / 'profiles' / 'run' / 'a' / 'summary.txt').exists()
+
+    unprofiled = main._run_job({'id': 'b', 'requirements': 'flask web app'}, time.time(), run_id='run')
+    assert 'profile_dir' not in unprofiled
+
+
+def test_profile_dir_stays_under_profiles_dir():
+    root = profiling.PROFILES_DIR.resolve()
+    for run_id, job_id in [('../../x', None), ('run', '../../x'), ('..', '.'), ('a/b', '')]:
+        path = profiling.profile_dir(run_id, job_id).resolve()
+        assert root in path.parents
+
+
+def test_cpu_profile_samples_pool_threads_working_for_the_run(temp_dir):
+    from utils.resilience import _submit
+
+    with profile_run(temp_dir / 'pool', 'cpu'):
+        _submit(_busy_loop, 0.2).result()
+
+    lines = (temp_dir / 'pool' / 'stacks.collapsed').read_text().splitlines()
+    assert any('_busy_loop' in line for line in lines)
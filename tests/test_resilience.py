@@ -0,0 +1,114 @@
+import time
+import pytest
+from utils.fakes import FakeCollection, FakeEmbeddings, FakeFirecrawlClient, FaultInjector
+from utils.firecrawl_wrapper import FirecrawlWrapper
+from utils.rag_manager import RAGManager
+from utils.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, Dependency, Policy
+from utils.tracing import current_span, span
+
+REQUIREMENTS = {'framework_preferences': {'backend': 'flask'}, 'specifications': {'type': 'web_app'}}
+
+
+def _rag(policy: Policy, **faults) -> RAGManager:
+    manager = RAGManager(embeddings=FakeEmbeddings(), collection=FakeCollection(), resilience=Dependency('astradb', policy))
+    # Faults start after the knowledge base is loaded
+    manager.collection = FaultInjector(manager.collection, **faults)
+    return manager
+
+
+def test_idempotent_reads_are_retried_with_backoff():
+    manager = _rag(Policy(backoff=0.001), failures={'find_many': 2})
+
+    context = manager.get_relevant_context("retry the wrapped call with exponential backoff delay", k=1)
+
+    assert len(context) == 1
+    assert manager.collection.calls['find_many'] == 3
+
+
+def test_writes_are_not_retried():
+    manager = _rag(Policy(backoff=0.001), failures={'insert_one': 1})
+
+    with pytest.raises(ConnectionError):
+        manager.add_document("def handler():\n    pass\n", {'source': 'test'})
+    assert manager.collection.calls['insert_one'] == 1
+
+
+def test_breaker_fails_fast_then_probes():
+    down = FaultInjector(FakeFirecrawlClient(), failures={'search_code_examples': 3})
+    resilience = Dependency('firecrawl', Policy(retries=0, failure_threshold=3, reset_timeout=0.05))
+    wrapper = FirecrawlWrapper(client=down, resilience=resilience)
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            wrapper.scrape_data(REQUIREMENTS)
+    with pytest.raises(CircuitOpenError):
+        wrapper.scrape_data(REQUIREMENTS)
+    assert down.calls['search_code_examples'] == 3
+    assert resilience.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert wrapper.scrape_data(REQUIREMENTS)['examples']
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_interrupted_probe_reopens_the_breaker():
+    resilience = Dependency('probe', Policy(timeout=None, retries=0, failure_threshold=1, reset_timeout=0.01))
+
+    def down():
+        raise ConnectionError("down")
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(ConnectionError):
+        resilience.call(down)
+    time.sleep(0.02)
+    with pytest.raises(KeyboardInterrupt):
+        resilience.call(interrupted)
+    assert resilience.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.02)
+    assert resilience.call(lambda: 'up') == 'up'
+    assert resilience.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_calls_hit_their_deadline():
+    manager = _rag(Policy(timeout=0.05), latency={'insert_one': 1.0})
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        manager.add_document("def handler():\n    pass\n", {'source': 'test'})
+    assert time.perf_counter() - start < 0.5
+
+
+def test_slow_reads_are_hedged():
+    manager = _rag(Policy(timeout=2.0, hedge_after=0.02), latency={'find_many': [1.0, 0.0]})
+
+    start = time.perf_counter()
+    context = manager.get_relevant_context("retry the wrapped call with exponential backoff delay", k=1)
+
+    assert len(context) == 1
+    assert time.perf_counter() - start < 0.5
+    assert manager.collection.calls['find_many'] == 2
+
+
+def test_retry_budget_caps_retries_across_calls():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise ConnectionError("down")
+
+    resilience = Dependency('flaky', Policy(retries=3, backoff=0.001, retry_ratio=0.0, retry_reserve=2, failure_threshold=100))
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            resilience.call(flaky, idempotent=True)
+
+    # Three calls plus the two retries the reserve allows
+    assert len(calls) == 5
+
+
+def test_attempts_on_the_pool_keep_the_callers_span():
+    dependency = Dependency('context', Policy(timeout=1.0, retries=0))
+    with span('caller') as caller:
+        assert dependency.call(current_span) is caller
@@ -0,0 +1,172 @@
+import io
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.fakes import FakeDockerClient, build_offline_components
+from utils.sandbox import (
+    KILLED_EXIT_CODE,
+    SandboxLimits,
+    SandboxRejected,
+    SandboxScheduler,
+    build_workspace_archive,
+    read_workspace_archive,
+    run_in_sandbox,
+    sandbox_priority
+)
+from utils.security import SecurityManager
+from utils.speculative import CancelToken, Cancelled
+
+
+def test_workspace_archive_creates_directories():
+    archive = build_workspace_archive({'app.py': 'app = 1\n', 'fixtures/data.json': '{}'})
+
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        directories = [member.name for member in tar.getmembers() if member.isdir()]
+    assert directories == ['app', 'app/fixtures']
+    assert read_workspace_archive(archive) == {'app/app.py': 'app = 1\n', 'app/fixtures/data.json': '{}'}
+
+
+def test_concurrent_runs_get_isolated_workspaces():
+    docker_client = FakeDockerClient(output=b'2 passed')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outcomes = list(pool.map(
+            lambda i: run_in_sandbox(docker_client, 'python:3.9-slim', ['pytest'], {'app.py': f"job = {i}\n"}),
+            range(16)
+        ))
+
+    containers = docker_client.containers
+    assert len({outcome.workspace_id for outcome in outcomes}) == 16
+    assert len({container.name for container in containers.created}) == 16
+    assert sorted(containers.removed) == sorted(container.name for container in containers.created)
+    assert all('volumes' not in run for run in containers.runs)
+    assert {read_workspace_archive(c.archives[0])['app/app.py'] for c in containers.created} == {
+        f"job = {i}\n" for i in range(16)
+    }
+
+
+def test_failing_tests_invalidate_code():
+    components = build_offline_components(FakeDockerClient(output=b'1 failed', exit_code=1))
+    requirements = components['collector'].process_requirements("Create a Flask web app")
+    code_package = components['generator'].generate_code(requirements, {})
+
+    results = components['validator'].validate_code(code_package)
+
+    assert results['valid'] is False
+    assert any(error.startswith('Tests failed (exit code 1): 1 failed') for error in results['errors'])
+
+
+def test_secure_environments_are_per_job():
+    manager = SecurityManager(docker_client=FakeDockerClient())
+
+    first = manager.create_secure_environment({'code': 'print(1)'})
+    second = manager.create_secure_environment({'code': 'print(2)'})
+
+    assert first['workspace_id'] != second['workspace_id']
+    assert first['container_options']['name'] != second['container_options']['name']
+    assert '/app/data' in first['container_options']['tmpfs']
+    assert read_workspace_archive(second['archive']) == {'app/code/app.py': 'print(2)'}
+
+
+def _scheduler(cpus: float = 1.0, max_queue: int = 8) -> SandboxScheduler:
+    return SandboxScheduler(cpu_budget=cpus, memory_budget='2g', limits=SandboxLimits(cpus=0.5), max_queue=max_queue)
+
+
+def test_scheduler_keeps_runs_within_budget():
+    scheduler = _scheduler(cpus=1.0)
+    peak = []
+
+    def work(_):
+        with scheduler.reserve():
+            peak.append(scheduler.stats()['reserved_cpus'])
+            time.sleep(0.02)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(work, range(6)))
+
+    assert max(peak) == 1.0
+    assert scheduler.stats()['running'] == 0
+
+
+def test_scheduler_admits_higher_priority_first():
+    scheduler = _scheduler(cpus=0.5)
+    order = []
+
+    def work(priority):
+        with sandbox_priority(priority), scheduler.reserve():
+            order.append(priority)
+
+    with scheduler.reserve():
+        threads = []
+        for priority in (0, 5, 1):
+            threads.append(threading.Thread(target=work, args=(priority,)))
+            threads[-1].start()
+            while scheduler.stats()['queued'] < len(threads):
+                time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+
+    assert order == [5, 1, 0]
+
+
+def test_scheduler_rejects_oversized_and_excess_runs():
+    scheduler = _scheduler(cpus=0.5, max_queue=0)
+    rejections = []
+
+    for limits in (SandboxLimits(cpus=2.0), None):
+        with scheduler.reserve():
+            try:
+                with scheduler.reserve(limits):
+                    pass
+            except SandboxRejected as e:
+                rejections.append(e.reason)
+
+    scheduler.max_queue = 1
+    with scheduler.reserve():
+        try:
+            with scheduler.reserve(queue_timeout=0.01):
+                pass
+        except SandboxRejected as e:
+            rejections.append(e.reason)
+
+    assert rejections == ['too_large', 'queue_full', 'queue_timeout']
+    assert scheduler.stats()['queued'] == 0
+
+
+def test_cancelled_run_leaves_the_queue():
+    scheduler = _scheduler(cpus=0.5)
+    token = CancelToken()
+    outcome = []
+
+    def work():
+        try:
+            with scheduler.reserve(cancel=token):
+                outcome.append('admitted')
+        except Cancelled:
+            outcome.append('cancelled')
+
+    with scheduler.reserve():
+        thread = threading.Thread(target=work)
+        thread.start()
+        while scheduler.stats()['queued'] < 1:
+            time.sleep(0.001)
+        token.cancel()
+        thread.join(1)
+        assert outcome == ['cancelled']
+        assert scheduler.stats()['queued'] == 0
+
+
+def test_runaway_run_is_killed_at_timeout():
+    docker_client = FakeDockerClient(latency=5.0)
+    scheduler = SandboxScheduler(
+        cpu_budget=1, memory_budget='1g', limits=SandboxLimits(cpus=0.5, memory=256 * 1024 ** 2, timeout=0.05), max_queue=1
+    )
+
+    result = scheduler.run(docker_client, 'python:3.9-slim', ['python', 'loop.py'], {'loop.py': 'while True: pass\n'})
+
+    container = docker_client.containers.created[0]
+    assert result.timed_out and result.exit_code == KILLED_EXIT_CODE
+    assert container.status == 'removed'
+    assert container.options['nano_cpus'] == 500_000_000
+    assert container.options['mem_limit'] == container.options['memswap_limit'] == 256 * 1024 ** 2
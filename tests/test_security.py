@@ -0,0 +1,45 @@
+from utils.fakes import FakeCommandRunner, FakeDockerClient
+from utils.security import SecurityManager
+
+
+def _scan(manager: SecurityManager, index: int = 0) -> dict:
+    return manager.run_security_scan({'code': f"print({index})\n", 'dependencies': {'requirements': []}})
+
+
+def test_docker_posture_is_reused_across_code_packages():
+    docker_client = FakeDockerClient(image_user='root')
+    manager = SecurityManager(docker_client=docker_client, command_runner=FakeCommandRunner())
+
+    first = _scan(manager, 1)
+    calls = docker_client.api_calls
+    second = _scan(manager, 2)
+
+    assert docker_client.api_calls == calls
+    assert any('runs as root' in issue for issue in second['vulnerabilities'])
+    assert second['security_score'] == first['security_score'] < 1.0
+
+
+def test_docker_posture_is_inspected_again_when_the_daemon_changes():
+    docker_client = FakeDockerClient()
+    manager = SecurityManager(docker_client=docker_client, command_runner=FakeCommandRunner(), posture_ttl=0)
+
+    assert _scan(manager, 1)['vulnerabilities'] == []
+    calls = docker_client.api_calls
+    _scan(manager, 2)
+    # Only the image and daemon fingerprints were fetched
+    assert docker_client.api_calls == calls + 2
+
+    docker_client._info['SecurityOptions'] = []
+    assert any('seccomp' in issue for issue in _scan(manager, 3)['vulnerabilities'])
+
+
+def test_failed_docker_checks_are_not_cached():
+    docker_client = FakeDockerClient()
+    manager = SecurityManager(docker_client=docker_client, command_runner=FakeCommandRunner())
+    info = docker_client.info
+    docker_client.info = lambda: (_ for _ in ()).throw(ConnectionError("daemon unreachable"))
+
+    assert any("'Resource limits' failed" in issue for issue in _scan(manager, 1)['vulnerabilities'])
+
+    docker_client.info = info
+    assert _scan(manager, 2)['vulnerabilities'] == []
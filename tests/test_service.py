@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+from service import MAX_BODY_BYTES, JobService
+
+release = threading.Event()
+
+
+class Passthrough:
+    def scrape_data(self, requirements):
+        release.wait(5)
+        return {}
+
+    def process_data(self, data):
+        return {}
+
+
+class Validator:
+    def validate_code(self, code_package):
+        return {'valid': True, 'errors': []}
+
+
+def _components():
+    from agents.collector_agent import RequirementCollector
+    from agents.generator_agent import CodeGenerator
+    passthrough = Passthrough()
+    return {
+        'collector': RequirementCollector(),
+        'generator': CodeGenerator(),
+        'validator': Validator(),
+        'firecrawl': passthrough,
+        'nemo_utils': passthrough
+    }
+
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    payload = json.dumps(body).encode() if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    lines = head.decode().split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    return int(lines[0].split()[1]), headers, body
+
+
+def test_job_service_admission_and_progress():
+    async def scenario():
+        release.clear()
+        service = JobService(_components, workers=1, max_queue=1)
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        status, _, _ = await _request(port, 'GET', '/health')
+        assert status == 503
+        await service.start()
+        status, _, _ = await _request(port, 'GET', '/health')
+        assert status == 200
+
+        status, _, body = await _request(port, 'POST', '/jobs', {'requirements': 'flask app', 'id': 'first'})
+        assert status == 202
+        # Wait until the worker has picked up the first job
+        while service.jobs['first'].status != 'running':
+            await asyncio.sleep(0.01)
+        status, _, _ = await _request(port, 'POST', '/jobs', {'requirements': 'flask app', 'id': 'second'})
+        assert status == 202
+        status, _, _ = await _request(port, 'POST', '/jobs', {'requirements': 'flask app', 'id': 'first'})
+        assert status == 409
+        for bad_id in ('../../x', 7, ''):
+            status, _, _ = await _request(port, 'POST', '/jobs', {'requirements': 'flask app', 'id': bad_id})
+            assert status == 400
+        status, headers, _ = await _request(port, 'POST', '/jobs', {'requirements': 'flask app'})
+        assert status == 429
+        assert int(headers['Retry-After']) >= 1
+
+        events = asyncio.create_task(_request(port, 'GET', '/jobs/first/events'))
+        release.set()
+        _, _, stream = await events
+        stages = [json.loads(line) for line in stream.splitlines()]
+        assert [e['stage'] for e in stages if 'stage' in e] == ['scrape', 'process', 'generate', 'validate']
+        assert stages[-1]['status'] == 'valid'
+
+        status, _, body = await _request(port, 'GET', '/jobs/first')
+        assert status == 200
+        assert json.loads(body)['result']['code_package']['framework'] == 'flask'
+        status, _, _ = await _request(port, 'GET', '/jobs/missing')
+        assert status == 404
+
+        await service.queue.join()
+        await service.stop()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_oversized_body_is_rejected_before_reading():
+    async def scenario():
+        service = JobService(_components, workers=1)
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        # Only the headers are sent; the service must answer without waiting for the body
+        writer.write(f"POST /jobs HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout=5)
+        writer.close()
+        assert response.startswith(b'HTTP/1.1 413 Content Too Large')
+
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(scenario())
@@ -0,0 +1,127 @@
+import threading
+import time
+from agents.generator_agent import CodeGenerator
+from utils.fakes import ProcessDockerClient
+from utils.sandbox import _priority, run_in_sandbox, sandbox_priority
+from utils.speculative import CancelToken, Cancelled, PassRateTuner, SpeculativeValidator
+from utils.tracing import current_span, span
+
+REQUIREMENTS = {
+    'framework_preferences': {'backend': 'flask'},
+    'specifications': {'type': 'web_app'},
+    'template_values': {'port': 8000},
+    'template_variants': [{'port': 8001}, {'port': 8002}, {'port': 8003}]
+}
+
+
+class ScriptedValidator:
+    """Validates candidates by port: (seconds, valid) per port; records cancellations."""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.cancelled = []
+
+    def validate_code(self, code_package, cancel=None):
+        port = next(port for port in self.outcomes if f"port={port}" in code_package['code'])
+        seconds, valid = self.outcomes[port]
+        stopped = threading.Event()
+        cancel.on_cancel(stopped.set)
+        if stopped.wait(seconds):
+            self.cancelled.append(port)
+            raise Cancelled("cancelled")
+        return {'valid': valid, 'errors': [] if valid else [f"failed on {port}"] * (port - 8000)}
+
+
+def test_tuner_sizes_runs_from_pass_rate():
+    tuner = PassRateTuner(target=0.9, max_candidates=4)
+    kind = ('flask', 'web_app')
+    # No outcomes yet: a pass rate of 1/2 needs four candidates for 90%
+    assert tuner.candidates(kind) == 4
+
+    for _ in range(18):
+        tuner.record(kind, True)
+    assert tuner.candidates(kind) == 1
+
+    for _ in range(30):
+        tuner.record(kind, False)
+    assert tuner.pass_rate(kind) < 0.5
+    assert tuner.candidates(kind) == 4
+
+
+def test_first_passing_candidate_wins_and_cancels_the_rest():
+    validator = ScriptedValidator({8000: (0.01, False), 8001: (0.05, True), 8002: (5.0, True), 8003: (5.0, False)})
+    speculation = SpeculativeValidator(CodeGenerator(), validator, candidates=4)
+
+    candidates = speculation.generate(REQUIREMENTS, {})
+    start = time.perf_counter()
+    package, results = speculation.validate(candidates)
+
+    assert time.perf_counter() - start < 2.0
+    assert "port=8001" in package['code']
+    assert results['valid']
+    assert results['speculation'] == {'candidates': 4, 'validated': 2, 'cancelled': 2, 'winner': 1}
+    time.sleep(0.1)
+    assert sorted(validator.cancelled) == [8002, 8003]
+
+
+def test_without_a_pass_the_fewest_errors_win():
+    validator = ScriptedValidator({8000: (0.0, False), 8001: (0.0, True), 8002: (0.0, False), 8003: (0.0, False)})
+    speculation = SpeculativeValidator(CodeGenerator(), validator, candidates=3)
+    requirements = {**REQUIREMENTS, 'template_variants': [{'port': 8003}, {'port': 8002}]}
+
+    package, results = speculation.validate(speculation.generate(requirements, {}))
+
+    assert not results['valid']
+    assert "port=8000" in package['code']
+    assert results['speculation']['validated'] == 3
+
+
+def test_candidates_are_capped_at_distinct_variants():
+    speculation = SpeculativeValidator(CodeGenerator(), ScriptedValidator({}), candidates=4)
+    crawler = {'framework_preferences': {'backend': 'flask'}, 'specifications': {'type': 'web_crawler'}}
+
+    assert speculation.candidate_count(REQUIREMENTS) == 4
+    assert speculation.candidate_count(crawler) == 1
+
+
+def test_cancel_kills_running_sandbox():
+    cancel = CancelToken()
+    threading.Timer(0.2, cancel.cancel).start()
+
+    start = time.perf_counter()
+    result = run_in_sandbox(
+        ProcessDockerClient(), 'python:3.9-slim', ['python', '-c', 'import time; time.sleep(30)'], {}, cancel=cancel
+    )
+
+    assert time.perf_counter() - start < 5.0
+    assert result.exit_code != 0
+    assert not result.timed_out
+
+
+def test_candidates_run_in_the_callers_context():
+    seen = []
+
+    class ContextValidator:
+        def validate_code(self, code_package, cancel=None):
+            seen.append((_priority.get(), current_span()))
+            return {'valid': False, 'errors': ['failed']}
+
+    speculation = SpeculativeValidator(CodeGenerator(), ContextValidator(), candidates=2)
+    with sandbox_priority(5), span('stage.validate') as stage:
+        speculation.validate(speculation.generate(REQUIREMENTS, {}))
+
+    assert seen == [(5, stage), (5, stage)]
+
+
+def test_close_components_stops_the_candidate_pool():
+    import main
+
+    validator = ScriptedValidator({8000: (0.01, True), 8001: (0.01, True)})
+    speculation = SpeculativeValidator(CodeGenerator(), validator, candidates=2)
+    speculation.validate(speculation.generate(REQUIREMENTS, {}))
+    threads = list(speculation._executor._threads)
+    assert threads and all(thread.is_alive() for thread in threads)
+
+    main.close_components({'speculation': speculation})
+
+    assert not any(thread.is_alive() for thread in threads)
@@ -0,0 +1,52 @@
+import os
+from agents.generator_agent import CodeGenerator
+from utils.template_engine import CompiledTemplate, TemplateEngine
+
+
+def test_compiled_template_render():
+    template = CompiledTemplate("a={{ a }}, b={{b}}, a again={{a}}")
+    assert template.slots == ('a', 'b', 'a')
+    assert template.render({'a': 1, 'b': 'x'}) == "a=1, b=x, a again=1"
+
+
+def test_missing_slot_raises():
+    template = CompiledTemplate("{{a}}{{b}}")
+    try:
+        template.render({'a': 1})
+    except KeyError as e:
+        assert 'b' in str(e)
+    else:
+        raise AssertionError("expected KeyError")
+
+
+def test_engine_indexes_and_hot_reloads(temp_dir):
+    templates = temp_dir / 'templates'
+    templates.mkdir()
+    path = templates / 'flask_app.py'
+    path.write_text('"""\nFramework: flask\nType: web_app\n"""\nport = {{port}}\n')
+    (templates / 'django_app.py').write_text('name = "{{name}}"\n')
+
+    engine = TemplateEngine(templates, reload_interval=0)
+    assert set(engine.keys()) == {('flask', 'web_app'), ('django', 'app')}
+    assert engine.render('flask', 'web_app', {'port': 80}) == "port = 80\n"
+
+    path.write_text('"""\nFramework: flask\nType: web_app\n"""\nPORT = {{port}}\n')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert engine.render('flask', 'web_app', {'port': 80}).endswith("PORT = 80\n")
+
+
+def test_generator_renders_flask_template():
+    generator = CodeGenerator()
+    requirements = {
+        'framework_preferences': {'backend': 'flask'},
+        'specifications': {'type': 'web_app'},
+        'template_values': {'port': 9000}
+    }
+    result = generator.generate_code(requirements, {})
+    assert "{{" not in result['code']
+    assert "port=9000" in result['code']
+    compile(result['code'], 'app.py', 'exec')
+    # Same requirements, same source: no per-render secret is baked in
+    assert generator.generate_code(requirements, {})['code'] == result['code']
+    assert "os.environ.get('SECRET_KEY')" in result['code']
@@ -0,0 +1,126 @@
+import json
+import subprocess
+import sys
+from agents.validator_agent import CodeValidator
+from utils.fakes import FakeCollection, FakeCommandRunner, FakeEmbeddings, ProcessDockerClient
+from utils.rag_manager import RAGManager
+from utils.sandbox import SandboxLimits, SandboxScheduler
+from utils.sandbox_pytest import _plan
+from utils.security import SecurityManager
+from utils.test_impact import CONFIG_FILE, RUNNER_FILE, TestImpact, fingerprint, parse_report, runner_source, strip_report
+
+APP = """
+class App:
+    debug = True
+
+def create_app():
+    return App()
+
+def greet(name):
+    return 'hello ' + name
+
+app = create_app()
+"""
+
+EXTRA_TESTS = """
+from app import create_app, greet
+
+def test_greet():
+    assert greet('bob') == 'hello bob'
+
+def test_create_app():
+    assert create_app().debug
+"""
+
+
+def _validator() -> CodeValidator:
+    docker_client = ProcessDockerClient()
+    return CodeValidator(
+        rag_manager=RAGManager(embeddings=FakeEmbeddings(), collection=FakeCollection()),
+        security_manager=SecurityManager(docker_client=docker_client, command_runner=FakeCommandRunner()),
+        docker_client=docker_client,
+        scheduler=SandboxScheduler(cpu_budget=2, memory_budget='2g', limits=SandboxLimits(timeout=60)),
+        test_shards=2
+    )
+
+
+def _run(validator: CodeValidator, code: str, impact: TestImpact) -> dict:
+    results = {'valid': True, 'errors': []}
+    validator._test_in_container({'code': code, 'files': {'test_extra.py': EXTRA_TESTS}}, results, impact)
+    return results
+
+
+def test_fingerprint_isolates_function_bodies():
+    before = fingerprint({'app.py': APP})
+    after = fingerprint({'app.py': APP.replace("'hello '", "'hi '")})
+
+    changed = {key for key in before if before[key] != after[key]}
+    assert changed == {'app.py:greet'}
+
+
+def test_selection_follows_coverage_and_failures():
+    impact = TestImpact()
+    files = {'app.py': APP, 'test_extra.py': EXTRA_TESTS}
+    impact.record(files, {'tests': {
+        'test_extra.py::test_greet': {'outcome': 'passed', 'duration': 0.5, 'covered': ['app.py:greet']},
+        'test_extra.py::test_create_app': {'outcome': 'failed', 'duration': 0.25, 'covered': ['app.py:create_app']},
+    }}, None)
+
+    assert impact.select(files) == ['test_extra.py::test_create_app']
+    changed = {**files, 'app.py': APP.replace("'hello '", "'hi '")}
+    assert impact.select(changed) == ['test_extra.py::test_create_app', 'test_extra.py::test_greet']
+    assert impact.select({**files, 'app.py': 'import os\n' + APP}) is None
+    assert impact.skipped_seconds(['test_extra.py::test_create_app']) == 0.5
+
+
+def test_report_is_split_from_test_output():
+    output = '2 passed\n@@SANDBOX_TEST_REPORT@@{"tests": {}, "shards": 1, "wall_seconds": 0.1}\n'
+
+    assert parse_report(output)['shards'] == 1
+    assert strip_report(output) == '2 passed'
+    assert parse_report('1 failed') is None
+
+
+def test_fix_attempts_rerun_only_affected_tests():
+    validator = _validator()
+    impact = TestImpact()
+
+    first = _run(validator, APP, impact)
+    assert first['valid'], first['errors']
+    assert first['test_impact']['tests_run'] == 4
+    # No durations yet to size the suite by, so one shard
+    assert first['test_impact']['shards'] == 1
+    assert impact.tests['test_extra.py::test_greet']['covered'] == ['app.py:greet']
+
+    second = _run(validator, APP.replace("'hello '", "'hi '"), impact)
+    assert second['valid'] is False
+    assert second['test_impact']['tests_run'] == 1
+    assert second['test_impact']['tests_skipped'] == 3
+    assert 'test_greet' in second['errors'][0] and '@@SANDBOX' not in second['errors'][0]
+
+    # Only the failing test is re-run once it is fixed; unchanged code skips the container
+    third = _run(validator, APP, impact)
+    assert third['valid'] and third['test_impact']['tests_run'] == 1
+    containers = len(validator.docker_client.containers.created)
+    fourth = _run(validator, APP, impact)
+    assert fourth['test_impact']['tests_run'] == 0
+    assert len(validator.docker_client.containers.created) == containers
+
+
+def test_unselected_suite_is_sharded_only_when_durations_justify_it():
+    assert _plan(None, 2, {}) == [[]]
+    assert _plan(None, 2, {'test_a': 0.3, 'test_b': 0.4}) == [[]]
+    assert _plan(None, 2, {'test_a': 1.5, 'test_b': 1.5}) == [[], []]
+
+
+def test_empty_suite_fails(temp_dir):
+    workspace = temp_dir / 'empty_suite'
+    workspace.mkdir()
+    (workspace / RUNNER_FILE).write_text(runner_source())
+    (workspace / CONFIG_FILE).write_text(json.dumps({'select': None, 'shards': 2, 'durations': {}}))
+    (workspace / 'test_app.py').write_text("import os\n")
+
+    process = subprocess.run([sys.executable, RUNNER_FILE], cwd=workspace, capture_output=True, text=True)
+
+    assert process.returncode == 5
+    assert parse_report(process.stdout)['tests'] == {}
@@ -0,0 +1,70 @@
+import json
+import pytest
+from utils import tracing
+from utils.tracing import configure_tracing, set_attributes, shutdown_tracing, span, traced
+
+
+@pytest.fixture
+def trace_dir(temp_dir):
+    yield temp_dir / 'traces'
+    shutdown_tracing()
+
+
+def test_spans_nest_and_record_attributes(trace_dir):
+    path = configure_tracing(trace_dir, 'jsonl', run_id='nested')
+
+    @traced('child')
+    def child():
+        set_attributes(items=3)
+
+    with span('root', job_id='a'):
+        child()
+    shutdown_tracing()
+
+    child_span, root_span = [json.loads(line) for line in path.read_text().splitlines()]
+    assert root_span['name'] == 'root' and root_span['parent_id'] is None
+    assert root_span['attributes'] == {'job_id': 'a'}
+    assert child_span['parent_id'] == root_span['span_id']
+    assert child_span['trace_id'] == root_span['trace_id']
+    assert child_span['attributes'] == {'items': 3}
+    assert tracing.current_span() is None
+
+
+def test_failed_span_records_error(trace_dir):
+    path = configure_tracing(trace_dir, 'jsonl', run_id='error')
+    with pytest.raises(KeyError):
+        with span('failing'):
+            raise KeyError('missing')
+    shutdown_tracing()
+    assert json.loads(path.read_text())['attributes'] == {'error': 'KeyError'}
+
+
+def test_chrome_trace_is_valid_json(trace_dir):
+    path = configure_tracing(trace_dir, 'chrome', run_id='chrome')
+    with span('stage.generate', framework='flask'):
+        pass
+    shutdown_tracing()
+
+    events = json.loads(path.read_text())
+    complete = [event for event in events if event['ph'] == 'X']
+    assert complete[0]['name'] == 'stage.generate'
+    assert complete[0]['args']['framework'] == 'flask'
+
+
+def test_pipeline_stages_are_traced(trace_dir):
+    import main
+    from tests.test_batch import _fake_components
+
+    path = configure_tracing(trace_dir, 'jsonl', run_id='pipeline')
+    components = _fake_components()
+    requirements = components['collector'].process_requirements("flask web app")
+    outcome = main.run_pipeline(components, requirements)
+    shutdown_tracing()
+
+    spans = {record['name']: record for record in map(json.loads, path.read_text().splitlines())}
+    pipeline_id = spans['pipeline']['span_id']
+    for stage in ('scrape', 'process', 'generate', 'validate'):
+        assert spans[f"stage.{stage}"]['parent_id'] == pipeline_id
+    assert spans['generate_code']['parent_id'] == spans['stage.generate']['span_id']
+    assert spans['generate_code']['attributes']['framework'] == 'flask'
+    assert set(outcome['timings']) == {'scrape', 'process', 'generate', 'validate'}
@@ -0,0 +1,217 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import difflib
+import hashlib
+import json
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+# Longest chain of deltas before a full copy is stored again
+MAX_DELTA_CHAIN = 8
+# A delta is only kept if it is smaller than this fraction of the full text
+MAX_DELTA_RATIO = 0.5
+
+
+def content_digest(code: str) -> str:
+    """Content address of a code string."""
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+
+def compress(data: bytes) -> Tuple[str, bytes]:
+    """Compress with zstd when available, zlib otherwise; returns (codec, data)."""
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=9).compress(data)
+    return 'zlib', zlib.compress(data, 9)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    """Reverse ``compress`` for the given codec."""
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd compressed artifacts")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown artifact codec: {codec}")
+
+
+def make_delta(base: str, target: str) -> bytes:
+    """
+    Encode ``target`` as line ranges copied from ``base`` plus inserted text.
+
+    The result is a JSON list whose items are either ``[start, end]`` (copy
+    base lines start..end) or a string to insert.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops: List = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(''.join(target_lines[j1:j2]))
+    return json.dumps(ops, separators=(',', ':')).encode('utf-8')
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    """Rebuild the target text from ``base`` and a ``make_delta`` result."""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+
+class ArtifactStore:
+    """Content-addressed, compressed encoding of code artifacts.
+
+    Identical code is stored once under its digest. New code for a task is
+    stored as a delta against that task's previous attempt when the delta is
+    small enough, with chains capped at ``MAX_DELTA_CHAIN``. Storage itself is
+    left to the caller: ``encode`` returns the blob row to persist and
+    ``decode`` takes a function that fetches blob rows by digest. The caller
+    reports each blob write: ``confirm`` once it is stored, ``forget`` if it
+    failed, so the next save of that code writes the blob again. Deltas are
+    only taken against confirmed blobs, so a delta never outlives a base
+    whose write failed; while the base is unconfirmed a full copy is stored.
+
+    Which blobs exist is only known per process, so blobs must be written
+    only if absent: otherwise two processes could store two digests as
+    deltas of each other. When such a write finds the blob already there,
+    the caller confirms it with the stored depth.
+    """
+
+    def __init__(self, max_tasks: int = 1024, max_known_blobs: int = 16384):
+        self.max_tasks = max_tasks
+        self.max_known_blobs = max_known_blobs
+        # task id -> (digest, code) of the task's latest artifact
+        self._latest: OrderedDict = OrderedDict()
+        # digest -> delta chain depth of blobs confirmed as persisted
+        self._known_blobs: OrderedDict = OrderedDict()
+        # digest -> delta chain depth of blobs handed out but not yet confirmed
+        self._pending_blobs: OrderedDict = OrderedDict()
+        # Writes are confirmed from driver callback threads
+        self._lock = threading.Lock()
+
+    def encode(self, task_id, code: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Encode an artifact for storage.
+
+        Returns:
+            The code digest and the blob row to persist, or None when a blob
+            with that digest has already been written or is being written
+        """
+        digest = content_digest(code)
+        with self._lock:
+            previous = self._latest.get(task_id)
+            self._remember(self._latest, task_id, (digest, code), self.max_tasks)
+            if digest in self._known_blobs:
+                self._known_blobs.move_to_end(digest)
+                return digest, None
+            if digest in self._pending_blobs:
+                return digest, None
+            base_depth = self._known_blobs.get(previous[0]) if previous is not None else None
+
+        raw = code.encode('utf-8')
+        blob = None
+        if base_depth is not None:
+            base_digest, base_code = previous
+            depth = base_depth + 1
+            if depth <= MAX_DELTA_CHAIN:
+                delta = make_delta(base_code, code)
+                if len(delta) < len(raw) * MAX_DELTA_RATIO:
+                    codec, data = compress(delta)
+                    blob = self._blob(digest, codec, data, len(raw), base_digest, depth)
+
+        if blob is None:
+            codec, data = compress(raw)
+            blob = self._blob(digest, codec, data, len(raw), None, 0)
+
+        with self._lock:
+            self._remember(self._pending_blobs, digest, blob['depth'], self.max_known_blobs)
+        return digest, blob
+
+    def confirm(self, digest: str, stored_depth: Optional[int] = None) -> None:
+        """
+        Record that the blob for ``digest`` is persisted, so later code may be a delta of it.
+
+        Args:
+            digest: Digest of the written blob
+            stored_depth: Depth of the blob found in storage when the write
+                did not apply because it already existed; the encoded depth
+                when omitted
+        """
+        with self._lock:
+            depth = self._pending_blobs.pop(digest, None)
+            if stored_depth is not None:
+                depth = stored_depth
+            if depth is not None:
+                self._remember(self._known_blobs, digest, depth, self.max_known_blobs)
+
+    def forget(self, digest: str) -> None:
+        """Drop a digest whose blob write failed, so it is written again next time."""
+        with self._lock:
+            self._pending_blobs.pop(digest, None)
+            self._known_blobs.pop(digest, None)
+
+    def decode(self, digest: str, fetch_blob: Callable[[str], Optional[Dict]]) -> str:
+        """
+        Rebuild the code stored under ``digest``.
+
+        Args:
+            digest: Content digest of the artifact
+            fetch_blob: Returns the blob row for a digest, or None if missing
+
+        Raises:
+            KeyError: A blob in the chain is missing
+            ValueError: The delta chain loops or is longer than MAX_DELTA_CHAIN
+        """
+        chain = []
+        seen = set()
+        current = digest
+        while current is not None:
+            if current in seen or len(chain) > MAX_DELTA_CHAIN:
+                raise ValueError(f"Broken delta chain for artifact {digest} at {current}")
+            seen.add(current)
+            blob = fetch_blob(current)
+            if blob is None:
+                raise KeyError(f"Artifact blob not found: {current}")
+            chain.append(blob)
+            current = blob.get('base_digest')
+
+        code = ''
+        for blob in reversed(chain):
+            data = decompress(blob['codec'], blob['data'])
+            if blob.get('base_digest'):
+                code = apply_delta(code, data)
+            else:
+                code = data.decode('utf-8')
+        return code
+
+    @staticmethod
+    def _blob(digest: str, codec: str, data: bytes, size: int,
+              base_digest: Optional[str], depth: int) -> Dict:
+        return {
+            'digest': digest,
+            'codec': codec,
+            'data': data,
+            'size': size,
+            'base_digest': base_digest,
+            'depth': depth
+        }
+
+    @staticmethod
+    def _remember(cache: OrderedDict, key, value, limit: int) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
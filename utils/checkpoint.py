@@ -0,0 +1,332 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from array import array
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from utils import metrics
+from utils.artifact_store import decompress
+
+LOOKUPS = metrics.counter('checkpoint_lookups_total', 'Stage checkpoint lookups by result', ['stage', 'result'])
+WRITTEN_BYTES = metrics.counter('checkpoint_written_bytes_total', 'Bytes of stage checkpoints written')
+
+DEFAULT_CHECKPOINT_DIR = Path("data/checkpoints")
+# Checkpoints not used for this long are removed when a store is opened
+CHECKPOINT_MAX_AGE = 7 * 24 * 3600
+
+MAGIC = b'FCKP'
+FORMAT_VERSION = 1
+# Checkpoints are written on the pipeline's path and are short-lived; favour speed over ratio
+COMPRESSION_LEVEL = 1
+# Float32 data hardly compresses; payloads mostly made of it are stored as is
+MAX_COMPRESSED_VECTOR_SHARE = 0.5
+
+# Value tags of the binary encoding
+_NONE, _TRUE, _FALSE, _INT, _BIGINT, _FLOAT, _STR, _BYTES, _LIST, _DICT, _VECTOR = b'NTFiIdsblmv'
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_U32 = struct.Struct('<I')
+_HEADER = struct.Struct('<4sBB')  # magic, version, codec name length
+
+# Values under keys like these are embeddings; their float lists are stored as raw float32
+_EMBEDDING_KEY = re.compile(r'embedding|vector', re.IGNORECASE)
+
+# Characters not kept when a run id becomes a file name
+_UNSAFE_NAME = re.compile(r'[^\w.-]')
+
+# Returned by load() when there is no usable checkpoint
+MISSING = object()
+
+
+def input_hash(value: Any) -> str:
+    """Stable digest of a JSON-like stage input."""
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _float32_bytes(values) -> Optional[bytes]:
+    """Raw little-endian float32 of a list of floats, or None if it is not one."""
+    if not values or not isinstance(values[0], float):
+        return None
+    try:
+        vector = array('f', values)
+    except TypeError:
+        return None
+    if sys.byteorder == 'big':
+        vector.byteswap()
+    return vector.tobytes()
+
+
+def _encode(value: Any, out: List[bytes], embedding: bool = False) -> None:
+    """Append the encoding of ``value``; ``embedding`` packs float lists as float32."""
+    if value is None:
+        out.append(bytes([_NONE]))
+    elif value is True:
+        out.append(bytes([_TRUE]))
+    elif value is False:
+        out.append(bytes([_FALSE]))
+    elif isinstance(value, int):
+        if -2 ** 63 <= value < 2 ** 63:
+            out.append(bytes([_INT]) + _I64.pack(value))
+        else:
+            digits = str(value).encode('ascii')
+            out.append(bytes([_BIGINT]) + _U32.pack(len(digits)) + digits)
+    elif isinstance(value, float):
+        out.append(bytes([_FLOAT]) + _F64.pack(value))
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out.append(bytes([_STR]) + _U32.pack(len(data)) + data)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(bytes([_BYTES]) + _U32.pack(len(value)) + bytes(value))
+    elif isinstance(value, dict):
+        out.append(bytes([_DICT]) + _U32.pack(len(value)))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out, embedding or (isinstance(key, str) and bool(_EMBEDDING_KEY.search(key))))
+    elif embedding and getattr(value, 'ndim', None) == 1 and getattr(value.dtype, 'kind', None) == 'f':
+        # numpy vector
+        out.append(bytes([_VECTOR]) + _U32.pack(len(value)) + value.astype('<f4').tobytes())
+    elif isinstance(value, (list, tuple)):
+        packed = _float32_bytes(value) if embedding else None
+        if packed is not None:
+            out.append(bytes([_VECTOR]) + _U32.pack(len(value)) + packed)
+            return
+        out.append(bytes([_LIST]) + _U32.pack(len(value)))
+        for item in value:
+            _encode(item, out, embedding)
+    elif hasattr(value, 'tolist'):
+        _encode(value.tolist(), out, embedding)
+    else:
+        raise TypeError(f"Cannot checkpoint a {type(value).__name__}")
+
+
+def _decode(data: memoryview, offset: int) -> Tuple[Any, int]:
+    """Decode the value at ``offset``; returns it and the offset after it."""
+    tag = data[offset]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT:
+        return _I64.unpack_from(data, offset)[0], offset + _I64.size
+    if tag == _FLOAT:
+        return _F64.unpack_from(data, offset)[0], offset + _F64.size
+
+    (length,) = _U32.unpack_from(data, offset)
+    offset += _U32.size
+    if tag == _STR:
+        return str(data[offset:offset + length], 'utf-8'), offset + length
+    if tag == _BYTES:
+        return bytes(data[offset:offset + length]), offset + length
+    if tag == _BIGINT:
+        return int(str(data[offset:offset + length], 'ascii')), offset + length
+    if tag == _VECTOR:
+        vector = array('f')
+        vector.frombytes(data[offset:offset + length * 4])
+        if sys.byteorder == 'big':
+            vector.byteswap()
+        return vector.tolist(), offset + length * 4
+    if tag == _LIST:
+        items = []
+        for _ in range(length):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == _DICT:
+        mapping = {}
+        for _ in range(length):
+            key, offset = _decode(data, offset)
+            mapping[key], offset = _decode(data, offset)
+        return mapping, offset
+    raise ValueError(f"Unknown checkpoint value tag {tag!r}")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a stage output in the checkpoint format.
+
+    JSON-like values (None, bool, int, float, str, bytes, list, tuple, dict)
+    are stored with type tags and length prefixes; tuples read back as
+    lists. Lists of floats under a key containing 'embedding' or 'vector'
+    are stored as raw little-endian float32, so they read back with float32
+    precision. The body is guarded by a CRC32 and compressed unless it is
+    mostly float32 data.
+    """
+    parts: List[bytes] = []
+    _encode(value, parts)
+    payload = b''.join(parts)
+    vector_bytes = sum(len(part) for part in parts if part[0] == _VECTOR)
+    if vector_bytes > MAX_COMPRESSED_VECTOR_SHARE * len(payload):
+        codec_name, body = b'none', payload
+    else:
+        codec_name, body = b'zlib', zlib.compress(payload, COMPRESSION_LEVEL)
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, len(codec_name)) + codec_name + _U32.pack(zlib.crc32(payload)) + body
+
+
+def loads(data: bytes) -> Any:
+    """Decode ``dumps`` output; raises ValueError if it is not intact."""
+    if len(data) < _HEADER.size:
+        raise ValueError("Checkpoint is truncated")
+    magic, version, codec_length = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} checkpoint")
+    offset = _HEADER.size
+    codec = data[offset:offset + codec_length].decode('ascii')
+    offset += codec_length
+    (checksum,) = _U32.unpack_from(data, offset)
+    try:
+        body = data[offset + _U32.size:]
+        payload = body if codec == 'none' else decompress(codec, body)
+    except Exception as e:
+        raise ValueError(f"Checkpoint body is corrupt: {str(e)}")
+    if zlib.crc32(payload) != checksum:
+        raise ValueError("Checkpoint checksum mismatch")
+    value, _ = _decode(memoryview(payload), 0)
+    return value
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temporary file, so a crash never leaves a partial file at ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class CheckpointStore:
+    """
+    Stage outputs on local disk, for resuming pipeline runs.
+
+    Outputs are stored under a key chained from the stage name and its
+    input: the requirements hash for the first stage, the previous stage's
+    key after that. Stages keyed without a run id are shared, so runs with
+    identical requirements reuse each other's outputs; stages keyed with
+    one are private to that run. Each run id also has a manifest of the
+    stages it completed and whether they were resumed.
+    """
+
+    def __init__(self, root: Path = DEFAULT_CHECKPOINT_DIR, max_age: Optional[float] = CHECKPOINT_MAX_AGE):
+        """
+        Args:
+            root: Directory holding the checkpoints and run manifests
+            max_age: Seconds after which unused checkpoints are pruned on
+                open; None keeps them indefinitely
+        """
+        self.logger = logging.getLogger(__name__)
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.runs_dir = self.root / 'runs'
+        self._lock = threading.Lock()
+        if max_age is not None:
+            self.prune(max_age)
+
+    def stage_key(self, stage: str, upstream: str, run_id: Optional[str] = None) -> str:
+        """Key of ``stage`` given its upstream key or input hash, private to ``run_id`` if given."""
+        scope = f"run:{run_id}" if run_id is not None else 'shared'
+        return hashlib.sha256(f"{stage}|{upstream}|{scope}".encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Any:
+        """The checkpointed value for ``key``, or MISSING."""
+        path = self._object_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return MISSING
+        try:
+            value = loads(data)
+        except ValueError as e:
+            self.logger.warning(f"Ignoring unreadable checkpoint {path.name}: {str(e)}")
+            return MISSING
+        # Mark as used, for pruning
+        os.utime(path)
+        return value
+
+    def save(self, key: str, value: Any) -> int:
+        """Checkpoint ``value`` under ``key``; returns the bytes written."""
+        data = dumps(value)
+        _write_atomic(self._object_path(key), data)
+        WRITTEN_BYTES.inc(len(data))
+        return len(data)
+
+    def run_stage(self, stage: str, key: str, func: Callable, *args, run_id: Optional[str] = None) -> Tuple[Any, bool]:
+        """
+        Load ``stage``'s output from its checkpoint, or compute and checkpoint it.
+
+        Args:
+            stage: Stage name, for metrics and the run manifest
+            key: The stage's key from stage_key
+            func: Computes the output from ``args`` on a miss
+            run_id: Run whose manifest records the stage
+
+        Returns:
+            The output, and whether it came from a checkpoint
+        """
+        value = self.load(key)
+        resumed = value is not MISSING
+        LOOKUPS.labels(stage=stage, result='hit' if resumed else 'miss').inc()
+        if not resumed:
+            value = func(*args)
+            try:
+                self.save(key, value)
+            except (OSError, TypeError) as e:
+                # The run goes on; it just cannot be resumed from here
+                self.logger.warning(f"Could not checkpoint stage {stage}: {str(e)}")
+        if run_id is not None:
+            self._record(run_id, stage, key, resumed)
+        return value, resumed
+
+    def run(self, run_id: str) -> Optional[Dict]:
+        """The manifest of ``run_id``: completed stages with their keys, or None."""
+        try:
+            return json.loads(self._run_path(run_id).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def prune(self, max_age: float) -> int:
+        """Remove checkpoints and manifests unused for ``max_age`` seconds; returns how many."""
+        cutoff = time.time() - max_age
+        removed = 0
+        for directory in (self.objects_dir, self.runs_dir):
+            if not directory.exists():
+                continue
+            for path in directory.rglob('*'):
+                try:
+                    if path.is_file() and path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def _record(self, run_id: str, stage: str, key: str, resumed: bool) -> None:
+        with self._lock:
+            manifest = self.run(run_id) or {'run_id': run_id, 'stages': {}}
+            manifest['stages'][stage] = {
+                'key': key,
+                'resumed': resumed,
+                'completed_at': datetime.now().isoformat()
+            }
+            _write_atomic(self._run_path(run_id), json.dumps(manifest, indent=2).encode('utf-8'))
+
+    def _object_path(self, key: str) -> Path:
+        return self.objects_dir / key[:2] / f"{key}.ckpt"
+
+    def _run_path(self, run_id: str) -> Path:
+        return self.runs_dir / (_UNSAFE_NAME.sub('_', run_id) + '.json')
@@ -0,0 +1,132 @@
+from typing import List, NamedTuple, Sequence
+import ast
+
+
+class CodeChunk(NamedTuple):
+    """A piece of source text and the code it covers."""
+
+    content: str
+    symbol: str          # Qualified name, e.g. 'ErrorRecoveryManager.handle_error'
+    kind: str            # 'module', 'class', 'function', 'method' or 'text'
+    start_line: int      # 1-based, inclusive
+    end_line: int
+
+    @property
+    def metadata(self) -> dict:
+        return {
+            'symbol': self.symbol,
+            'kind': self.kind,
+            'start_line': self.start_line,
+            'end_line': self.end_line
+        }
+
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+class CodeSplitter:
+    """Splits Python source at module, class and function boundaries.
+
+    Each top-level function and class becomes one chunk, with its decorators
+    and the comment lines directly above it. Runs of other top-level
+    statements (imports, constants) are packed together. A class larger than
+    ``max_chunk_size`` is split into its header and one chunk per method; any
+    other oversized node, and source that does not parse, falls back to
+    packing whole lines into chunks of at most ``max_chunk_size``
+    characters. Chunks never overlap.
+    """
+
+    def __init__(self, max_chunk_size: int = 1000):
+        self.max_chunk_size = max_chunk_size
+
+    def split(self, text: str) -> List[CodeChunk]:
+        """Chunks of ``text`` in source order, with symbol and line metadata."""
+        lines = text.splitlines(keepends=True)
+        try:
+            tree = ast.parse(text)
+        except SyntaxError:
+            return self._split_lines(lines, 1, len(lines), '', 'text')
+
+        chunks: List[CodeChunk] = []
+        covered = 0  # Last line already assigned to a chunk
+        for node in tree.body:
+            if isinstance(node, _DEFINITIONS):
+                start = self._start_line(node, lines)
+                if start > covered + 1:
+                    chunks.extend(self._split_lines(lines, covered + 1, start - 1, '', 'module'))
+                chunks.extend(self._split_definition(node, lines, start, ''))
+                covered = node.end_lineno
+        if covered < len(lines):
+            chunks.extend(self._split_lines(lines, covered + 1, len(lines), '', 'module'))
+        return [chunk for chunk in chunks if chunk.content.strip()]
+
+    def split_text(self, text: str) -> List[str]:
+        """Chunk contents only, matching the text splitter interface."""
+        return [chunk.content for chunk in self.split(text)]
+
+    def _split_definition(self, node: ast.AST, lines: Sequence[str], start: int, prefix: str) -> List[CodeChunk]:
+        symbol = prefix + node.name
+        if isinstance(node, ast.ClassDef):
+            kind = 'class'
+        else:
+            kind = 'method' if prefix else 'function'
+
+        content = ''.join(lines[start - 1:node.end_lineno])
+        if len(content) <= self.max_chunk_size:
+            return [CodeChunk(content, symbol, kind, start, node.end_lineno)]
+        if not isinstance(node, ast.ClassDef):
+            return self._split_lines(lines, start, node.end_lineno, symbol, kind)
+
+        # Class header (signature, docstring, attributes) and one chunk per method
+        chunks: List[CodeChunk] = []
+        header_start = start
+        for child in node.body:
+            if isinstance(child, _DEFINITIONS):
+                child_start = self._start_line(child, lines)
+                if child_start > header_start:
+                    chunks.extend(self._split_lines(lines, header_start, child_start - 1, symbol, 'class'))
+                chunks.extend(self._split_definition(child, lines, child_start, symbol + '.'))
+                header_start = child.end_lineno + 1
+        if header_start <= node.end_lineno:
+            chunks.extend(self._split_lines(lines, header_start, node.end_lineno, symbol, 'class'))
+        return chunks
+
+    @staticmethod
+    def _start_line(node: ast.AST, lines: Sequence[str]) -> int:
+        """First line of a definition, including decorators and comments right above it."""
+        start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+        while start > 1 and lines[start - 2].lstrip().startswith('#'):
+            start -= 1
+        return start
+
+    def _split_lines(
+        self,
+        lines: Sequence[str],
+        start: int,
+        end: int,
+        symbol: str,
+        kind: str
+    ) -> List[CodeChunk]:
+        """Pack lines ``start``..``end`` into chunks of at most max_chunk_size characters."""
+        chunks: List[CodeChunk] = []
+        current: List[str] = []
+        current_start = start
+        size = 0
+        for line_number in range(start, end + 1):
+            line = lines[line_number - 1]
+            if current and size + len(line) > self.max_chunk_size:
+                chunks.append(CodeChunk(''.join(current), symbol, kind, current_start, line_number - 1))
+                current, current_start, size = [], line_number, 0
+            if len(line) > self.max_chunk_size:
+                # A single overlong line is cut at the size limit
+                for offset in range(0, len(line), self.max_chunk_size):
+                    chunks.append(CodeChunk(
+                        line[offset:offset + self.max_chunk_size], symbol, kind, line_number, line_number
+                    ))
+                current_start = line_number + 1
+                continue
+            current.append(line)
+            size += len(line)
+        if current:
+            chunks.append(CodeChunk(''.join(current), symbol, kind, current_start, end))
+        return chunks
@@ -1,33 +1,67 @@
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 import logging
+import threading
+import uuid
+from cassandra import InvalidRequest
 from cassandra.cluster import Cluster
 from cassandra.auth import PlainTextAuthProvider
-from config.settings import ASTRA_DB_CONFIG
+from cassandra.query import BatchStatement, BatchType, SimpleStatement
+from cassandra.util import uuid_from_time
+from config import settings
+from utils import metrics
+from utils.artifact_store import ArtifactStore
+from utils.resilience import Dependency, dependency
+
+# How far back get_recent_events walks daily partitions by default
+RECENT_EVENTS_LOOKBACK_DAYS = 7
+
+OPERATION_SECONDS = metrics.histogram('astra_db_operation_seconds', 'Duration of AstraDBManager calls', ['operation'])
+ASYNC_WRITES = metrics.counter('astra_db_async_writes_total', 'Completed asynchronous writes by outcome', ['result'])
+WRITES_IN_FLIGHT = metrics.gauge('astra_db_writes_in_flight', 'Asynchronous writes awaiting a response')
 
 class AstraDBManager:
     """Manages interactions with AstraDB for storing task progress and errors."""
     
-    def __init__(self):
+    def __init__(self, session=None, max_in_flight: Optional[int] = None, resilience: Optional[Dependency] = None):
+        """
+        Args:
+            session: Existing Cassandra session to use instead of connecting
+            max_in_flight: Upper bound on concurrent asynchronous writes
+            resilience: Deadlines, retries, hedging and circuit breaker for
+                queries; defaults to the shared 'cassandra' dependency
+        """
         self.logger = logging.getLogger(__name__)
-        self._connect()
+        self.resilience = resilience or dependency('cassandra')
+        self._in_flight_limit = max_in_flight or settings.ASTRA_DB_CONFIG['max_in_flight']
+        self._in_flight = threading.BoundedSemaphore(self._in_flight_limit)
+        self.artifact_store = ArtifactStore()
+        
+        if session is None:
+            self._connect()
+        else:
+            self.session = session
         self._create_tables()
+        self._prepare_statements()
 
     def _connect(self):
         """Establish connection to AstraDB."""
         try:
+            db_config = settings.ASTRA_DB_CONFIG
             auth_provider = PlainTextAuthProvider(
-                ASTRA_DB_CONFIG['client_id'],
-                ASTRA_DB_CONFIG['client_secret']
+                db_config['client_id'],
+                db_config['client_secret']
             )
             
             self.cluster = Cluster(
                 cloud={
-                    'secure_connect_bundle': ASTRA_DB_CONFIG['secure_connect_bundle']
+                    'secure_connect_bundle': db_config['secure_connect_bundle']
                 },
                 auth_provider=auth_provider
             )
             
-            self.session = self.cluster.connect(ASTRA_DB_CONFIG['keyspace'])
+            self.session = self.cluster.connect(db_config['keyspace'])
             self.logger.info("Successfully connected to AstraDB")
             
         except Exception as e:
@@ -37,26 +71,56 @@ class AstraDBManager:
     def _create_tables(self):
         """Create necessary tables if they don't exist."""
         try:
-            # Task history table
+            # Task events, one partition per task, newest first
             self.session.execute("""
-                CREATE TABLE IF NOT EXISTS task_history (
-                    task_id uuid PRIMARY KEY,
-                    timestamp timestamp,
+                CREATE TABLE IF NOT EXISTS task_events_by_task (
+                    task_id uuid,
+                    event_time timestamp,
+                    event_id timeuuid,
                     action text,
                     framework text,
                     type text,
-                    errors list<text>
-                )
+                    errors list<text>,
+                    PRIMARY KEY ((task_id), event_time, event_id)
+                ) WITH CLUSTERING ORDER BY (event_time DESC, event_id DESC)
+            """)
+            
+            # Task events across all tasks, one partition per day
+            self.session.execute("""
+                CREATE TABLE IF NOT EXISTS task_events_by_day (
+                    day date,
+                    event_time timestamp,
+                    event_id timeuuid,
+                    task_id uuid,
+                    action text,
+                    framework text,
+                    type text,
+                    errors list<text>,
+                    PRIMARY KEY ((day), event_time, event_id)
+                ) WITH CLUSTERING ORDER BY (event_time DESC, event_id DESC)
             """)
             
-            # Code artifacts table
+            # Code artifacts, one partition per task, newest first
             self.session.execute("""
-                CREATE TABLE IF NOT EXISTS code_artifacts (
-                    artifact_id uuid PRIMARY KEY,
+                CREATE TABLE IF NOT EXISTS code_artifacts_by_task (
                     task_id uuid,
-                    code text,
+                    created_at timestamp,
+                    artifact_id timeuuid,
+                    code_digest text,
                     validation_status boolean,
-                    created_at timestamp
+                    PRIMARY KEY ((task_id), created_at, artifact_id)
+                ) WITH CLUSTERING ORDER BY (created_at DESC, artifact_id DESC)
+            """)
+            
+            # Compressed code, keyed by content digest
+            self.session.execute("""
+                CREATE TABLE IF NOT EXISTS code_blobs (
+                    digest text PRIMARY KEY,
+                    codec text,
+                    base_digest text,
+                    depth int,
+                    data blob,
+                    size int
                 )
             """)
             
@@ -64,43 +128,531 @@ class AstraDBManager:
             self.logger.error(f"Failed to create tables: {str(e)}")
             raise
 
+    def _prepare_statements(self):
+        """Prepare statements once so requests skip query parsing."""
+        try:
+            self.statements = {
+                'task_event_by_task': self.session.prepare("""
+                    INSERT INTO task_events_by_task (
+                        task_id, event_time, event_id, action, framework, type, errors
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """),
+                'task_event_by_day': self.session.prepare("""
+                    INSERT INTO task_events_by_day (
+                        day, event_time, event_id, task_id, action, framework, type, errors
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """),
+                'code_artifact': self.session.prepare("""
+                    INSERT INTO code_artifacts_by_task (
+                        task_id, created_at, artifact_id, code_digest, validation_status
+                    ) VALUES (?, ?, ?, ?, ?)
+                """),
+                # First writer wins, so processes never rewrite a blob as a delta of another
+                'code_blob': self.session.prepare("""
+                    INSERT INTO code_blobs (
+                        digest, codec, base_digest, depth, data, size
+                    ) VALUES (?, ?, ?, ?, ?, ?) IF NOT EXISTS
+                """),
+                'select_code_blob': self.session.prepare("""
+                    SELECT * FROM code_blobs WHERE digest = ?
+                """),
+                'select_task_events': self.session.prepare("""
+                    SELECT * FROM task_events_by_task
+                    WHERE task_id = ? LIMIT ?
+                """),
+                'select_task_events_before': self.session.prepare("""
+                    SELECT * FROM task_events_by_task
+                    WHERE task_id = ? AND (event_time, event_id) < (?, ?) LIMIT ?
+                """),
+                'select_day_events': self.session.prepare("""
+                    SELECT * FROM task_events_by_day
+                    WHERE day = ? LIMIT ?
+                """),
+                'select_day_events_before': self.session.prepare("""
+                    SELECT * FROM task_events_by_day
+                    WHERE day = ? AND (event_time, event_id) < (?, ?) LIMIT ?
+                """),
+                'select_task_artifacts': self.session.prepare("""
+                    SELECT * FROM code_artifacts_by_task
+                    WHERE task_id = ? LIMIT ?
+                """),
+                'select_task_artifacts_before': self.session.prepare("""
+                    SELECT * FROM code_artifacts_by_task
+                    WHERE task_id = ? AND (created_at, artifact_id) < (?, ?) LIMIT ?
+                """)
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to prepare statements: {str(e)}")
+            raise
+
+    @OPERATION_SECONDS.labels(operation='save_task_history').time()
     def save_task_history(self, task_data: Dict) -> None:
-        """Save task history entry."""
+        """
+        Save task history entry.
+        
+        Args:
+            task_data: Event with 'task_id', 'timestamp' and 'action', and
+                optionally 'framework', 'type' and 'errors'
+        """
         try:
-            query = """
-                INSERT INTO task_history (
-                    task_id, timestamp, action, framework, type, errors
-                ) VALUES (uuid(), ?, ?, ?, ?, ?)
-            """
-            self.session.execute(
-                query,
-                (
-                    task_data['timestamp'],
-                    task_data['action'],
-                    task_data.get('framework'),
-                    task_data.get('type'),
-                    task_data.get('errors', [])
-                )
-            )
+            # Retried within the policy deadline; the async variants are for not waiting
+            for name, params in self._task_history_rows(task_data):
+                self._execute(self.statements[name], params, write=True)
         except Exception as e:
             self.logger.error(f"Failed to save task history: {str(e)}")
             raise
 
+    @OPERATION_SECONDS.labels(operation='save_code_artifact').time()
     def save_code_artifact(self, code_data: Dict) -> None:
-        """Save generated code artifact."""
+        """
+        Save generated code artifact.
+        
+        Args:
+            code_data: Artifact with 'task_id', 'code' and 'validation_status'
+        """
         try:
-            query = """
-                INSERT INTO code_artifacts (
-                    artifact_id, task_id, code, validation_status, created_at
-                ) VALUES (uuid(), uuid(), ?, ?, toTimestamp(now()))
-            """
-            self.session.execute(
-                query,
-                (
-                    code_data['code'],
-                    code_data['validation_status']
-                )
-            )
+            # The blob row comes first, so it is confirmed before anything refers to it
+            for name, params in self._code_artifact_rows(code_data):
+                try:
+                    rows = self._execute(self.statements[name], params, write=True)
+                except Exception:
+                    if name == 'code_blob':
+                        self.artifact_store.forget(params[0])
+                    raise
+                if name == 'code_blob':
+                    self._confirm_blobs(rows, [params[0]])
         except Exception as e:
             self.logger.error(f"Failed to save code artifact: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    def save_task_history_async(self, task_data: Dict) -> List:
+        """Save task history entry without waiting for the writes to complete."""
+        return [
+            self.execute_async(self.statements[name], params)
+            for name, params in self._task_history_rows(task_data)
+        ]
+
+    def save_code_artifact_async(self, code_data: Dict) -> List:
+        """Save generated code artifact without waiting for the write to complete."""
+        futures = []
+        for name, params in self._code_artifact_rows(code_data):
+            future = self.execute_async(self.statements[name], params)
+            if name == 'code_blob':
+                self._track_blob_write(future, [params[0]])
+            futures.append(future)
+        return futures
+
+    @OPERATION_SECONDS.labels(operation='get_task_history').time()
+    def get_task_history(self, task_id, page_size: int = 50, before: Optional[Tuple] = None) -> Dict:
+        """
+        Fetch one task's events, newest first.
+        
+        Args:
+            task_id: Task whose events to return
+            page_size: Maximum number of events per page
+            before: 'next_page' cursor from the previous page
+            
+        Returns:
+            Dict with 'events' and the 'next_page' cursor (None on the last page)
+        """
+        task_id = _as_uuid(task_id)
+        if before is None:
+            rows = self._execute(
+                self.statements['select_task_events'], (task_id, page_size)
+            )
+        else:
+            rows = self._execute(
+                self.statements['select_task_events_before'], (task_id, *before, page_size)
+            )
+        return _page([_row_to_dict(row) for row in rows], page_size, 'event_time', 'event_id')
+
+    @OPERATION_SECONDS.labels(operation='get_recent_events').time()
+    def get_recent_events(
+        self,
+        page_size: int = 50,
+        before: Optional[Tuple] = None,
+        since: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Fetch events across all tasks, newest first.
+        
+        Walks the daily partitions backwards from the cursor (or today) and
+        stops once the page is full or ``since`` is reached.
+        
+        Args:
+            page_size: Maximum number of events per page
+            before: 'next_page' cursor from the previous page
+            since: Oldest event time to include; defaults to seven days ago,
+                counted from now rather than from the cursor
+            
+        Returns:
+            Dict with 'events' and the 'next_page' cursor (None on the last page)
+        """
+        upper = before[0] if before else datetime.utcnow()
+        if since is None:
+            since = datetime.utcnow() - timedelta(days=RECENT_EVENTS_LOOKBACK_DAYS)
+        else:
+            since = _as_datetime(since)
+        
+        events: List[Dict] = []
+        day = upper.date()
+        while day >= since.date() and len(events) < page_size:
+            remaining = page_size - len(events)
+            if before is not None and day == before[0].date():
+                rows = self._execute(
+                    self.statements['select_day_events_before'], (day, *before, remaining)
+                )
+            else:
+                rows = self._execute(
+                    self.statements['select_day_events'], (day, remaining)
+                )
+            for row in rows:
+                event = _row_to_dict(row)
+                if event['event_time'] < since:
+                    return {'events': events, 'next_page': None}
+                events.append(event)
+            day -= timedelta(days=1)
+        
+        if len(events) < page_size:
+            return {'events': events, 'next_page': None}
+        return _page(events, page_size, 'event_time', 'event_id')
+
+    @OPERATION_SECONDS.labels(operation='get_task_artifacts').time()
+    def get_task_artifacts(
+        self,
+        task_id,
+        page_size: int = 20,
+        before: Optional[Tuple] = None,
+        include_code: bool = True
+    ) -> Dict:
+        """
+        Fetch one task's code artifacts, newest first.
+        
+        Args:
+            task_id: Task whose artifacts to return
+            page_size: Maximum number of artifacts per page
+            before: 'next_page' cursor from the previous page
+            include_code: Resolve each artifact's code from the blob store
+            
+        Returns:
+            Dict with 'artifacts' and the 'next_page' cursor (None on the last page)
+        """
+        task_id = _as_uuid(task_id)
+        if before is None:
+            rows = self._execute(
+                self.statements['select_task_artifacts'], (task_id, page_size)
+            )
+        else:
+            rows = self._execute(
+                self.statements['select_task_artifacts_before'], (task_id, *before, page_size)
+            )
+        page = _page([_row_to_dict(row) for row in rows], page_size, 'created_at', 'artifact_id')
+        if include_code:
+            for artifact in page['events']:
+                artifact['code'] = self.load_code(artifact['code_digest'])
+        return {'artifacts': page['events'], 'next_page': page['next_page']}
+
+    @OPERATION_SECONDS.labels(operation='load_code').time()
+    def load_code(self, digest: str) -> str:
+        """Read the code stored under a content digest, applying any deltas."""
+        return self.artifact_store.decode(digest, self._fetch_blob)
+
+    def _fetch_blob(self, digest: str) -> Optional[Dict]:
+        rows = list(self._execute(self.statements['select_code_blob'], (digest,)))
+        return _row_to_dict(rows[0]) if rows else None
+
+    def migrate_legacy_tables(self, page_size: int = 500) -> Dict[str, int]:
+        """
+        Copy rows from the original ``task_history`` and ``code_artifacts``
+        tables into the partitioned tables.
+        
+        Legacy artifacts keep the random task id they were stored with, since
+        the original task cannot be recovered. Migrated ids are derived from
+        the legacy rows, so running the migration again is a no-op. The legacy
+        tables are left in place so they can be dropped once the copy has
+        been verified.
+        
+        Returns:
+            Number of migrated rows per legacy table
+        """
+        counts = {'task_history': 0, 'code_artifacts': 0}
+        with self.buffered_writer() as writer:
+            for row in self._scan_legacy_table('task_history', page_size):
+                row['event_id'] = _legacy_timeuuid(row['timestamp'], row['task_id'])
+                writer.save_task_history(row)
+                counts['task_history'] += 1
+            for row in self._scan_legacy_table('code_artifacts', page_size):
+                row['artifact_id'] = _legacy_timeuuid(row['created_at'], row['artifact_id'])
+                writer.save_code_artifact(row)
+                counts['code_artifacts'] += 1
+        
+        self.logger.info(f"Migrated legacy tables: {counts}")
+        return counts
+
+    def _scan_legacy_table(self, table: str, page_size: int):
+        """Page through a legacy table; yields nothing if it does not exist."""
+        try:
+            rows = self.session.execute(
+                SimpleStatement(f"SELECT * FROM {table}", fetch_size=page_size)
+            )
+        except InvalidRequest:
+            self.logger.info(f"Legacy table {table} not found, skipping")
+            return
+        for row in rows:
+            yield _row_to_dict(row)
+
+    def _execute(self, statement, params: Optional[Tuple] = None, write: bool = False):
+        """
+        Execute a statement under the 'cassandra' resilience policy.
+        
+        Every statement issued this way is a SELECT or an INSERT, which
+        Cassandra applies as an upsert (or, with IF NOT EXISTS, at most
+        once), so all of them may be retried. Only reads are hedged: a
+        slow write is not sent a second time.
+        
+        Args:
+            statement: Prepared statement or query
+            params: Bind values
+            write: Whether the statement is an INSERT
+        """
+        return self.resilience.call(
+            self.session.execute, statement, params, idempotent=True, hedge=not write
+        )
+
+    def execute_async(self, statement, params: Optional[Tuple] = None):
+        """
+        Execute a statement asynchronously, blocking only while the number
+        of in-flight requests is at its limit. Outcomes count towards the
+        'cassandra' circuit breaker.
+        
+        Returns:
+            The driver's ResponseFuture for the request
+
+        Raises:
+            CircuitOpenError: The breaker is open; nothing was sent
+        """
+        self.resilience.breaker.allow()
+        self._in_flight.acquire()
+        try:
+            future = self.session.execute_async(statement, params)
+        except BaseException:
+            self._in_flight.release()
+            self.resilience.breaker.record_failure()
+            raise
+        WRITES_IN_FLIGHT.inc()
+        future.add_callbacks(self._on_write_done, self._on_write_failed)
+        return future
+
+    def wait_for_writes(self) -> None:
+        """Block until all in-flight asynchronous writes have completed."""
+        for _ in range(self._in_flight_limit):
+            self._in_flight.acquire()
+        for _ in range(self._in_flight_limit):
+            self._in_flight.release()
+
+    def buffered_writer(self, batch_size: int = 50, flush_interval: float = 1.0) -> 'BufferedWriter':
+        """Create a writer that groups inserts into per-partition batches."""
+        return BufferedWriter(self, batch_size=batch_size, flush_interval=flush_interval)
+
+    def _track_blob_write(self, future, digests: List[str]) -> None:
+        """Confirm the blobs in a write once it succeeds; have them stored again if it fails."""
+        def forget(_error) -> None:
+            for digest in digests:
+                self.artifact_store.forget(digest)
+
+        future.add_callbacks(lambda rows: self._confirm_blobs(rows, digests), forget)
+
+    def _confirm_blobs(self, rows, digests: List[str]) -> None:
+        """
+        Confirm written blobs with the artifact store.
+
+        A conditional insert that did not apply returns the stored row, whose
+        depth replaces the one encoded locally.
+        """
+        stored_depths = {}
+        for row in rows or []:
+            row = _row_to_dict(row)
+            if row.get('[applied]') is False and 'digest' in row:
+                stored_depths[row['digest']] = row.get('depth')
+        for digest in digests:
+            self.artifact_store.confirm(digest, stored_depths.get(digest))
+
+    def _on_write_done(self, _result) -> None:
+        self._in_flight.release()
+        WRITES_IN_FLIGHT.dec()
+        self.resilience.breaker.record_success()
+        ASYNC_WRITES.labels(result='success').inc()
+
+    def _on_write_failed(self, error: Exception) -> None:
+        self._in_flight.release()
+        WRITES_IN_FLIGHT.dec()
+        self.resilience.breaker.record_failure()
+        ASYNC_WRITES.labels(result='error').inc()
+        self.logger.error(f"Asynchronous write failed: {str(error)}")
+
+    def _task_history_rows(self, task_data: Dict) -> List[Tuple[str, Tuple]]:
+        """Statement names and bind values for one event; partition keys come first."""
+        task_id = _as_uuid(task_data['task_id'])
+        event_time = _as_datetime(task_data.get('timestamp'))
+        event_id = task_data.get('event_id') or uuid_from_time(event_time)
+        values = (
+            task_data['action'],
+            task_data.get('framework'),
+            task_data.get('type'),
+            task_data.get('errors') or []
+        )
+        return [
+            ('task_event_by_task', (task_id, event_time, event_id, *values)),
+            ('task_event_by_day', (event_time.date(), event_time, event_id, task_id, *values))
+        ]
+
+    def _code_artifact_rows(self, code_data: Dict) -> List[Tuple[str, Tuple]]:
+        """Statement names and bind values for one artifact; partition keys come first.
+        
+        The code blob is only included the first time its content is seen.
+        """
+        task_id = _as_uuid(code_data['task_id'])
+        created_at = _as_datetime(code_data.get('created_at'))
+        artifact_id = code_data.get('artifact_id') or uuid_from_time(created_at)
+        digest, blob = self.artifact_store.encode(task_id, code_data['code'])
+        
+        rows = []
+        if blob is not None:
+            rows.append((
+                'code_blob',
+                (
+                    blob['digest'],
+                    blob['codec'],
+                    blob['base_digest'],
+                    blob['depth'],
+                    blob['data'],
+                    blob['size']
+                )
+            ))
+        rows.append((
+            'code_artifact',
+            (task_id, created_at, artifact_id, digest, code_data['validation_status'])
+        ))
+        return rows
+
+class BufferedWriter:
+    """Buffers inserts and flushes them as unlogged batches grouped by partition.
+    
+    A flush happens when ``batch_size`` rows are pending, every
+    ``flush_interval`` seconds from a background thread, and on ``close``.
+    Batches never span partitions, so each one is applied by a single replica
+    set without coordinator fan-out.
+    """
+    
+    def __init__(self, db_manager: AstraDBManager, batch_size: int = 50, flush_interval: float = 1.0):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Any, List[Tuple]] = defaultdict(list)
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def save_task_history(self, task_data: Dict) -> None:
+        """Queue a task history entry."""
+        for name, params in self.db_manager._task_history_rows(task_data):
+            self._add(name, params)
+
+    def save_code_artifact(self, code_data: Dict) -> None:
+        """Queue a code artifact."""
+        for name, params in self.db_manager._code_artifact_rows(code_data):
+            self._add(name, params)
+
+    def flush(self) -> List:
+        """
+        Send all pending rows.
+        
+        Returns:
+            ResponseFutures for the batches that were sent
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = defaultdict(list)
+            self._pending_count = 0
+        
+        futures = []
+        for (statement_name, _partition), rows in pending.items():
+            statement = self.db_manager.statements[statement_name]
+            for start in range(0, len(rows), self.batch_size):
+                batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+                for params in rows[start:start + self.batch_size]:
+                    batch.add(statement, params)
+                future = self.db_manager.execute_async(batch)
+                if statement_name == 'code_blob':
+                    self.db_manager._track_blob_write(
+                        future, [params[0] for params in rows[start:start + self.batch_size]]
+                    )
+                futures.append(future)
+        return futures
+
+    def close(self) -> None:
+        """Stop the background flusher, flush pending rows and wait for them."""
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self.db_manager.wait_for_writes()
+
+    def __enter__(self) -> 'BufferedWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _add(self, statement_name: str, params: Tuple) -> None:
+        with self._lock:
+            self._pending[(statement_name, params[0])].append(params)
+            self._pending_count += 1
+            full = self._pending_count >= self.batch_size
+        if full:
+            self.flush()
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.db_manager.logger.error(f"Buffered flush failed: {str(e)}")
+
+
+def _as_uuid(value) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _as_datetime(value) -> datetime:
+    """Normalize a timestamp to the naive UTC datetimes the driver returns."""
+    if value is None:
+        return datetime.utcnow()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _legacy_timeuuid(timestamp, legacy_id) -> uuid.UUID:
+    """Deterministic timeuuid for a migrated row."""
+    legacy_id = _as_uuid(legacy_id)
+    return uuid_from_time(
+        _as_datetime(timestamp),
+        node=legacy_id.int & 0xFFFFFFFFFFFF,
+        clock_seq=(legacy_id.int >> 48) & 0x3FFF
+    )
+
+
+def _row_to_dict(row) -> Dict:
+    return dict(row._asdict()) if hasattr(row, '_asdict') else dict(row)
+
+
+def _page(rows: List[Dict], page_size: int, time_key: str, id_key: str) -> Dict:
+    """Wrap rows in a page with a keyset cursor pointing past the last row."""
+    next_page = None
+    if rows and len(rows) >= page_size:
+        next_page = (rows[-1][time_key], rows[-1][id_key])
+    return {'events': rows, 'next_page': next_page}
@@ -0,0 +1,278 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+from utils import metrics
+from utils.sandbox import get_scheduler
+
+INDEX_BUILDS = metrics.counter('dependency_index_builds_total', 'Distribution indexes built', ['environment'])
+INDEX_BUILD_SECONDS = metrics.histogram('dependency_index_build_seconds', 'Time to build a distribution index')
+
+# Requirement checks kept per index; generated packages reuse a handful of requirements
+CHECK_CACHE_SIZE = 256
+
+
+def describe_environment(paths: Optional[List[str]] = None) -> Dict:
+    """
+    Installed distributions and marker values of the running interpreter.
+
+    Uses only the standard library: environments without this package
+    run its source as a script (see describe_script).
+
+    Args:
+        paths: Directories to look for distributions in; defaults to sys.path
+    """
+    distributions = {}
+    found = metadata.distributions(path=paths) if paths is not None else metadata.distributions()
+    for dist in found:
+        # Parsed once per distribution; dist.version and dist.requires would each parse it again
+        meta = dist.metadata
+        name = meta['Name']
+        # The first distribution on the path wins, as for imports
+        if name and name not in distributions:
+            requires = meta.get_all('Requires-Dist') or dist.requires or []
+            distributions[name] = {'version': meta['Version'], 'requires': requires}
+    markers = {
+        'os_name': os.name,
+        'sys_platform': sys.platform,
+        'platform_machine': platform.machine(),
+        'platform_system': platform.system(),
+        'platform_release': platform.release(),
+        'python_version': '.'.join(platform.python_version_tuple()[:2]),
+        'python_full_version': platform.python_version(),
+        'implementation_name': sys.implementation.name,
+        'platform_python_implementation': platform.python_implementation()
+    }
+    return {'distributions': distributions, 'markers': markers}
+
+
+@lru_cache(maxsize=1)
+def describe_script() -> str:
+    """describe_environment as a standalone script printing its result as JSON."""
+    import inspect
+    return (
+        "from typing import Dict, List, Optional\n"
+        "from importlib import metadata\n"
+        "import json, os, platform, sys\n"
+        + inspect.getsource(describe_environment)
+        + "print(json.dumps(describe_environment()))\n"
+    )
+
+
+def _parse_description(output: str) -> Dict:
+    """The JSON line describe_script() prints, ignoring anything else in the output."""
+    for line in reversed(output.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"No distribution listing in output: {output[-500:]}")
+
+
+def _listing_digest(paths: Iterable[str]) -> str:
+    """
+    Digest of the distribution metadata directories on ``paths``.
+
+    Installing, removing or upgrading a distribution renames or touches its
+    .dist-info/.egg-info directory, so this changes whenever the index would,
+    without reading any metadata.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        digest.update(path.encode())
+        for entry in entries:
+            if entry.name.endswith(('.dist-info', '.egg-info')):
+                digest.update(f"{entry.name}:{entry.stat().st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+class LocalEnvironment:
+    """The interpreter this process runs in, or distributions on other paths."""
+
+    kind = 'local'
+
+    def __init__(self, paths: Optional[List[str]] = None):
+        self.paths = paths
+
+    def digest(self) -> str:
+        return _listing_digest(self.paths if self.paths is not None else sys.path)
+
+    def describe(self) -> Dict:
+        return describe_environment(self.paths)
+
+
+class VenvEnvironment:
+    """A virtual environment, inspected with its own interpreter."""
+
+    kind = 'venv'
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        scripts = self.path / ('Scripts' if os.name == 'nt' else 'bin')
+        self.python = scripts / ('python.exe' if os.name == 'nt' else 'python')
+
+    def site_packages(self) -> List[str]:
+        return [str(path) for path in sorted(self.path.glob('lib/python*/site-packages'))] + \
+            [str(path) for path in self.path.glob('Lib/site-packages')]
+
+    def digest(self) -> str:
+        return _listing_digest(self.site_packages())
+
+    def describe(self) -> Dict:
+        process = subprocess.run(
+            [str(self.python), '-c', describe_script()],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return _parse_description(process.stdout)
+
+
+class ImageEnvironment:
+    """A Docker image, inspected in a sandbox container; identified by its image ID."""
+
+    kind = 'image'
+
+    def __init__(self, docker_client, image: str, scheduler=None):
+        """
+        Args:
+            docker_client: Docker client the image is looked up and run with
+            image: Image name, e.g. the validator's SANDBOX_IMAGE
+            scheduler: SandboxScheduler the listing runs under; defaults to
+                the shared one
+        """
+        self.docker_client = docker_client
+        self.image = image
+        self.scheduler = scheduler
+
+    def digest(self) -> str:
+        # The image ID is the digest of its configuration, so any rebuild or re-tag changes it
+        return self.docker_client.images.get(self.image).id
+
+    def describe(self) -> Dict:
+        scheduler = self.scheduler or get_scheduler()
+        outcome = scheduler.run(self.docker_client, self.image, ['python', '-c', describe_script()], {})
+        if outcome.exit_code != 0:
+            raise RuntimeError(f"Listing distributions in {self.image} failed (exit code {outcome.exit_code}): {outcome.output}")
+        return _parse_description(outcome.output)
+
+
+class DependencyIndex:
+    """Installed distributions of one environment state, answering requirement checks from memory."""
+
+    def __init__(self, description: Dict, digest: str):
+        self.digest = digest
+        self.markers: Dict[str, str] = description['markers']
+        self.distributions: Dict[str, Dict] = {
+            canonicalize_name(name): dist for name, dist in description['distributions'].items()
+        }
+        self._checks: Dict[str, List[str]] = {}
+
+    def version(self, name: str) -> Optional[str]:
+        dist = self.distributions.get(canonicalize_name(name))
+        return dist['version'] if dist else None
+
+    def check(self, requirement: str) -> List[str]:
+        """
+        Check ``requirement`` the way pkg_resources.require did: the
+        distribution and everything it requires must be installed at
+        versions matching their specifiers.
+
+        Returns:
+            Error messages; empty when the requirement is satisfied
+        """
+        errors = self._checks.get(requirement)
+        if errors is None:
+            try:
+                errors = self._resolve(Requirement(requirement), None, set())
+            except InvalidRequirement as e:
+                errors = [f"Invalid requirement {requirement!r}: {e}"]
+            if len(self._checks) >= CHECK_CACHE_SIZE:
+                self._checks.clear()
+            self._checks[requirement] = errors
+        return list(errors)
+
+    def _resolve(self, requirement: Requirement, required_by: Optional[str], seen: Set[Tuple[str, str]]) -> List[str]:
+        name = canonicalize_name(requirement.name)
+        suffix = f" (required by {required_by})" if required_by else ''
+        dist = self.distributions.get(name)
+        if dist is None:
+            return [f"Missing dependency: {requirement}{suffix}"]
+        if not requirement.specifier.contains(dist['version'], prereleases=True):
+            return [f"Version conflict for: {requirement}{suffix}, {dist['version']} is installed"]
+
+        errors: List[str] = []
+        for extra in sorted(requirement.extras) or ['']:
+            if (name, extra) in seen:
+                continue
+            seen.add((name, extra))
+            for line in dist['requires']:
+                try:
+                    dependency = Requirement(line)
+                except InvalidRequirement:
+                    continue
+                if dependency.marker and not dependency.marker.evaluate({**self.markers, 'extra': extra}):
+                    continue
+                errors.extend(self._resolve(dependency, requirement.name, seen))
+        return errors
+
+
+class DependencyResolver:
+    """
+    Checks requirements against a target environment.
+
+    The environment's distributions are indexed once with importlib.metadata
+    and kept in memory; the index is rebuilt only when the environment's
+    digest changes (a new image ID, or distributions installed or removed).
+    """
+
+    def __init__(self, environment):
+        """
+        Args:
+            environment: LocalEnvironment, VenvEnvironment or ImageEnvironment
+        """
+        self.logger = logging.getLogger(__name__)
+        self.environment = environment
+        self._index: Optional[DependencyIndex] = None
+        self._lock = threading.Lock()
+
+    def index(self) -> DependencyIndex:
+        """The current index, rebuilt if the environment changed since it was built."""
+        digest = self.environment.digest()
+        with self._lock:
+            if self._index is None or self._index.digest != digest:
+                start = time.perf_counter()
+                try:
+                    self._index = DependencyIndex(self.environment.describe(), digest)
+                except Exception as e:
+                    self.logger.error(f"Error indexing {self.environment.kind} environment: {str(e)}")
+                    raise
+                elapsed = time.perf_counter() - start
+                INDEX_BUILDS.labels(environment=self.environment.kind).inc()
+                INDEX_BUILD_SECONDS.observe(elapsed)
+                self.logger.debug(
+                    f"Indexed {len(self._index.distributions)} distributions "
+                    f"of {self.environment.kind} environment in {elapsed * 1000:.1f}ms"
+                )
+            return self._index
+
+    def check(self, requirements: Iterable[str]) -> List[str]:
+        """Error messages for every requirement not satisfied by the environment."""
+        index = self.index()
+        errors: List[str] = []
+        for requirement in requirements:
+            errors.extend(index.check(requirement))
+        return errors
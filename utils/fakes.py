@@ -0,0 +1,520 @@
+"""
+Deterministic in-memory stand-ins for the pipeline's external dependencies.
+
+Each fake implements the subset of the real client's interface the code
+base uses, so components can be built and exercised without a Docker
+daemon, AstraDB credentials, a downloaded embedding or NeMo model, network
+access or the bandit/safety executables:
+
+    FakeDockerClient     docker.DockerClient (containers, images, info)
+    ProcessDockerClient  a FakeDockerClient whose containers run their
+                         command as a local process in the extracted workspace
+    FakeCommandRunner    subprocess.run for the bandit and safety scanners
+    FakeEmbeddings       HuggingFaceEmbeddings (embed_query/embed_documents)
+    FakeCollection       astrapy collection (insert_one/find_many)
+    FakeSession          cassandra Session (prepare/execute/execute_async)
+    FakeFirecrawlClient  the Firecrawl search client
+    FakeNeMoModel        a NeMo model with tokenizer and generate()
+    FaultInjector        wraps any of these, failing or delaying chosen methods
+
+``build_offline_components`` wires them into the same component dict as
+``main.build_components``.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from pathlib import Path
+import hashlib
+import io
+import json
+import math
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+
+EMBEDDING_DIMENSION = 384
+
+_TOKEN_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|\d+')
+
+
+class FakeContainer:
+    """A created container; records the archive it receives."""
+
+    def __init__(self, containers: 'FakeContainers', name: str, options: Dict):
+        self.containers = containers
+        self.name = name
+        self.options = options
+        self.archives: List[bytes] = []
+        self.status = 'created'
+
+    def put_archive(self, path: str, data: bytes) -> bool:
+        self.archives.append(data)
+        return True
+
+    def start(self) -> None:
+        self.status = 'running'
+
+    def wait(self, timeout: Optional[float] = None) -> Dict:
+        if timeout is not None and self.containers.latency > timeout:
+            # Like docker-py, whose HTTP read times out while the container keeps running
+            time.sleep(timeout)
+            raise TimeoutError("Read timed out")
+        if self.containers.latency:
+            time.sleep(self.containers.latency)
+        self.status = 'exited'
+        return {'StatusCode': self.containers.exit_code, 'Error': None}
+
+    def logs(self, stdout: bool = True, stderr: bool = True) -> bytes:
+        return self.containers.output
+
+    def kill(self) -> None:
+        self.status = 'exited'
+
+    def remove(self, force: bool = False) -> None:
+        self.status = 'removed'
+        self.containers.removed.append(self.name)
+
+
+class FakeContainers:
+    """``client.containers``; runs complete immediately with canned output."""
+
+    def __init__(
+        self,
+        output: bytes = b'',
+        error: Optional[Exception] = None,
+        latency: float = 0.0,
+        exit_code: int = 0
+    ):
+        self.output = output
+        self.error = error
+        self.latency = latency
+        self.exit_code = exit_code
+        self.runs: List[Dict] = []
+        self.created: List[FakeContainer] = []
+        self.removed: List[str] = []
+
+    def run(self, image: str, command=None, **kwargs) -> bytes:
+        self.runs.append({'image': image, 'command': command, **kwargs})
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        return self.output
+
+    def create(self, image: str, command=None, name: Optional[str] = None, **kwargs) -> FakeContainer:
+        self.runs.append({'image': image, 'command': command, 'name': name, **kwargs})
+        if self.error is not None:
+            raise self.error
+        container = FakeContainer(self, name or f"container-{len(self.created)}", kwargs)
+        self.created.append(container)
+        return container
+
+
+class FakeImage:
+    def __init__(self, name: str, user: str = ''):
+        self.tags = [name]
+        self.id = 'sha256:' + hashlib.sha256(name.encode()).hexdigest()
+        self.attrs = {'Id': self.id, 'RepoTags': [name], 'Config': {'User': user}}
+
+
+class FakeImages:
+    def __init__(self, client: 'FakeDockerClient', user: str = ''):
+        self.client = client
+        self.user = user
+
+    def get(self, name: str) -> FakeImage:
+        self.client._api_call()
+        return FakeImage(name, self.user)
+
+
+class FakeDockerClient:
+    """Docker client whose daemon enforces limits and runs seccomp."""
+
+    def __init__(
+        self,
+        output: bytes = b'',
+        error: Optional[Exception] = None,
+        latency: float = 0.0,
+        image_user: str = 'nobody',
+        exit_code: int = 0,
+        api_latency: float = 0.0
+    ):
+        """
+        Args:
+            latency: Seconds each container run takes
+            api_latency: Seconds each daemon query (info, images.get) takes
+        """
+        self.containers = FakeContainers(output, error, latency, exit_code)
+        self.images = FakeImages(self, image_user)
+        self.api_latency = api_latency
+        self.api_calls = 0
+        self._info = {
+            'ID': 'fake-daemon',
+            'ServerVersion': '24.0.0',
+            'MemoryLimit': True,
+            'CpuCfsQuota': True,
+            'SecurityOptions': ['name=seccomp,profile=builtin']
+        }
+
+    def _api_call(self) -> None:
+        self.api_calls += 1
+        if self.api_latency:
+            time.sleep(self.api_latency)
+
+    def info(self) -> Dict:
+        self._api_call()
+        return dict(self._info)
+
+    def ping(self) -> bool:
+        return True
+
+
+class ProcessContainer(FakeContainer):
+    """A container that extracts its archive to a temporary directory and
+    runs its command there, with ``python`` meaning this interpreter."""
+
+    def start(self) -> None:
+        self.root = tempfile.mkdtemp()
+        for archive in self.archives:
+            with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+                tar.extractall(self.root)
+        command = list(self.options['command'])
+        if command[0] == 'python':
+            command[0] = sys.executable
+        workdir = Path(self.root) / self.options.get('working_dir', '/app').strip('/')
+        self.process = subprocess.Popen(
+            command, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        self.status = 'running'
+
+    def wait(self, timeout: Optional[float] = None) -> Dict:
+        try:
+            self.output, _ = self.process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise TimeoutError("Read timed out")
+        self.status = 'exited'
+        return {'StatusCode': self.process.returncode, 'Error': None}
+
+    def logs(self, stdout: bool = True, stderr: bool = True) -> bytes:
+        if not hasattr(self, 'output'):
+            self.output, _ = self.process.communicate()
+        return self.output
+
+    def kill(self) -> None:
+        # A concurrent wait() collects the output; otherwise logs() does
+        self.process.kill()
+        self.status = 'exited'
+
+    def remove(self, force: bool = False) -> None:
+        if hasattr(self, 'root'):
+            shutil.rmtree(self.root, ignore_errors=True)
+        super().remove(force)
+
+
+class ProcessContainers(FakeContainers):
+    def create(self, image: str, command=None, name: Optional[str] = None, **kwargs) -> FakeContainer:
+        self.runs.append({'image': image, 'command': command, 'name': name, **kwargs})
+        container = ProcessContainer(self, name or f"container-{len(self.created)}", {'command': command, **kwargs})
+        self.created.append(container)
+        return container
+
+
+class ProcessDockerClient(FakeDockerClient):
+    """Docker client for running real test suites without a daemon."""
+
+    def __init__(self, image_user: str = 'nobody'):
+        super().__init__(image_user=image_user)
+        self.containers = ProcessContainers()
+
+
+class FaultInjector:
+    """
+    Proxy that injects faults into chosen methods of the object it wraps.
+
+    Each method in ``failures`` raises ``error`` for its first N calls (-1:
+    every call, a dependency that is down). ``latency`` delays a method by a
+    fixed number of seconds, or per call from a list (the last entry
+    repeating), e.g. [2.0, 0.0] for a slow first attempt. Other attributes
+    pass through; ``calls`` counts calls per faulty method.
+    """
+
+    def __init__(
+        self,
+        target: Any,
+        failures: Optional[Dict[str, int]] = None,
+        latency: Optional[Dict[str, Any]] = None,
+        error: Callable[[str], Exception] = ConnectionError
+    ):
+        self._target = target
+        self._failures = dict(failures or {})
+        self._latency = dict(latency or {})
+        self._error = error
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if name not in self._failures and name not in self._latency:
+            return attribute
+
+        def faulty(*args, **kwargs):
+            with self._lock:
+                index = self.calls.get(name, 0)
+                self.calls[name] = index + 1
+            delay = self._latency.get(name, 0.0)
+            if isinstance(delay, (list, tuple)):
+                delay = delay[min(index, len(delay) - 1)]
+            if delay:
+                time.sleep(delay)
+            failures = self._failures.get(name, 0)
+            if failures < 0 or index < failures:
+                raise self._error(f"Injected failure in {name} (call {index + 1})")
+            return attribute(*args, **kwargs)
+
+        return faulty
+
+
+class FakeCommandRunner:
+    """Replaces ``subprocess.run`` for the security scanners.
+
+    bandit reports ``bandit_results`` (none by default) and safety reports
+    the packages listed in ``vulnerable`` as vulnerable.
+    """
+
+    def __init__(self, bandit_results: Optional[List[Dict]] = None, vulnerable: Sequence[str] = ()):
+        self.bandit_results = bandit_results or []
+        self.vulnerable = set(vulnerable)
+        self.commands: List[List[str]] = []
+
+    def __call__(self, args: List[str], **kwargs) -> subprocess.CompletedProcess:
+        self.commands.append(list(args))
+        if args[0] == 'bandit':
+            stdout = json.dumps({'results': self.bandit_results, 'errors': []})
+            return subprocess.CompletedProcess(args, 1 if self.bandit_results else 0, stdout, '')
+        if args[0] == 'safety':
+            package = args[-1]
+            if package in self.vulnerable:
+                return subprocess.CompletedProcess(args, 64, f"{package}: known vulnerability", '')
+            return subprocess.CompletedProcess(args, 0, 'No known security vulnerabilities found.', '')
+        raise FileNotFoundError(args[0])
+
+
+class FakeEmbeddings:
+    """Feature-hashed bag-of-identifiers vectors.
+
+    Texts sharing identifiers get similar vectors, so retrieval results are
+    meaningful as well as deterministic.
+    """
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        self.dimension = dimension
+        self.calls = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        vector = [0.0] * self.dimension
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dimension
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+class FakeCollection:
+    """Vector collection answering ``$vector`` queries by exact cosine search."""
+
+    def __init__(self):
+        self.documents: List[Dict] = []
+
+    def insert_one(self, document: Dict) -> Dict:
+        document = dict(document)
+        document.setdefault('_id', str(len(self.documents)))
+        self.documents.append(document)
+        return {'status': {'insertedIds': [document['_id']]}}
+
+    def insert_many(self, documents: List[Dict]) -> Dict:
+        ids = [self.insert_one(document)['status']['insertedIds'][0] for document in documents]
+        return {'status': {'insertedIds': ids}}
+
+    def find_many(self, filter: Dict, limit: int = 20) -> List[Dict]:
+        query = filter.get('$vector')
+        if query is None:
+            return [dict(document) for document in self.documents[:limit]]
+        scored = []
+        for document in self.documents:
+            # AstraDB reports cosine similarity rescaled to [0, 1]
+            similarity = (1 + _cosine(query, document['$vector'])) / 2
+            scored.append({**document, '$similarity': similarity})
+        scored.sort(key=lambda document: document['$similarity'], reverse=True)
+        return scored[:limit]
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class FakeFuture:
+    """Completed ``ResponseFuture``; callbacks run immediately."""
+
+    def __init__(self, rows: Any = None, error: Optional[Exception] = None):
+        self.rows = rows if rows is not None else []
+        self.error = error
+
+    def add_callbacks(self, callback: Callable, errback: Callable) -> None:
+        if self.error is None:
+            callback(self.rows)
+        else:
+            errback(self.error)
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.rows
+
+
+class FakeSession:
+    """Records statements; prepare returns a %s query so real batches can bind it.
+
+    ``results`` maps a prepared statement to its rows, or to a callable
+    taking the bound parameters.
+    """
+
+    def __init__(self):
+        self.prepared: List[str] = []
+        self.executed: List = []
+        self.results: Dict = {}
+
+    def prepare(self, query: str) -> str:
+        self.prepared.append(query)
+        return query.replace('?', '%s')
+
+    def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+        rows = self.results.get(statement, []) if isinstance(statement, str) else []
+        return rows(params) if callable(rows) else rows
+
+    def execute_async(self, statement, params=None) -> FakeFuture:
+        return FakeFuture(self.execute(statement, params))
+
+
+class FakeFirecrawlClient:
+    """Search client returning canned results derived from the search terms."""
+
+    def __init__(self, examples_per_term: int = 2, latency: float = 0.0):
+        self.examples_per_term = examples_per_term
+        self.latency = latency
+        self.searches: List[List[str]] = []
+
+    def _search(self, search_terms: List[str]) -> None:
+        self.searches.append(list(search_terms))
+        if self.latency:
+            time.sleep(self.latency)
+
+    def search_code_examples(self, search_terms: List[str]) -> List[Dict]:
+        self._search(search_terms)
+        return [{
+            'title': f"{term} example {index}",
+            'code': f"def {term}_example_{index}():\n    return {term!r}\n",
+            'source': f"https://example.com/{term}/{index}"
+        } for term in search_terms for index in range(self.examples_per_term)]
+
+    def search_documentation(self, search_terms: List[str]) -> Dict:
+        self._search(search_terms)
+        return {
+            'framework_docs': f"Documentation for {' '.join(search_terms)}",
+            'tutorials': [f"Tutorial for {term}" for term in search_terms]
+        }
+
+    def search_libraries(self, search_terms: List[str]) -> List[Dict]:
+        self._search(search_terms)
+        return [{'name': term, 'version': '1.0.0'} for term in search_terms]
+
+    def get_sources(self) -> List[str]:
+        return ['https://example.com']
+
+
+class FakeTokenizer:
+    """One token per character."""
+
+    def text_to_ids(self, text: str) -> List[int]:
+        return [ord(char) for char in text]
+
+    def ids_to_text(self, ids: List[int]) -> str:
+        return ''.join(chr(token_id) for token_id in ids)
+
+
+class _TokenIds(list):
+    def tolist(self) -> List[int]:
+        return list(self)
+
+
+class FakeNeMoModel:
+    """Generates ``completion`` one character at a time, honouring streamers
+    and stopping criteria like ``model.generate``."""
+
+    device = 'cpu'
+
+    def __init__(self, completion: str = "def app():\n    return 'ok'\n```\nExplanation"):
+        self.tokenizer = FakeTokenizer()
+        self.completion = completion
+
+    def generate(self, inputs, max_length: int = 512, streamer=None, stopping_criteria=(), **kwargs):
+        output = _TokenIds()
+        for token_id in self.tokenizer.text_to_ids(self.completion)[:max_length]:
+            if any(criterion(output, None) for criterion in stopping_criteria):
+                break
+            output.append(token_id)
+            if streamer is not None:
+                streamer.put([token_id])
+        return [output]
+
+    def cuda(self) -> 'FakeNeMoModel':
+        return self
+
+    def half(self) -> 'FakeNeMoModel':
+        return self
+
+
+def build_offline_components(docker_client: Optional[FakeDockerClient] = None, scheduler=None) -> Dict:
+    """Pipeline components backed by fakes; same keys as main.build_components."""
+    from agents.collector_agent import RequirementCollector
+    from agents.coordinator_agent import TaskCoordinator
+    from agents.generator_agent import CodeGenerator
+    from agents.validator_agent import CodeValidator
+    from utils.dependency_index import DependencyResolver, LocalEnvironment
+    from utils.firecrawl_wrapper import FirecrawlWrapper
+    from utils.nemo_utils import NeMoUtils
+    from utils.rag_manager import RAGManager
+    from utils.sandbox import SandboxLimits, SandboxScheduler
+    from utils.security import SecurityManager
+
+    docker_client = docker_client or FakeDockerClient()
+    # Explicit budget, so no settings (and no .env) are needed
+    scheduler = scheduler or SandboxScheduler(cpu_budget=2, memory_budget='2g', limits=SandboxLimits(), max_queue=32)
+    rag_manager = RAGManager(embeddings=FakeEmbeddings(), collection=FakeCollection())
+    security_manager = SecurityManager(docker_client=docker_client, command_runner=FakeCommandRunner())
+    return {
+        'collector': RequirementCollector(),
+        'generator': CodeGenerator(),
+        'validator': CodeValidator(
+            rag_manager=rag_manager,
+            security_manager=security_manager,
+            docker_client=docker_client,
+            scheduler=scheduler,
+            # The fake daemon has no image contents to list; check this interpreter instead
+            dependency_resolver=DependencyResolver(LocalEnvironment())
+        ),
+        'coordinator': TaskCoordinator(),
+        'firecrawl': FirecrawlWrapper(client=FakeFirecrawlClient(), rag_manager=rag_manager),
+        'nemo_utils': NeMoUtils()
+    }
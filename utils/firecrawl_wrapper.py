@@ -1,17 +1,33 @@
-from typing import Dict
-import requests
-from bs4 import BeautifulSoup
+from typing import Dict, Optional
 import logging
 import os
 from pathlib import Path
 from datetime import datetime
+from utils import metrics
+from utils.resilience import Dependency, dependency
+from utils.tracing import set_attributes, traced
+
+SCRAPE_SECONDS = metrics.histogram('firecrawl_scrape_seconds', 'Duration of scrape_data calls')
+SCRAPE_ERRORS = metrics.counter('firecrawl_scrape_errors_total', 'scrape_data calls that raised')
 
 class FirecrawlWrapper:
     """Wrapper for Firecrawl web scraping functionality."""
     
-    def __init__(self):
+    def __init__(self, client=None, rag_manager=None, resilience: Optional[Dependency] = None):
+        """
+        Args:
+            client: Firecrawl search client; created per call when omitted
+            rag_manager: RAGManager that scraped examples are stored in
+            resilience: Deadlines, retries, hedging and circuit breaker for
+                searches; defaults to the shared 'firecrawl' dependency
+        """
         self.logger = logging.getLogger(__name__)
+        self.resilience = resilience or dependency('firecrawl')
+        self.client = client
+        self.rag_manager = rag_manager
         
+    @traced('scrape_data')
+    @SCRAPE_SECONDS.time()
     def scrape_data(self, requirements: Dict) -> Dict:
         """
         Scrape relevant data based on requirements using Firecrawl.
@@ -27,31 +43,49 @@ class FirecrawlWrapper:
             search_terms = self._extract_search_terms(requirements)
             
             # Initialize Firecrawl client
-            firecrawl_client = FirecrawlClient(
+            firecrawl_client = self.client or FirecrawlClient(
                 api_key=os.getenv('FIRECRAWL_API_KEY'),
                 cache_dir=Path('data/cache/firecrawl')
             )
             
-            # Collect data from various sources
+            # Collect data from various sources; searches are reads, so they may be retried and hedged
+            search = self.resilience.call
             scraped_data = {
-                'examples': firecrawl_client.search_code_examples(search_terms),
-                'documentation': firecrawl_client.search_documentation(search_terms),
-                'libraries': firecrawl_client.search_libraries(search_terms),
+                'examples': search(firecrawl_client.search_code_examples, search_terms, idempotent=True),
+                'documentation': search(firecrawl_client.search_documentation, search_terms, idempotent=True),
+                'libraries': search(firecrawl_client.search_libraries, search_terms, idempotent=True),
                 'metadata': {
                     'sources': firecrawl_client.get_sources(),
                     'timestamp': datetime.now().isoformat()
                 }
             }
             
+            set_attributes(
+                search_terms=len(search_terms),
+                examples=len(scraped_data['examples'])
+            )
+            
             # Store in RAG system
             self._store_in_rag(scraped_data)
             
             return scraped_data
             
         except Exception as e:
+            SCRAPE_ERRORS.inc()
             self.logger.error(f"Error scraping data: {str(e)}")
             raise
 
+    def _store_in_rag(self, scraped_data: Dict) -> None:
+        """Add scraped code examples to the RAG knowledge base, if one is attached."""
+        if self.rag_manager is None:
+            return
+        for example in scraped_data['examples']:
+            self.rag_manager.add_document(example['code'], {
+                'source': example.get('source', 'firecrawl'),
+                'type': 'scraped',
+                'title': example.get('title', '')
+            })
+
     def _extract_search_terms(self, requirements: Dict) -> list:
         """Extract relevant search terms from requirements."""
         terms = []
@@ -0,0 +1,298 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import traceback
+
+# Default capacities; a long-running worker holds at most this many records
+TASK_HISTORY_CAPACITY = 1000
+ERROR_HISTORY_CAPACITY = 1000
+ERROR_FINGERPRINT_CAPACITY = 256
+
+# Error text kept in memory per record; the full text goes to the spill file
+MAX_MESSAGE_CHARS = 500
+
+# Variable parts of error messages, replaced before fingerprinting; the
+# error_handler template carries a copy, pinned equal by the tests
+_VARIABLE_PARTS = [
+    (re.compile(r"0x[0-9a-fA-F]+"), '<addr>'),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), '<str>'),
+    (re.compile(r"(?:/[\w.\-]+)+"), '<path>'),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), '<num>')
+]
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+class RingBuffer:
+    """Fixed-capacity buffer keeping the newest ``capacity`` items, oldest first.
+
+    Slots are preallocated, so appending never grows memory; ``dropped``
+    counts the items overwritten.
+    """
+
+    __slots__ = ('capacity', 'dropped', '_items', '_next', '_size', '_lock')
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.dropped = 0
+        self._items: List[Any] = [None] * capacity
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def append(self, item: Any) -> None:
+        with self._lock:
+            if self._size == self.capacity:
+                self.dropped += 1
+            else:
+                self._size += 1
+            self._items[self._next] = item
+            self._next = (self._next + 1) % self.capacity
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        with self._lock:
+            start = (self._next - self._size) % self.capacity
+            items = [self._items[(start + i) % self.capacity] for i in range(self._size)]
+        return iter(items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items = [None] * self.capacity
+            self._next = self._size = 0
+
+
+class SpillFile:
+    """
+    Append-only JSON-lines file for details too large to keep in memory.
+
+    When the file passes ``max_bytes`` it is rotated to ``<name>.1``,
+    replacing the previous rotation; references into rotated-away
+    generations then read as None.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 64 * 1024 ** 2):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, detail: Dict) -> Tuple[int, int]:
+        """Append ``detail``; returns the (generation, offset) to read it back with."""
+        line = (json.dumps(detail, default=repr) + '\n').encode()
+        with self._lock:
+            if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                self.path.replace(self.path.with_name(self.path.name + '.1'))
+                self.generation += 1
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(line)
+            return self.generation, offset
+
+    def read(self, reference: Tuple[int, int]) -> Optional[Dict]:
+        generation, offset = reference
+        with self._lock:
+            if generation == self.generation:
+                path = self.path
+            elif generation == self.generation - 1:
+                path = self.path.with_name(self.path.name + '.1')
+            else:
+                return None
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    return json.loads(f.readline())
+            except (OSError, ValueError):
+                return None
+
+
+def error_fingerprint(error_type: str, message: str, location: str = '') -> str:
+    """
+    Stable id for an error, equal for repeats of the same failure.
+
+    Addresses, quoted strings, paths and numbers in the message are masked,
+    so errors differing only in the values involved share a fingerprint.
+    """
+    normalized = message
+    for pattern, placeholder in _VARIABLE_PARTS:
+        normalized = pattern.sub(placeholder, normalized)
+    return hashlib.sha1(f"{error_type}|{normalized}|{location}".encode()).hexdigest()[:12]
+
+
+class TaskEvent:
+    """One coordinator event; errors are interned so repeats share storage."""
+
+    __slots__ = ('timestamp', 'action', 'framework', 'app_type', 'errors')
+
+    def __init__(
+        self,
+        action: str,
+        framework: Optional[str] = None,
+        app_type: Optional[str] = None,
+        errors: Tuple[str, ...] = ()
+    ):
+        self.timestamp = time.time()
+        self.action = sys.intern(action)
+        self.framework = framework
+        self.app_type = app_type
+        self.errors = tuple(sys.intern(str(error)[:MAX_MESSAGE_CHARS]) for error in errors)
+
+    def to_dict(self) -> Dict:
+        event = {
+            'timestamp': _isoformat(self.timestamp),
+            'action': self.action
+        }
+        if self.errors:
+            event['errors'] = list(self.errors)
+        if self.framework is not None or self.app_type is not None:
+            event['framework'] = self.framework
+            event['type'] = self.app_type
+        return event
+
+
+class ErrorSummary:
+    """Aggregate of every occurrence of one error fingerprint."""
+
+    __slots__ = ('fingerprint', 'error_type', 'message', 'location', 'count', 'first_seen', 'last_seen', 'detail')
+
+    def __init__(self, fingerprint: str, error_type: str, message: str, location: str):
+        self.fingerprint = fingerprint
+        self.error_type = error_type
+        self.message = message
+        self.location = location
+        self.count = 0
+        self.first_seen = self.last_seen = time.time()
+        self.detail: Optional[Tuple[int, int]] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'fingerprint': self.fingerprint,
+            'type': self.error_type,
+            'message': self.message,
+            'location': self.location,
+            'count': self.count,
+            'first_seen': _isoformat(self.first_seen),
+            'last_seen': _isoformat(self.last_seen)
+        }
+
+
+class ErrorEvent:
+    """One occurrence: when, and which fingerprint."""
+
+    __slots__ = ('timestamp', 'fingerprint')
+
+    def __init__(self, fingerprint: str):
+        self.timestamp = time.time()
+        self.fingerprint = fingerprint
+
+
+class ErrorHistory:
+    """
+    Bounded error log that aggregates repeats by fingerprint.
+
+    Keeps the newest ``capacity`` occurrences and a summary with a count for
+    up to ``max_fingerprints`` distinct errors, least recently seen evicted
+    first. Tracebacks and call context are not kept in memory; with a
+    ``spill_path`` each occurrence's full detail is appended there, and the
+    latest one per fingerprint can be read back with ``detail``.
+    """
+
+    def __init__(
+        self,
+        capacity: int = ERROR_HISTORY_CAPACITY,
+        max_fingerprints: int = ERROR_FINGERPRINT_CAPACITY,
+        spill_path: Optional[Path] = None
+    ):
+        self.events = RingBuffer(capacity)
+        self.max_fingerprints = max_fingerprints
+        self.spill = SpillFile(spill_path) if spill_path is not None else None
+        self._summaries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, error_type: str, message: str, location: str = '', detail: Optional[Dict] = None) -> str:
+        """
+        Count one occurrence of an error.
+
+        Args:
+            error_type: Exception class name or error category
+            message: Error text
+            location: Where it was raised, e.g. 'app.py:handler'
+            detail: Full detail for the spill file, e.g. traceback and context
+
+        Returns:
+            The error's fingerprint
+        """
+        fingerprint = error_fingerprint(error_type, message, location)
+        with self._lock:
+            summary = self._summaries.get(fingerprint)
+            if summary is None:
+                summary = ErrorSummary(fingerprint, error_type, message[:MAX_MESSAGE_CHARS], location)
+                self._summaries[fingerprint] = summary
+                if len(self._summaries) > self.max_fingerprints:
+                    self._summaries.popitem(last=False)
+            else:
+                self._summaries.move_to_end(fingerprint)
+            summary.count += 1
+            summary.last_seen = time.time()
+        if self.spill is not None and detail is not None:
+            summary.detail = self.spill.write({
+                'fingerprint': fingerprint,
+                'type': error_type,
+                'message': message,
+                **detail
+            })
+        self.events.append(ErrorEvent(fingerprint))
+        return fingerprint
+
+    def record_exception(self, error: BaseException, context: Optional[Dict] = None) -> str:
+        """record() for a caught exception, located at its innermost frame."""
+        frames = traceback.extract_tb(error.__traceback__)
+        location = f"{Path(frames[-1].filename).name}:{frames[-1].name}" if frames else ''
+        detail = None
+        if self.spill is not None:
+            detail = {
+                'traceback': ''.join(traceback.format_exception(type(error), error, error.__traceback__)),
+                'context': context or {}
+            }
+        return self.record(type(error).__name__, str(error), location, detail)
+
+    def summaries(self) -> List[Dict]:
+        """Distinct errors, most frequent first."""
+        with self._lock:
+            summaries = list(self._summaries.values())
+        return [summary.to_dict() for summary in sorted(summaries, key=lambda s: s.count, reverse=True)]
+
+    def detail(self, fingerprint: str) -> Optional[Dict]:
+        """The latest spilled detail for a fingerprint, if still available."""
+        summary = self._summaries.get(fingerprint)
+        if summary is None or summary.detail is None or self.spill is None:
+            return None
+        return self.spill.read(summary.detail)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Recent occurrences, oldest first."""
+        for event in self.events:
+            summary = self._summaries.get(event.fingerprint)
+            yield {
+                'timestamp': _isoformat(event.timestamp),
+                'fingerprint': event.fingerprint,
+                'type': summary.error_type if summary else None,
+                'message': summary.message if summary else None
+            }
@@ -0,0 +1,46 @@
+from typing import Optional
+import importlib
+import sys
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access.
+
+    Keeps heavy optional dependencies (torch, docker, langchain, ...) out of
+    the import path of commands that never use them, such as ``--help``.
+    A missing dependency raises ImportError at first use instead of at import.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Return ``name`` if it is already imported, otherwise a proxy that
+    imports it on first use.
+    """
+    module: Optional[types.ModuleType] = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
@@ -0,0 +1,139 @@
+from typing import Dict, List, Sequence, Tuple
+from collections import Counter
+import math
+import re
+
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|\d+')
+# Pieces of an identifier: 'HTTPServerError' -> HTTP, Server, Error
+_SUBWORD = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+_WORD = re.compile(r'[a-z]{3,}')
+
+# Common English words that carry no meaning for the embedding model either
+STOPWORDS = frozenset({
+    'and', 'are', 'but', 'can', 'for', 'from', 'has', 'have', 'into', 'its', 'not',
+    'that', 'the', 'this', 'was', 'were', 'with', 'fix', 'line', 'error', 'errors'
+})
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    Lowercased search terms for code or text.
+
+    Each identifier yields itself and, when it is compound, its snake_case and
+    camelCase parts, so ``handle_error`` matches both 'handle_error' and
+    'error' and ``KeyError`` matches 'keyerror', 'key' and 'error'.
+    """
+    tokens = []
+    for identifier in _IDENTIFIER.findall(text):
+        whole = identifier.lower()
+        if len(whole) > 1:
+            tokens.append(whole)
+        parts = [part.lower() for part in _SUBWORD.findall(identifier)]
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if len(part) > 1)
+    return tokens
+
+
+def has_semantic_content(query: str, min_words: int = 2) -> bool:
+    """
+    Whether ``query`` contains enough natural language for a dense embedding
+    to help.
+
+    Counts plain lowercase words outside STOPWORDS; identifiers, exception
+    names and code punctuation do not count. Queries made only of those, such
+    as 'fix KeyError: handle_error', are better served by exact term matches.
+    """
+    words = [
+        word for word in re.split(r'[^A-Za-z0-9_]+', query)
+        if _WORD.fullmatch(word) and word not in STOPWORDS
+    ]
+    return len(words) >= min_words
+
+
+class BM25Index:
+    """In-memory inverted index ranked with Okapi BM25.
+
+    Documents are added one at a time as they are ingested. Term statistics
+    are kept incrementally, so the index never needs a rebuild.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index ``text`` under ``doc_id``, replacing any earlier version."""
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        tokens = tokenize_code(text)
+        counts = Counter(tokens)
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        self._terms[doc_id] = tuple(counts)
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: str) -> None:
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(doc_id):
+            del self._postings[term][doc_id]
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Best-matching documents for ``query``.
+
+        Args:
+            query: Free text or code; tokenized like indexed documents
+            limit: Maximum number of results
+
+        Returns:
+            (doc_id, score) pairs, highest score first
+        """
+        count = len(self._lengths)
+        if not count:
+            return []
+        average_length = self._total_length / count
+        scores: Dict[str, float] = {}
+        for term in set(tokenize_code(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Merge ranked id lists by summing 1 / (k + rank) over the lists.
+
+    Args:
+        rankings: Ids ordered best first, one list per retriever
+        k: Damping constant; 60 is the value from the original RRF paper
+
+    Returns:
+        (id, fused score) pairs, highest score first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
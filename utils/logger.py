@@ -1,54 +1,146 @@
+import atexit
 import logging
-import logging.config
+import logging.handlers
+import os
+import queue
+import threading
 from pathlib import Path
-from typing import Dict
+from typing import Optional
 import json
 from datetime import datetime
 
+# Process-wide pipeline state; logging is configured at most once per process
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    The queue never leaves the process, so records need no pickling; only
+    the message arguments are merged eagerly in case callers mutate them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
 class LogManager:
-    def __init__(self, log_dir: Path):
+    def __init__(self, log_dir: Path, json_output: Optional[bool] = None):
+        """
+        Args:
+            log_dir: Directory for the rotating log files
+            json_output: Write structured JSON lines instead of plain text;
+                defaults to the LOG_FORMAT=json environment variable
+        """
         self.log_dir = log_dir
-        self.log_dir.mkdir(parents=True, exist_ok=True)
+        if json_output is None:
+            json_output = os.getenv('LOG_FORMAT', '').lower() == 'json'
+        self.json_output = json_output
         self._setup_logging()
-    
+
     def _setup_logging(self):
-        """Configure logging with rotating file handler."""
-        log_file = self.log_dir / f"agent_system_{datetime.now():%Y%m%d}.log"
-        
-        config = {
-            'version': 1,
-            'disable_existing_loggers': False,
-            'formatters': {
-                'detailed': {
-                    'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-                }
-            },
-            'handlers': {
-                'console': {
-                    'class': 'logging.StreamHandler',
-                    'level': 'INFO',
-                    'formatter': 'detailed'
-                },
-                'file': {
-                    'class': 'logging.handlers.RotatingFileHandler',
-                    'level': 'DEBUG',
-                    'formatter': 'detailed',
-                    'filename': str(log_file),
-                    'maxBytes': 10485760,  # 10MB
-                    'backupCount': 5
-                }
-            },
-            'loggers': {
-                '': {
-                    'handlers': ['console', 'file'],
-                    'level': 'DEBUG',
-                    'propagate': True
-                }
-            }
-        }
-        
-        logging.config.dictConfig(config) 
-    
+        """Route all records through a queue to handlers on a listener thread.
+
+        Callers only pay for enqueueing the record; formatting and file I/O
+        happen on the listener thread. Repeated calls are no-ops.
+        """
+        global _listener, _queue_handler
+
+        with _setup_lock:
+            if _listener is not None:
+                return
+
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            log_file = self.log_dir / f"agent_system_{datetime.now():%Y%m%d}.log"
+
+            if self.json_output:
+                formatter = JsonFormatter()
+            else:
+                formatter = logging.Formatter(
+                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+                )
+
+            console = logging.StreamHandler()
+            console.setLevel(logging.INFO)
+            console.setFormatter(formatter)
+
+            file_handler = logging.handlers.RotatingFileHandler(
+                str(log_file),
+                maxBytes=10485760,  # 10MB
+                backupCount=5
+            )
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(formatter)
+
+            _queue_handler = _InProcessQueueHandler(queue.SimpleQueue())
+            _listener = logging.handlers.QueueListener(
+                _queue_handler.queue,
+                console,
+                file_handler,
+                respect_handler_level=True
+            )
+
+            root = logging.getLogger()
+            root.addHandler(_queue_handler)
+            root.setLevel(logging.DEBUG)
+
+            _listener.start()
+            atexit.register(LogManager.shutdown)
+
+    @staticmethod
+    def shutdown() -> None:
+        """Flush queued records, stop the listener and detach the pipeline."""
+        global _listener, _queue_handler
+
+        with _setup_lock:
+            if _listener is None:
+                return
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            logging.getLogger().removeHandler(_queue_handler)
+            _listener = None
+            _queue_handler = None
+
+    @staticmethod
+    def _reset_after_fork() -> None:
+        """Drop the pipeline inherited by a forked child.
+
+        The listener thread does not survive ``fork``, so records queued by
+        the child would never be handled; the child configures its own.
+        """
+        global _listener, _queue_handler, _setup_lock
+
+        _setup_lock = threading.Lock()
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+        _listener = None
+        _queue_handler = None
+
     def get_logger(self, name: str) -> logging.Logger:
         """Get a logger instance for the given name."""
-        return logging.getLogger(name)
\ No newline at end of file
+        return logging.getLogger(name)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=LogManager._reset_after_fork)
@@ -0,0 +1,330 @@
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+import math
+import os
+import threading
+import time
+import weakref
+
+# Upper bounds in seconds, suited to everything from a cache lookup to a Docker run
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _ThreadCells:
+    """Per-thread accumulator arrays.
+
+    Each thread only ever writes its own cell, so updates need no lock; the
+    lock is taken once per thread on first use and when values are collected.
+    Cells of threads that have ended are folded into a base total then, so
+    short-lived worker threads do not accumulate cells.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._cells: List[Tuple[weakref.ref, List[float]]] = []
+        self._base = [0] * size
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[float]:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0] * self._size
+            with self._lock:
+                self._reap()
+                self._cells.append((weakref.ref(threading.current_thread()), cell))
+            self._local.cell = cell
+            return cell
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            self._reap()
+            cells = [cell for _, cell in self._cells] + [self._base]
+        return [sum(cell[i] for cell in cells) for i in range(self._size)]
+
+    def _reap(self) -> None:
+        """Fold the cells of ended threads into the base; called with the lock held."""
+        live = []
+        for thread_ref, cell in self._cells:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                live.append((thread_ref, cell))
+            else:
+                # An ended thread never writes its cell again
+                for i in range(self._size):
+                    self._base[i] += cell[i]
+        self._cells = live
+
+
+class _CounterChild:
+    __slots__ = ('_cells',)
+
+    def __init__(self):
+        self._cells = _ThreadCells(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._cells.cell()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_function', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from ``function`` whenever the gauge is collected."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return self._function() if self._function is not None else self._value
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_cells')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        # One slot per bucket plus +Inf, then the sum
+        self._cells = _ThreadCells(len(bounds) + 2)
+
+    def observe(self, value: float) -> None:
+        cell = self._cells.cell()
+        cell[bisect_left(self._bounds, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """Non-cumulative bucket counts (last one is +Inf) and the sum."""
+        totals = self._cells.totals()
+        return [int(count) for count in totals[:-1]], totals[-1]
+
+    @property
+    def count(self) -> int:
+        return sum(self.snapshot()[0])
+
+
+class _Metric:
+    """A metric family; unlabelled metrics expose their single child's methods."""
+
+    kind = ''
+    _child_methods: Tuple[str, ...] = ()
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        # Children by label values exactly as passed, so hot paths skip str()
+        self._lookup: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Bound directly so an unlabelled update costs no extra call
+            default = self.labels()
+            for method in self._child_methods:
+                setattr(self, method, getattr(default, method))
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **labels):
+        """Child for one combination of label values."""
+        if labels:
+            if tuple(labels) != self.labelnames:
+                if set(labels) != set(self.labelnames):
+                    raise ValueError(f"{self.name} expects labels {self.labelnames}")
+                labels = {name: labels[name] for name in self.labelnames}
+            values = tuple(labels.values())
+        child = self._lookup.get(values)
+        if child is None:
+            child = self._child_for(values)
+        return child
+
+    def _child_for(self, values: Tuple) -> object:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            self._lookup[values] = child
+        return child
+
+    def _label_text(self, values: Tuple[str, ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for values, child in list(self._children.items()):
+            yield self.name, self._label_text(values), child.value
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    _child_methods = ('inc',)
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    _child_methods = ('set', 'inc', 'dec', 'set_function')
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+    _child_methods = ('observe', 'time')
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(sorted(bucket for bucket in buckets if bucket != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = (('le', '+Inf' if bound == math.inf else _format_value(bound)),)
+                yield f"{self.name}_bucket", self._label_text(values, le), cumulative
+            yield f"{self.name}_sum", self._label_text(values), total
+            yield f"{self.name}_count", self._label_text(values), cumulative
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, **options) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, **options)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames=labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames=labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames=labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def exposition(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: Path) -> None:
+        """Atomically replace ``path`` with the current exposition, e.g. for
+        the node_exporter textfile collector."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(self.exposition())
+        os.replace(temp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Counter in the default registry; repeated calls return the same metric."""
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Gauge in the default registry; repeated calls return the same metric."""
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Histogram in the default registry; repeated calls return the same metric."""
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
@@ -1,23 +1,119 @@
-from typing import Dict, List
-import torch
-from nemo.collections.nlp.models import MegatronT5Model
-from config.settings import NEMO_CONFIG
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence
+import asyncio
+import queue
+import threading
+import time
+from config import settings
+from utils.lazy_import import lazy_import
+
+torch = lazy_import('torch')
+nemo_models = lazy_import('nemo.collections.nlp.models')
+
+# Closing fence of a markdown code block; generation past it is commentary
+DEFAULT_STOP_SEQUENCES = ("\n```",)
+
+_END_OF_STREAM = object()
+
+
+class _TextStreamer:
+    """Receives token ids from ``model.generate`` and decodes them incrementally.
+
+    Implements the ``put``/``end`` streamer protocol. Decoded text is pushed
+    onto a queue as it becomes final; the tail that could still turn into a
+    stop sequence is held back until more tokens arrive.
+    """
+
+    def __init__(self, tokenizer, stop_sequences: Sequence[str]):
+        self.tokenizer = tokenizer
+        self.stop_sequences = [s for s in stop_sequences if s]
+        self.chunks: queue.Queue = queue.Queue()
+        self.stopped = False
+        self._token_ids: List[int] = []
+        self._emitted = 0
+        self._finished = False
+        self._holdback = max((len(s) for s in self.stop_sequences), default=1) - 1
+
+    def put(self, value) -> None:
+        """Receive newly generated token ids."""
+        if self.stopped:
+            return
+        ids = value.tolist() if hasattr(value, 'tolist') else list(value)
+        if ids and isinstance(ids[0], list):
+            ids = ids[0]
+        self._token_ids.extend(ids)
+        text = self.tokenizer.ids_to_text(self._token_ids)
+
+        stop_at = self._find_stop(text)
+        if stop_at is not None:
+            self.stopped = True
+            self._emit(text[:stop_at])
+            self.end()
+            return
+
+        self._emit(text[:len(text) - self._holdback])
+
+    def end(self) -> None:
+        """Flush remaining text and signal the end of generation."""
+        if self._finished:
+            return
+        if not self.stopped:
+            self._emit(self.tokenizer.ids_to_text(self._token_ids))
+        self._finished = True
+        self.chunks.put(_END_OF_STREAM)
+
+    def fail(self, error: Exception) -> None:
+        """Forward a generation error to the consuming thread."""
+        self._finished = True
+        self.chunks.put(error)
+
+    def stop(self) -> None:
+        """Halt generation and wake a consumer blocked on the queue."""
+        self.stopped = True
+        if not self._finished:
+            self._finished = True
+            self.chunks.put(_END_OF_STREAM)
+
+    def should_stop(self, *args, **kwargs) -> bool:
+        """Stopping criterion passed to ``model.generate``."""
+        return self.stopped
+
+    def _find_stop(self, text: str) -> Optional[int]:
+        # Only the region that has not been emitted yet can contain a new match
+        search_from = max(self._emitted - self._holdback, 0)
+        positions = [
+            pos for pos in (text.find(s, search_from) for s in self.stop_sequences)
+            if pos != -1
+        ]
+        return min(positions) if positions else None
+
+    def _emit(self, text: str) -> None:
+        if len(text) > self._emitted:
+            self.chunks.put(text[self._emitted:])
+            self._emitted = len(text)
+
 
 class NeMoModelManager:
     """Manages NeMo model loading and inference."""
     
-    def __init__(self):
-        self.model = self._load_model()
+    def __init__(self, model=None):
+        """
+        Args:
+            model: Loaded model with ``tokenizer`` and ``generate``; loaded
+                from NEMO_CONFIG when omitted
+        """
+        self.model = model or self._load_model()
+        self.generation_metrics: Dict[str, float] = {}
         
-    def _load_model(self) -> MegatronT5Model:
+    def _load_model(self) -> 'nemo_models.MegatronT5Model':
         """Load and configure the NeMo model."""
         try:
-            model = MegatronT5Model.from_pretrained(NEMO_CONFIG['model_name'])
+            nemo_config = settings.NEMO_CONFIG
+            model = nemo_models.MegatronT5Model.from_pretrained(nemo_config['model_name'])
             
-            if NEMO_CONFIG['device'] == 'cuda':
+            if nemo_config['device'] == 'cuda':
                 model = model.cuda()
                 
-            if NEMO_CONFIG['precision'] == 'fp16':
+            if nemo_config['precision'] == 'fp16':
                 model = model.half()
                 
             return model
@@ -29,8 +125,7 @@ class NeMoModelManager:
         """Generate code using the NeMo model."""
         try:
             # Prepare input
-            inputs = self.model.tokenizer.text_to_ids(prompt)
-            inputs = torch.tensor([inputs]).to(self.model.device)
+            inputs = self._encode_prompt(prompt)
             
             # Generate
             outputs = self.model.generate(
@@ -48,6 +143,112 @@ class NeMoModelManager:
         except Exception as e:
             raise RuntimeError(f"Code generation failed: {str(e)}")
 
+    def stream_code(
+        self,
+        prompt: str,
+        max_length: int = 512,
+        stop_sequences: Optional[Sequence[str]] = None
+    ) -> Iterator[str]:
+        """
+        Generate code and yield decoded text as soon as it is available.
+        
+        Args:
+            prompt: Generation prompt
+            max_length: Maximum number of tokens to generate
+            stop_sequences: Strings that end generation early; the matched
+                sequence is not included in the output. Defaults to the end
+                of a markdown code block.
+            
+        Returns:
+            Iterator over decoded text chunks in generation order
+        """
+        return self._stream(self._streamer(stop_sequences), prompt, max_length)
+
+    def _streamer(self, stop_sequences: Optional[Sequence[str]]) -> _TextStreamer:
+        if stop_sequences is None:
+            stop_sequences = DEFAULT_STOP_SEQUENCES
+        return _TextStreamer(self.model.tokenizer, stop_sequences)
+
+    def _stream(self, streamer: _TextStreamer, prompt: str, max_length: int) -> Iterator[str]:
+        """Run generation in a thread and yield the streamer's chunks."""
+        start = time.perf_counter()
+        first_token_at = None
+        worker = threading.Thread(
+            target=self._generate_into,
+            args=(streamer, prompt, max_length),
+            daemon=True
+        )
+        worker.start()
+        
+        try:
+            while True:
+                chunk = streamer.chunks.get()
+                if chunk is _END_OF_STREAM:
+                    break
+                if isinstance(chunk, Exception):
+                    raise RuntimeError(f"Code generation failed: {str(chunk)}")
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield chunk
+        finally:
+            end = time.perf_counter()
+            self.generation_metrics = {
+                'time_to_first_token': (first_token_at or end) - start,
+                'total_latency': end - start,
+                'stopped_early': streamer.stopped,
+                'tokens': len(streamer._token_ids)
+            }
+            # Halts generation when the caller stops iterating early
+            streamer.stopped = True
+
+    async def astream_code(
+        self,
+        prompt: str,
+        max_length: int = 512,
+        stop_sequences: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[str]:
+        """Asynchronous variant of ``stream_code`` for use inside event loops."""
+        loop = asyncio.get_running_loop()
+        streamer = self._streamer(stop_sequences)
+        chunks = self._stream(streamer, prompt, max_length)
+        pending = None
+        try:
+            while True:
+                pending = loop.run_in_executor(None, next, chunks, _END_OF_STREAM)
+                # Shielded, so a cancelled consumer leaves the call running for the cleanup below
+                chunk = await asyncio.shield(pending)
+                pending = None
+                if chunk is _END_OF_STREAM:
+                    break
+                yield chunk
+        finally:
+            if pending is not None:
+                # The generator cannot be closed while next() runs in it; unblock and wait
+                streamer.stop()
+                await asyncio.wait([pending])
+            chunks.close()
+
+    def _generate_into(self, streamer: _TextStreamer, prompt: str, max_length: int) -> None:
+        """Run ``model.generate`` feeding tokens into the streamer."""
+        try:
+            self.model.generate(
+                self._encode_prompt(prompt),
+                max_length=max_length,
+                do_sample=True,
+                top_p=0.95,
+                top_k=50,
+                streamer=streamer,
+                stopping_criteria=[streamer.should_stop]
+            )
+            streamer.end()
+        except Exception as e:
+            streamer.fail(e)
+
+    def _encode_prompt(self, prompt: str):
+        """Tokenize a prompt and move it to the model device."""
+        inputs = self.model.tokenizer.text_to_ids(prompt)
+        return torch.tensor([inputs]).to(self.model.device)
+
     def analyze_code(self, code: str) -> Dict:
         """Analyze code for quality and potential issues."""
         try:
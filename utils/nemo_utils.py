@@ -1,5 +1,6 @@
 from typing import Dict
 import logging
+from utils.tracing import set_attributes, traced
 
 class NeMoUtils:
     """Utility class for NVIDIA NeMo integration."""
@@ -7,6 +8,7 @@ class NeMoUtils:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
+    @traced('process_data')
     def process_data(self, data: Dict) -> Dict:
         """
         Process data using NVIDIA NeMo.
@@ -28,6 +30,7 @@ class NeMoUtils:
                 }
             }
             
+            set_attributes(examples=len(processed_data['structured_examples']))
             return processed_data
             
         except Exception as e:
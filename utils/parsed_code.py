@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+import ast
+import hashlib
+import io
+import tokenize
+
+# Parsed packages kept for re-validation, e.g. the security scan after the syntax check
+PARSE_CACHE_SIZE = 64
+
+
+class ParsedCode:
+    """Source code shared by every check that inspects it.
+
+    Holds the source and its SHA-256, and derives the syntax check, the AST,
+    the token stream, the names it uses and the per-line offsets at most
+    once, on first use, so checks that need none of them pay nothing for them.
+    """
+
+    def __init__(self, source: str, filename: str = '<string>'):
+        self.source = source
+        self.filename = filename
+        self.sha256 = hashlib.sha256(source.encode()).hexdigest()
+        self._tree: Optional[ast.Module] = None
+        self._parse_failed = False
+        self._tokens: Optional[List[tokenize.TokenInfo]] = None
+        self._uses: Optional[Dict[str, int]] = None
+        self._line_offsets: Optional[List[int]] = None
+        self._syntax_errors: Optional[List[str]] = None
+
+    @property
+    def syntax_errors(self) -> List[str]:
+        """Errors from compiling the source, including compile-time ones
+        such as 'return' outside a function."""
+        if self._syntax_errors is None:
+            try:
+                # Reuse the AST if a check already built it; otherwise one pass from source
+                compile(self._tree if self._tree is not None else self.source, self.filename, 'exec')
+                self._syntax_errors = []
+            except SyntaxError as e:
+                self._syntax_errors = [f"Syntax error: {str(e)}"]
+        return self._syntax_errors
+
+    @property
+    def tree(self) -> Optional[ast.Module]:
+        """Module AST, or None when the source does not parse."""
+        if self._tree is None and not self._parse_failed:
+            try:
+                self._tree = ast.parse(self.source, self.filename)
+            except SyntaxError:
+                self._parse_failed = True
+        return self._tree
+
+    @property
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        """Token stream of the source, e.g. for checks that read comments;
+        empty when the source does not tokenize."""
+        if self._tokens is None:
+            try:
+                self._tokens = list(tokenize.generate_tokens(io.StringIO(self.source).readline))
+            except (tokenize.TokenError, SyntaxError):
+                self._tokens = []
+        return self._tokens
+
+    @property
+    def uses(self) -> Dict[str, int]:
+        """First line of each call, keyed 'name(' or 'module.name(', and of
+        each attribute read from a plain name, keyed 'name.'; empty when the
+        source does not parse."""
+        if self._uses is None:
+            self._uses = {}
+            for node in ast.walk(self.tree) if self.tree is not None else ():
+                if isinstance(node, ast.Call) and _dotted_name(node.func):
+                    key = _dotted_name(node.func) + '('
+                elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+                    key = node.value.id + '.'
+                else:
+                    continue
+                self._uses[key] = min(node.lineno, self._uses.get(key, node.lineno))
+        return self._uses
+
+    @property
+    def line_offsets(self) -> List[int]:
+        """Character offset at which each line starts."""
+        if self._line_offsets is None:
+            lengths = (len(line) for line in self.source.splitlines(keepends=True))
+            self._line_offsets = list(accumulate(lengths, initial=0))
+        return self._line_offsets
+
+    def line_number(self, offset: int) -> int:
+        """1-based line containing a character offset."""
+        return bisect_right(self.line_offsets, offset)
+
+    def find(self, text: str) -> Optional[int]:
+        """First line containing ``text``, or None when it does not occur."""
+        index = self.source.find(text)
+        return self.line_number(index) if index >= 0 else None
+
+    def first_use(self, key: str) -> Optional[int]:
+        """
+        First line using a call or attribute key from ``uses``.
+
+        Strings and comments do not count. Source that does not parse is
+        searched as text instead.
+        """
+        if self.tree is None:
+            return self.find(key)
+        return self.uses.get(key)
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    """'a.b.c' for a name or attribute chain, None for anything else."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        base = _dotted_name(node.value)
+        return f"{base}.{node.attr}" if base is not None else None
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_code(source: str, filename: str = '<string>') -> ParsedCode:
+    """ParsedCode for ``source``, shared by all callers passing the same code."""
+    return ParsedCode(source, filename)
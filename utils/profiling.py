@@ -0,0 +1,309 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+import cProfile
+import io
+import logging
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+PROFILES_DIR = Path("data/logs/profiles")
+PROFILE_MODES = ('cpu', 'cprofile', 'memory')
+
+# Characters not kept when a run or job id becomes a directory name
+_UNSAFE_NAME = re.compile(r'[^\w.-]')
+
+# cProfile and tracemalloc hook the whole process, so only one run at a time
+_process_profiler_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+# Sampling profiler of the enclosing cpu profile, seen by pool work through copied contexts
+_active_sampler: ContextVar[Optional['SamplingProfiler']] = ContextVar('active_sampler', default=None)
+
+
+def profile_dir(run_id: str, job_id: Optional[str] = None) -> Path:
+    """Output directory for a run, or for one job of a batch or service run."""
+    path = PROFILES_DIR / _safe_name(run_id)
+    return path / _safe_name(job_id) if job_id is not None else path
+
+
+def _safe_name(name) -> str:
+    """One path component from an id, so ids cannot point outside PROFILES_DIR."""
+    cleaned = _UNSAFE_NAME.sub('_', str(name))
+    # '', '.' and '..' would name the parent directory
+    return cleaned if cleaned.strip('.') else cleaned.replace('.', '_') or '_'
+
+
+def _location(filename: str, lineno: int) -> str:
+    # Keep labels short and free of the ';' stack separator
+    parts = Path(filename).parts
+    short = '/'.join(parts[-2:]) if len(parts) > 1 else filename
+    return f"{short}:{lineno}".replace(';', ':')
+
+
+def _write_collapsed(path: Path, stacks: Dict[Tuple[str, ...], int]) -> None:
+    """Write stacks in the collapsed format read by flamegraph.pl and speedscope."""
+    with open(path, 'w') as f:
+        for stack, weight in sorted(stacks.items()):
+            f.write(f"{';'.join(stack)} {weight}\n")
+
+
+def _format_table(title: str, rows: List[Tuple[str, int]], total: int, unit: str) -> List[str]:
+    lines = [title, '-' * len(title)]
+    for label, value in rows:
+        share = 100.0 * value / total if total else 0.0
+        lines.append(f"{share:6.2f}%  {value:>10} {unit}  {label}")
+    lines.append('')
+    return lines
+
+
+class SamplingProfiler:
+    """Samples call stacks at a fixed interval.
+
+    The profiled thread is sampled, along with any pool thread while it
+    runs work handed over through ``run_sampled``, so time spent on the
+    resilience and speculative pools is attributed to the code that ran
+    there rather than to the caller's wait(). Only the sampled threads pay
+    for it, through the GIL handoffs of the sampler thread, so the overhead
+    is low enough for production runs and several jobs can be sampled
+    concurrently in the service. ``sample_count`` counts stacks, one per
+    sampled thread per tick.
+    """
+
+    mode = 'cpu'
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter[Tuple] = Counter()
+        self.sample_count = 0
+        self.elapsed = 0.0
+        self._targets: Counter[int] = Counter()
+        self._targets_lock = threading.Lock()
+        self._context_token = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self.add_thread(threading.get_ident())
+        self._context_token = _active_sampler.set(self)
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        _active_sampler.reset(self._context_token)
+
+    def add_thread(self, ident: int) -> None:
+        with self._targets_lock:
+            self._targets[ident] += 1
+
+    def remove_thread(self, ident: int) -> None:
+        with self._targets_lock:
+            self._targets[ident] -= 1
+            if not self._targets[ident]:
+                del self._targets[ident]
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._targets_lock:
+                targets = list(self._targets)
+            for ident in targets:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[tuple(stack)] += 1
+                self.sample_count += 1
+
+    def collapsed_stacks(self) -> Dict[Tuple[str, ...], int]:
+        labels: Dict = {}
+        stacks: Counter[Tuple[str, ...]] = Counter()
+        for codes, count in self.samples.items():
+            stack = []
+            for code in codes:
+                if code not in labels:
+                    labels[code] = f"{code.co_name} ({_location(code.co_filename, code.co_firstlineno)})"
+                stack.append(labels[code])
+            stacks[tuple(stack)] += count
+        return stacks
+
+    def write(self, output_dir: Path, top: int = 25) -> List[Path]:
+        stacks = self.collapsed_stacks()
+        collapsed_path = output_dir / 'stacks.collapsed'
+        _write_collapsed(collapsed_path, stacks)
+
+        self_samples: Counter[str] = Counter()
+        total_samples: Counter[str] = Counter()
+        for stack, count in stacks.items():
+            self_samples[stack[-1]] += count
+            for label in set(stack):
+                total_samples[label] += count
+
+        lines = [
+            f"Sampling profile: {self.sample_count} samples every {self.interval * 1000:.1f} ms "
+            f"over {self.elapsed:.3f} s",
+            ''
+        ]
+        lines += _format_table('Self time', self_samples.most_common(top), self.sample_count, 'samples')
+        lines += _format_table('Total time', total_samples.most_common(top), self.sample_count, 'samples')
+        summary_path = output_dir / 'summary.txt'
+        summary_path.write_text('\n'.join(lines))
+        return [collapsed_path, summary_path]
+
+
+class DeterministicProfiler:
+    """cProfile of the calling thread; exact call counts at higher overhead."""
+
+    mode = 'cprofile'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+
+    def write(self, output_dir: Path, top: int = 25) -> List[Path]:
+        stats_path = output_dir / 'profile.pstats'
+        self.profile.dump_stats(str(stats_path))
+
+        report = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=report).strip_dirs()
+        stats.sort_stats('cumulative').print_stats(top)
+        stats.sort_stats('tottime').print_stats(top)
+        summary_path = output_dir / 'summary.txt'
+        summary_path.write_text(report.getvalue())
+        return [stats_path, summary_path]
+
+
+class AllocationProfiler:
+    """Records allocations still alive at the end of the run with tracemalloc."""
+
+    mode = 'memory'
+
+    def __init__(self, frames: int = 32):
+        self.frames = frames
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.peak = 0
+        self._was_tracing = False
+
+    def start(self) -> None:
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+
+    def stop(self) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        self.peak = tracemalloc.get_traced_memory()[1]
+        if not self._was_tracing:
+            tracemalloc.stop()
+        self.snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')
+        ])
+
+    def write(self, output_dir: Path, top: int = 25) -> List[Path]:
+        stacks: Counter[Tuple[str, ...]] = Counter()
+        for stat in self.snapshot.statistics('traceback'):
+            stack = tuple(_location(frame.filename, frame.lineno) for frame in stat.traceback)
+            stacks[stack] += stat.size
+        collapsed_path = output_dir / 'allocations.collapsed'
+        _write_collapsed(collapsed_path, stacks)
+
+        by_line = self.snapshot.statistics('lineno')
+        total = sum(stat.size for stat in by_line)
+        lines = [f"Allocations alive at end of run: {total} bytes, peak traced {self.peak} bytes", '']
+        rows = [(f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} ({stat.count} blocks)", stat.size)
+                for stat in by_line[:top]]
+        lines += _format_table('Allocated by line', rows, total, 'bytes')
+        summary_path = output_dir / 'summary.txt'
+        summary_path.write_text('\n'.join(lines))
+        return [collapsed_path, summary_path]
+
+
+def run_sampled(func: Callable, *args, **kwargs):
+    """
+    Call ``func`` on this thread, sampled by the caller's cpu profile if any.
+
+    Pools run submitted work as ``copy_context().run(run_sampled, func, ...)``,
+    so the caller's profile is found through the copied context.
+    """
+    profiler = _active_sampler.get()
+    if profiler is None:
+        return func(*args, **kwargs)
+    ident = threading.get_ident()
+    profiler.add_thread(ident)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.remove_thread(ident)
+
+
+PROFILERS: Dict[str, Callable] = {
+    'cpu': SamplingProfiler,
+    'cprofile': DeterministicProfiler,
+    'memory': AllocationProfiler
+}
+
+
+@contextmanager
+def profile_run(output_dir: Path, mode: str = 'cpu', top: int = 25):
+    """
+    Profile the enclosed block and write its reports to ``output_dir``.
+
+    Args:
+        output_dir: Directory for the collapsed stacks and summary
+        mode: 'cpu' (sampling), 'cprofile' (deterministic) or 'memory'
+        top: Number of hotspots listed in summary.txt
+
+    Yields:
+        The profiler, or None when a process-wide profiler is already
+        running for another job and this block runs unprofiled
+    """
+    if mode not in PROFILERS:
+        raise ValueError(f"Unknown profile mode: {mode}")
+
+    exclusive = mode != 'cpu'
+    if exclusive and not _process_profiler_lock.acquire(blocking=False):
+        logger.warning(f"Skipping {mode} profile for {output_dir}: another run is being profiled")
+        yield None
+        return
+
+    try:
+        profiler = PROFILERS[mode]()
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            output_dir.mkdir(parents=True, exist_ok=True)
+            paths = profiler.write(output_dir, top)
+            logger.info(f"Wrote {mode} profile: {', '.join(str(path) for path in paths)}")
+    finally:
+        if exclusive:
+            _process_profiler_lock.release()
+
+
+def maybe_profile(mode: Optional[str], output_dir: Path):
+    """profile_run when ``mode`` is set; otherwise a no-op context."""
+    return profile_run(output_dir, mode) if mode else nullcontext()
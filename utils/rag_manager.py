@@ -1,35 +1,75 @@
-from astrapy.db import AstraDB
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader
+from collections import OrderedDict
 from pathlib import Path
+import logging
 import os
-from typing import List, Dict
+import threading
+import uuid
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
-from ..utils.logger import LogManager
+from utils import metrics
+from utils.code_splitter import CodeSplitter
+from utils.lexical_index import BM25Index, has_semantic_content, reciprocal_rank_fusion
+from utils.lazy_import import lazy_import
+from utils.resilience import Dependency, dependency
+from utils.tracing import set_attributes, traced
+
+astrapy_db = lazy_import('astrapy.db')
+langchain_embeddings = lazy_import('langchain.embeddings')
+
+# Query embeddings kept for repeated lookups, e.g. the same code across fix attempts
+EMBEDDING_CACHE_SIZE = 256
+
+# Results fetched from each retriever before fusion, per requested result
+CANDIDATES_PER_RESULT = 4
+
+QUERY_SECONDS = metrics.histogram('rag_query_seconds', 'Duration of get_relevant_context lookups')
+EMBEDDING_CACHE = metrics.counter('rag_embedding_cache_requests_total', 'Query embedding cache lookups', ['result'])
+RETRIEVALS = metrics.counter('rag_retrievals_total', 'get_relevant_context lookups by retrieval mode', ['mode'])
 
 class RAGManager:
     """Manages RAG operations for code generation and validation using AstraDB."""
     
-    def __init__(self):
+    def __init__(self, embeddings=None, collection=None, code_splitter=None, resilience: Optional[Dependency] = None):
+        """
+        Args:
+            embeddings: Object with ``embed_query``; defaults to MiniLM-L6-v2
+            collection: Vector collection with ``insert_one``/``find_many``;
+                defaults to the AstraDB 'code_examples' collection
+            code_splitter: Splitter used to chunk templates; defaults to
+                CodeSplitter, which cuts at class and function boundaries
+            resilience: Deadlines, retries and circuit breaker for collection
+                calls; defaults to the shared 'astradb' dependency
+        """
         load_dotenv()
-        self.logger = LogManager(Path("data/logs")).get_logger(__name__)
-        self.embeddings = HuggingFaceEmbeddings(
+        self.logger = logging.getLogger(__name__)
+        self.resilience = resilience or dependency('astradb')
+        self.embeddings = embeddings or langchain_embeddings.HuggingFaceEmbeddings(
             model_name="sentence-transformers/all-MiniLM-L6-v2"
         )
+        self._embedding_cache: OrderedDict = OrderedDict()
+        # Speculative candidates validate concurrently against one manager
+        self._embedding_cache_lock = threading.Lock()
         
-        # Initialize AstraDB connection
-        self.astra_db = AstraDB(
-            astra_db_id=os.getenv("ASTRA_DB_ID"),
-            astra_db_region=os.getenv("ASTRA_DB_REGION"),
-            astra_token=os.getenv("ASTRA_DB_TOKEN")
-        )
+        # Local BM25 index over everything ingested by this process
+        self.lexical_index = BM25Index()
+        self._documents: Dict[str, Dict] = {}
         
-        # Create collection for code examples
-        self.collection = self.astra_db.create_collection(
-            "code_examples",
-            dimension=384  # Dimension of the MiniLM-L6-v2 embeddings
-        )
+        if collection is None:
+            # Initialize AstraDB connection
+            self.astra_db = astrapy_db.AstraDB(
+                astra_db_id=os.getenv("ASTRA_DB_ID"),
+                astra_db_region=os.getenv("ASTRA_DB_REGION"),
+                astra_token=os.getenv("ASTRA_DB_TOKEN")
+            )
+            
+            # Create collection for code examples
+            collection = self.astra_db.create_collection(
+                "code_examples",
+                dimension=384  # Dimension of the MiniLM-L6-v2 embeddings
+            )
+        self.collection = collection
+        
+        self.code_splitter = code_splitter or CodeSplitter(max_chunk_size=1000)
         
         self.initialize_knowledge_base()
     
@@ -38,49 +78,119 @@ class RAGManager:
         templates_dir = Path(__file__).parent.parent / 'examples' / 'templates'
         
         # Load and process templates
-        for template_file in templates_dir.glob('*.py'):
-            loader = TextLoader(str(template_file))
-            documents = loader.load()
-            
-            # Split documents into chunks
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200
-            )
-            splits = text_splitter.split_documents(documents)
+        for template_file in sorted(templates_dir.glob('*.py')):
+            # Split into one chunk per class or function
+            chunks = self.code_splitter.split(template_file.read_text())
             
             # Store in AstraDB
-            for split in splits:
-                embedding = self.embeddings.embed_query(split.page_content)
-                self.collection.insert_one({
-                    "content": split.page_content,
-                    "metadata": {
-                        "source": template_file.name,
-                        "type": template_file.stem.split('_')[0]  # e.g., 'flask' from 'flask_app.py'
-                    },
-                    "$vector": embedding
+            for chunk in chunks:
+                self.add_document(chunk.content, {
+                    "source": template_file.name,
+                    "type": template_file.stem.split('_')[0],  # e.g., 'flask' from 'flask_app.py'
+                    **chunk.metadata
                 })
         
         self.logger.info("Knowledge base initialized successfully")
     
-    def get_relevant_context(self, query: str, k: int = 3) -> List[Dict]:
-        """Retrieve relevant code examples and patterns from AstraDB."""
-        query_embedding = self.embeddings.embed_query(query)
+    def add_document(self, content: str, metadata: Dict) -> None:
+        """Embed one piece of content, store it in the collection and index its terms."""
+        doc_id = uuid.uuid4().hex
+        embedding = self.embeddings.embed_query(content)
+        self.resilience.call(self.collection.insert_one, {
+            "_id": doc_id,
+            "content": content,
+            "metadata": metadata,
+            "$vector": embedding
+        })
+        self._documents[doc_id] = {'content': content, 'metadata': metadata}
+        self.lexical_index.add(doc_id, content)
+    
+    @traced('rag.get_relevant_context')
+    @QUERY_SECONDS.time()
+    def get_relevant_context(self, query: str, k: int = 3, lexical_fast_path: bool = True) -> List[Dict]:
+        """
+        Retrieve relevant code examples and patterns.
+        
+        BM25 matches on code terms and AstraDB vector matches are merged with
+        reciprocal-rank fusion. Queries without natural language, such as
+        exception names and identifiers from validation errors, skip the
+        embedding and use the lexical matches alone when there are any.
+        
+        Args:
+            query: Code, error text or a description
+            k: Number of results
+            lexical_fast_path: Allow answering from the lexical index alone;
+                callers that need vector similarities pass False
+            
+        Returns:
+            Results with content, metadata and relevance, the vector
+            similarity (0.0 for results found only lexically)
+        """
+        candidates = k * CANDIDATES_PER_RESULT
+        lexical = self.lexical_index.search(query, limit=candidates)
+        
+        if lexical_fast_path and lexical and not has_semantic_content(query):
+            RETRIEVALS.labels(mode='lexical').inc()
+            context = [self._context_item(doc_id) for doc_id, _ in lexical[:k]]
+            set_attributes(k=k, results=len(context), mode='lexical')
+            return context
         
-        results = self.collection.find_many(
+        RETRIEVALS.labels(mode='hybrid').inc()
+        query_embedding = self._embed_query(query)
+        vector = self.resilience.call(
+            self.collection.find_many,
             {"$vector": query_embedding},
-            limit=k
+            limit=candidates,
+            idempotent=True
         )
         
-        return [{
-            'content': doc['content'],
-            'metadata': doc['metadata'],
-            'relevance': doc.get('$similarity', 0.0)  # AstraDB provides similarity scores
-        } for doc in results]
+        vector_docs = {}
+        for position, doc in enumerate(vector):
+            # Documents stored by other processes may lack our ids
+            vector_docs[doc.get('_id', f"vector-{position}")] = doc
+        fused = reciprocal_rank_fusion([list(vector_docs), [doc_id for doc_id, _ in lexical]])
+        
+        context = []
+        for doc_id, _ in fused[:k]:
+            doc = vector_docs.get(doc_id)
+            if doc is None:
+                context.append(self._context_item(doc_id))
+            else:
+                context.append({
+                    'content': doc['content'],
+                    'metadata': doc['metadata'],
+                    'relevance': doc.get('$similarity', 0.0)  # AstraDB provides similarity scores
+                })
+        set_attributes(k=k, results=len(context), mode='hybrid')
+        return context
+    
+    def _context_item(self, doc_id: str) -> Dict:
+        document = self._documents[doc_id]
+        return {'content': document['content'], 'metadata': document['metadata'], 'relevance': 0.0}
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the embedding of a recently seen identical query."""
+        with self._embedding_cache_lock:
+            embedding = self._embedding_cache.get(query)
+            if embedding is not None:
+                self._embedding_cache.move_to_end(query)
+        if embedding is not None:
+            EMBEDDING_CACHE.labels(result='hit').inc()
+            return embedding
+        
+        EMBEDDING_CACHE.labels(result='miss').inc()
+        # Embedded outside the lock, so a slow model call does not serialise lookups
+        embedding = self.embeddings.embed_query(query)
+        with self._embedding_cache_lock:
+            self._embedding_cache[query] = embedding
+            if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        return embedding
     
     def validate_with_context(self, code: str) -> Dict:
         """Validate code using RAG context from AstraDB."""
-        context = self.get_relevant_context(code)
+        # Similar examples are picked by vector similarity, so always embed
+        context = self.get_relevant_context(code, lexical_fast_path=False)
         
         validation_results = {
             'suggestions': [],
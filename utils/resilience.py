@@ -0,0 +1,289 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+import logging
+import random
+import threading
+import time
+from utils import metrics
+from utils.profiling import run_sampled
+
+CALLS = metrics.counter('resilience_calls_total', 'Calls to external dependencies by outcome', ['dependency', 'outcome'])
+RETRIES = metrics.counter('resilience_retries_total', 'Retried attempts', ['dependency'])
+HEDGES = metrics.counter('resilience_hedges_total', 'Hedged attempts started for slow reads', ['dependency'])
+CIRCUIT_OPEN = metrics.gauge('resilience_circuit_open', '1 while a dependency\'s circuit breaker is open', ['dependency'])
+
+# Errors from our own code rather than the dependency; never retried and never trip a breaker
+NON_RETRYABLE = (TypeError, ValueError, KeyError, AttributeError, NotImplementedError)
+
+# Attempts that need a deadline or a hedge run here; an abandoned attempt keeps its thread until it returns
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='resilience')
+
+
+def _submit(func: Callable, *args, **kwargs) -> Future:
+    """Run ``func`` on ``_executor`` in a copy of the caller's context, so spans, priorities and cpu profiles carry over."""
+    return _executor.submit(copy_context().run, run_sampled, func, *args, **kwargs)
+
+
+class CircuitOpenError(Exception):
+    """A call was refused because its dependency's circuit breaker is open."""
+
+    def __init__(self, dependency: str, retry_in: float):
+        super().__init__(f"Circuit for {dependency} is open; retrying in {retry_in:.1f}s")
+        self.dependency = dependency
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(TimeoutError):
+    """A call did not complete within its dependency's timeout."""
+
+
+class Policy(NamedTuple):
+    """How calls to one dependency are bounded, retried, hedged and cut off."""
+
+    timeout: Optional[float] = 10.0  # Seconds per attempt; None waits indefinitely
+    deadline: Optional[float] = 30.0  # Seconds for the call, including retries
+    retries: int = 2
+    backoff: float = 0.1  # Seconds; the ceiling doubles per retry, the delay is drawn below it
+    max_backoff: float = 2.0
+    retry_ratio: float = 0.2  # Retries and hedges allowed per call, long term
+    retry_reserve: float = 10.0  # Burst of retries available on top of the ratio
+    hedge_after: Optional[float] = None  # Seconds before a second read attempt; None disables hedging
+    failure_threshold: int = 5  # Consecutive failures that open the breaker
+    reset_timeout: float = 30.0  # Seconds the breaker stays open before a probe
+
+
+# Per-dependency defaults; reads are hedged after roughly their usual worst-case latency
+DEFAULT_POLICIES: Dict[str, Policy] = {
+    'firecrawl': Policy(timeout=20.0, deadline=60.0, hedge_after=5.0),
+    'astradb': Policy(timeout=5.0, deadline=15.0, hedge_after=0.5),
+    'cassandra': Policy(timeout=5.0, deadline=15.0, hedge_after=0.2),
+    # Sandbox runs carry their own timeout and are not repeatable; the breaker only fails fast
+    'docker': Policy(timeout=None, deadline=None, retries=0)
+}
+
+
+class RetryBudget:
+    """
+    Token bucket capping retries at a fraction of calls.
+
+    Every call deposits ``ratio`` tokens and every retry or hedge withdraws
+    one, so a failing dependency sees at most (1 + ratio) times its normal
+    load plus the ``reserve`` burst, instead of (1 + retries) times.
+    """
+
+    def __init__(self, ratio: float, reserve: float):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.reserve, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while a dependency is down.
+
+    Opens after ``failure_threshold`` consecutive failures. After
+    ``reset_timeout`` one probe call is let through (half-open): success
+    closes the breaker, failure opens it for another ``reset_timeout``.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and retry_in <= 0:
+                # This caller is the probe; others keep failing fast until it reports
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError(self.name, max(retry_in, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                CIRCUIT_OPEN.labels(dependency=self.name).set(0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                CIRCUIT_OPEN.labels(dependency=self.name).set(1)
+
+
+class Dependency:
+    """
+    Calls to one external dependency, with deadlines, jittered retries under
+    a retry budget, a circuit breaker and, for idempotent reads, hedging.
+
+    Use the shared instance from ``dependency(name)`` so that every caller
+    of a dependency trips and respects the same breaker and budget.
+    """
+
+    def __init__(self, name: str, policy: Optional[Policy] = None):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.policy = policy or DEFAULT_POLICIES.get(name, Policy())
+        self.breaker = CircuitBreaker(name, self.policy.failure_threshold, self.policy.reset_timeout)
+        self.budget = RetryBudget(self.policy.retry_ratio, self.policy.retry_reserve)
+        # Recent successful attempt latencies, for the hedge delay
+        self._latencies: deque = deque(maxlen=128)
+
+    def call(
+        self,
+        func: Callable,
+        *args,
+        idempotent: bool = False,
+        hedge: Optional[bool] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Call ``func(*args, **kwargs)`` under this dependency's policy.
+
+        Args:
+            func: The client call
+            idempotent: Whether repeating the call is harmless; only such
+                calls are retried or hedged
+            hedge: Whether a slow attempt may be raced by a second one;
+                defaults to ``idempotent``. Pass False for idempotent writes,
+                which should be retried but not sent twice just for being slow
+
+        Returns:
+            What ``func`` returned
+
+        Raises:
+            CircuitOpenError: The breaker is open; ``func`` was not called
+            DeadlineExceeded: The last attempt timed out
+        """
+        policy = self.policy
+        hedge = idempotent if hedge is None else hedge and idempotent
+        deadline_at = time.monotonic() + policy.deadline if policy.deadline is not None else None
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                self.breaker.allow()
+            except CircuitOpenError:
+                CALLS.labels(dependency=self.name, outcome='rejected').inc()
+                raise
+
+            timeout = policy.timeout
+            if deadline_at is not None:
+                remaining = deadline_at - time.monotonic()
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                result = self._attempt(func, args, kwargs, timeout, hedge and policy.hedge_after is not None)
+            except NON_RETRYABLE:
+                # Raised by our own handling of a response, so the dependency did answer
+                self.breaker.record_success()
+                CALLS.labels(dependency=self.name, outcome='error').inc()
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+                delay = random.uniform(0, min(policy.max_backoff, policy.backoff * 2 ** attempt))
+                out_of_time = deadline_at is not None and time.monotonic() + delay >= deadline_at
+                if not idempotent or attempt >= policy.retries or out_of_time or not self.budget.withdraw():
+                    outcome = 'timeout' if isinstance(e, DeadlineExceeded) else 'failure'
+                    CALLS.labels(dependency=self.name, outcome=outcome).inc()
+                    raise
+                self.logger.warning(f"{self.name} call failed, retrying in {delay:.2f}s: {str(e)}")
+                RETRIES.labels(dependency=self.name).inc()
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # E.g. KeyboardInterrupt; a half-open breaker must not wait forever for its probe
+                self.breaker.record_failure()
+                CALLS.labels(dependency=self.name, outcome='failure').inc()
+                raise
+
+            self.breaker.record_success()
+            CALLS.labels(dependency=self.name, outcome='success').inc()
+            return result
+
+    def hedge_delay(self) -> float:
+        """Seconds before hedging: the 95th percentile of recent latencies, once there are enough."""
+        latencies = sorted(self._latencies)
+        if len(latencies) < 20:
+            return self.policy.hedge_after
+        return latencies[int(len(latencies) * 0.95)]
+
+    def _attempt(self, func: Callable, args, kwargs, timeout: Optional[float], hedge: bool) -> Any:
+        start = time.monotonic()
+        if timeout is None and not hedge:
+            result = func(*args, **kwargs)
+            self._latencies.append(time.monotonic() - start)
+            return result
+        if timeout is not None and timeout <= 0:
+            raise DeadlineExceeded(f"{self.name} call deadline passed")
+
+        pending: List[Future] = [_submit(func, *args, **kwargs)]
+        deadline_at = start + timeout if timeout is not None else None
+        hedge_at = start + self.hedge_delay() if hedge else None
+        error: Optional[BaseException] = None
+        while pending:
+            wake_times = [t for t in (deadline_at, hedge_at) if t is not None]
+            wait_for = max(0.0, min(wake_times) - time.monotonic()) if wake_times else None
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    self._latencies.append(time.monotonic() - start)
+                    return future.result()
+                error = future.exception()
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                if pending and self.budget.withdraw():
+                    HEDGES.labels(dependency=self.name).inc()
+                    pending.append(_submit(func, *args, **kwargs))
+            if deadline_at is not None and time.monotonic() >= deadline_at and pending:
+                raise DeadlineExceeded(f"{self.name} call exceeded {timeout:.2f}s")
+        raise error
+
+
+_dependencies: Dict[str, Dependency] = {}
+_dependencies_lock = threading.Lock()
+
+
+def dependency(name: str) -> Dependency:
+    """The process-wide Dependency for ``name``, using DEFAULT_POLICIES."""
+    with _dependencies_lock:
+        if name not in _dependencies:
+            _dependencies[name] = Dependency(name)
+        return _dependencies[name]
+
+
+def reset_dependencies() -> None:
+    """Forget every breaker, budget and latency history, e.g. between tests."""
+    with _dependencies_lock:
+        _dependencies.clear()
@@ -0,0 +1,414 @@
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+import heapq
+import io
+import itertools
+import logging
+import re
+import tarfile
+import threading
+import time
+import uuid
+from utils import metrics
+from utils.resilience import dependency
+from utils.speculative import CancelToken, Cancelled
+
+# Scratch space inside each sandbox; memory-backed, so nothing reaches the host disk
+SANDBOX_TMPFS = {'/tmp': 'rw,noexec,nosuid,size=64m'}
+
+# Exit code reported for runs killed at their timeout, as for SIGKILL
+KILLED_EXIT_CODE = 137
+
+QUEUE_WAIT_SECONDS = metrics.histogram('sandbox_queue_wait_seconds', 'Time sandbox runs waited for CPU and memory')
+RUN_SECONDS = metrics.histogram('sandbox_run_seconds', 'Duration of sandbox runs')
+REJECTIONS = metrics.counter('sandbox_rejections_total', 'Sandbox runs refused admission', ['reason'])
+KILLS = metrics.counter('sandbox_killed_total', 'Sandbox runs killed at their timeout')
+QUEUED = metrics.gauge('sandbox_queued', 'Sandbox runs waiting for admission')
+RESERVED_CPUS = metrics.gauge('sandbox_reserved_cpus', 'CPUs reserved by running sandboxes')
+RESERVED_MEMORY = metrics.gauge('sandbox_reserved_memory_bytes', 'Memory reserved by running sandboxes')
+
+_priority: ContextVar[int] = ContextVar('sandbox_priority', default=0)
+
+logger = logging.getLogger(__name__)
+
+
+class SandboxResult(NamedTuple):
+    exit_code: int
+    output: str
+    workspace_id: str
+    timed_out: bool = False
+    queue_seconds: float = 0.0
+
+
+class SandboxLimits(NamedTuple):
+    """Per-run cgroup limits and wall-clock timeout."""
+
+    cpus: float = 0.5
+    memory: int = 512 * 1024 ** 2  # Bytes
+    timeout: float = 60.0  # Seconds
+    pids: int = 128
+
+    def container_options(self) -> Dict:
+        return {
+            'nano_cpus': int(self.cpus * 1e9),
+            'mem_limit': self.memory,
+            'memswap_limit': self.memory,  # No swap on top of the memory limit
+            'pids_limit': self.pids
+        }
+
+
+class SandboxRejected(Exception):
+    """A sandbox run was refused admission."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+_MEMORY_UNITS = {'': 1, 'b': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+
+def parse_memory(value: Union[str, int]) -> int:
+    """Bytes in a Docker-style size such as '512m' or '4G'."""
+    if isinstance(value, int):
+        return value
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([bkmg]?)b?\s*', value.lower())
+    if not match:
+        raise ValueError(f"Invalid memory size: {value!r}")
+    return int(float(match.group(1)) * _MEMORY_UNITS[match.group(2)])
+
+
+def build_workspace_archive(files: Dict[str, str], root: str = 'app') -> bytes:
+    """
+    Pack files into an in-memory tar stream rooted at ``root``.
+
+    Args:
+        files: File contents by path relative to the workspace root
+        root: Workspace directory, created in the container by the archive
+
+    Returns:
+        The uncompressed tar archive
+    """
+    buffer = io.BytesIO()
+    mtime = int(time.time())
+    with tarfile.open(fileobj=buffer, mode='w') as archive:
+        directories = {root}
+        for path in files:
+            parts = path.split('/')[:-1]
+            directories.update('/'.join([root] + parts[:i + 1]) for i in range(len(parts)))
+        for directory in sorted(directories):
+            info = tarfile.TarInfo(directory)
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+            info.mtime = mtime
+            archive.addfile(info)
+        for path, content in sorted(files.items()):
+            data = content.encode()
+            info = tarfile.TarInfo(f"{root}/{path}")
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = mtime
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def run_in_sandbox(
+    docker_client,
+    image: str,
+    command: List[str],
+    files: Dict[str, str],
+    workdir: str = '/app',
+    timeout: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+    **create_options
+) -> SandboxResult:
+    """
+    Run ``command`` in a fresh container holding only ``files``.
+
+    The files are streamed into the container before it starts, so no host
+    directory is mounted and concurrent runs never share a path. The
+    container gets a unique name and is removed afterwards, whatever the
+    outcome.
+
+    Args:
+        docker_client: Docker client
+        image: Image to run
+        command: Command run in ``workdir``
+        files: Workspace contents by relative path
+        workdir: Absolute path the workspace is extracted to
+        timeout: Seconds after which the container is killed
+        cancel: Kills the container when cancelled
+        **create_options: Extra ``containers.create`` options, e.g. limits
+
+    Returns:
+        Exit code, combined stdout/stderr and the workspace id; a killed
+        run reports KILLED_EXIT_CODE and timed_out
+    """
+    workspace_id = uuid.uuid4().hex[:12]
+    archive = build_workspace_archive(files, root=workdir.strip('/'))
+    container = docker_client.containers.create(
+        image,
+        command=command,
+        name=f"sandbox-{workspace_id}",
+        working_dir=workdir,
+        network_disabled=True,
+        tmpfs=dict(SANDBOX_TMPFS),
+        labels={'sandbox.workspace': workspace_id},
+        **create_options
+    )
+    stop_on_cancel = None
+    try:
+        container.put_archive('/', archive)
+        container.start()
+        if cancel is not None:
+            stop_on_cancel = cancel.on_cancel(container.kill)
+        started = time.monotonic()
+        timed_out = False
+        try:
+            status = container.wait(timeout=timeout)
+        except Exception:
+            # docker-py surfaces the timeout as a requests ReadTimeout/ConnectionError
+            if timeout is None or time.monotonic() - started < timeout:
+                raise
+            KILLS.inc()
+            logger.warning(f"Killing sandbox-{workspace_id} after {timeout:.0f}s")
+            container.kill()
+            status = {'StatusCode': KILLED_EXIT_CODE}
+            timed_out = True
+        output = container.logs(stdout=True, stderr=True)
+        return SandboxResult(
+            status.get('StatusCode', -1),
+            output.decode(errors='replace') if isinstance(output, bytes) else str(output),
+            workspace_id,
+            timed_out
+        )
+    finally:
+        if stop_on_cancel is not None:
+            stop_on_cancel()
+        container.remove(force=True)
+
+
+def read_workspace_archive(archive: bytes) -> Dict[str, str]:
+    """Regular files in an archive from build_workspace_archive, by path."""
+    files: Dict[str, str] = {}
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        for member in tar.getmembers():
+            if member.isfile():
+                files[member.name] = tar.extractfile(member).read().decode()
+    return files
+
+
+@contextmanager
+def sandbox_priority(priority: int) -> Iterator[None]:
+    """Priority for sandbox runs started in this context; higher runs first."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class SandboxScheduler:
+    """Admission control for sandbox runs against a host CPU and memory budget.
+
+    A run reserves its limits for as long as its container exists. Runs that
+    do not fit wait in a priority queue (higher priority first, then FIFO);
+    the head of the queue is never overtaken, so large runs cannot starve.
+    Runs larger than the whole budget, or arriving when the queue is full,
+    are rejected with SandboxRejected.
+
+    The budget covers the runs of one process: the service's workers share
+    it, while each batch worker process holds its own.
+    """
+
+    def __init__(
+        self,
+        cpu_budget: Optional[float] = None,
+        memory_budget: Optional[Union[str, int]] = None,
+        limits: Optional[SandboxLimits] = None,
+        max_queue: Optional[int] = None
+    ):
+        """
+        Args:
+            cpu_budget: CPUs available to sandboxes; defaults to SANDBOX_CPU_BUDGET
+            memory_budget: Bytes or a size like '4g'; defaults to SANDBOX_MEMORY_BUDGET
+            limits: Default per-run limits; defaults to SANDBOX_CPUS,
+                SANDBOX_MEMORY and SANDBOX_TIMEOUT
+            max_queue: Runs allowed to wait; defaults to SANDBOX_MAX_QUEUE
+        """
+        if None in (cpu_budget, memory_budget, limits, max_queue):
+            from config import settings
+            config = settings.SANDBOX_CONFIG
+            cpu_budget = cpu_budget if cpu_budget is not None else config['cpu_budget']
+            memory_budget = memory_budget if memory_budget is not None else config['memory_budget']
+            limits = limits or SandboxLimits(config['cpus'], parse_memory(config['memory']), config['timeout'])
+            max_queue = max_queue if max_queue is not None else config['max_queue']
+        self.cpu_budget = float(cpu_budget)
+        self.memory_budget = parse_memory(memory_budget)
+        self.limits = limits
+        self.max_queue = max_queue
+
+        self._cpus = 0.0
+        self._memory = 0
+        self._running = 0
+        self._waiting: List = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                'running': self._running,
+                'queued': len(self._waiting),
+                'reserved_cpus': self._cpus,
+                'reserved_memory': self._memory,
+                'cpu_budget': self.cpu_budget,
+                'memory_budget': self.memory_budget
+            }
+
+    def _fits(self, limits: SandboxLimits) -> bool:
+        # Float sums of fractional CPUs can overshoot the budget by a rounding error
+        return (self._cpus + limits.cpus <= self.cpu_budget + 1e-9
+                and self._memory + limits.memory <= self.memory_budget)
+
+    def _reject(self, reason: str, message: str) -> None:
+        REJECTIONS.labels(reason=reason).inc()
+        raise SandboxRejected(reason, message)
+
+    def _leave_queue(self, entry: tuple) -> None:
+        """Drop a waiting entry; called with the condition held."""
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+        self._condition.notify_all()
+
+    def _wake_waiters(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+
+    @contextmanager
+    def reserve(
+        self,
+        limits: Optional[SandboxLimits] = None,
+        priority: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None
+    ) -> Iterator[float]:
+        """
+        Hold CPU and memory for ``limits`` while the block runs.
+
+        Args:
+            limits: Resources to reserve; the scheduler default when omitted
+            priority: Higher is admitted first; the sandbox_priority context when omitted
+            queue_timeout: Seconds to wait for admission before rejecting
+            cancel: Leaves the queue as soon as it is cancelled
+
+        Yields:
+            Seconds spent waiting for admission
+
+        Raises:
+            SandboxRejected: With reason 'too_large', 'queue_full' or 'queue_timeout'
+            Cancelled: ``cancel`` was cancelled before the run was admitted
+        """
+        limits = limits or self.limits
+        priority = _priority.get() if priority is None else priority
+        if limits.cpus > self.cpu_budget or limits.memory > self.memory_budget:
+            self._reject('too_large', f"Sandbox limits {limits} exceed the host budget")
+
+        start = time.monotonic()
+        # Wakes the wait below so a cancelled run leaves the queue at once
+        unregister = cancel.on_cancel(self._wake_waiters) if cancel is not None else None
+        try:
+            with self._condition:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                entry = (-priority, next(self._sequence))
+                if self._waiting or not self._fits(limits):
+                    if len(self._waiting) >= self.max_queue:
+                        self._reject('queue_full', f"Sandbox queue is full ({self.max_queue} waiting)")
+                    heapq.heappush(self._waiting, entry)
+                    QUEUED.inc()
+                    deadline = start + queue_timeout if queue_timeout is not None else None
+                    try:
+                        while self._waiting[0] != entry or not self._fits(limits):
+                            if cancel is not None and cancel.cancelled:
+                                self._leave_queue(entry)
+                                cancel.raise_if_cancelled()
+                            remaining = deadline - time.monotonic() if deadline is not None else None
+                            if remaining is not None and remaining <= 0:
+                                self._leave_queue(entry)
+                                self._reject('queue_timeout', f"No sandbox capacity within {queue_timeout}s")
+                            self._condition.wait(remaining)
+                        heapq.heappop(self._waiting)
+                    finally:
+                        QUEUED.dec()
+                    # The next waiter may fit in what is left
+                    self._condition.notify_all()
+                self._cpus += limits.cpus
+                self._memory += limits.memory
+                self._running += 1
+        finally:
+            if unregister is not None:
+                unregister()
+        RESERVED_CPUS.inc(limits.cpus)
+        RESERVED_MEMORY.inc(limits.memory)
+
+        waited = time.monotonic() - start
+        QUEUE_WAIT_SECONDS.observe(waited)
+        try:
+            yield waited
+        finally:
+            with self._condition:
+                self._cpus -= limits.cpus
+                self._memory -= limits.memory
+                self._running -= 1
+                self._condition.notify_all()
+            RESERVED_CPUS.dec(limits.cpus)
+            RESERVED_MEMORY.dec(limits.memory)
+
+    def run(
+        self,
+        docker_client,
+        image: str,
+        command: List[str],
+        files: Dict[str, str],
+        limits: Optional[SandboxLimits] = None,
+        priority: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None
+    ) -> SandboxResult:
+        """
+        run_in_sandbox once CPU and memory are available, under cgroup limits and a timeout.
+        
+        Docker errors count towards the 'docker' circuit breaker; while it is
+        open, runs fail fast with CircuitOpenError. A run cancelled while
+        queued leaves the queue and raises Cancelled without starting.
+        """
+        limits = limits or self.limits
+        with self.reserve(limits, priority, queue_timeout, cancel) as waited:
+            with RUN_SECONDS.time():
+                result = dependency('docker').call(
+                    run_in_sandbox,
+                    docker_client,
+                    image,
+                    command,
+                    files,
+                    timeout=limits.timeout,
+                    cancel=cancel,
+                    **limits.container_options()
+                )
+        return result._replace(queue_seconds=waited)
+
+
+_scheduler: Optional[SandboxScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> SandboxScheduler:
+    """Process-wide scheduler configured from settings, created on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = SandboxScheduler()
+    return _scheduler
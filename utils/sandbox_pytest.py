@@ -0,0 +1,169 @@
+"""
+Sharded pytest runner with per-test function coverage, run inside sandboxes.
+
+This file is copied into the sandbox workspace as ``_sandbox_pytest.py`` and
+must run on the sandbox image's Python (3.9) with only pytest installed.
+
+As a script it reads ``_impact.json`` from the working directory::
+
+    {"select": null | ["test_app.py::test_x", ...],
+     "shards": 2,
+     "durations": {"test_app.py::test_x": 0.12, ...}}
+
+spreads the tests over up to ``shards`` pytest processes and prints the
+merged report on a single line after REPORT_MARKER. Selected tests are
+assigned longest first by their previous durations, and only as many shards
+are started as there is work for; with no selection every shard collects
+the whole suite and keeps every n-th test, and without durations to size
+the suite by a single shard runs it. Loaded with ``-p`` it is the
+pytest plugin each shard runs with: it records every test's outcome, duration
+and the workspace functions it called.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPORT_MARKER = '@@SANDBOX_TEST_REPORT@@'
+PLUGIN = '_sandbox_pytest'
+CONFIG_FILE = '_impact.json'
+
+# Expected test time below which another shard costs more than it saves
+MIN_SHARD_SECONDS = 1.0
+
+_ROOT = os.getcwd()
+_results = {}
+
+
+def _covered_name(code):
+    """'app.py:create_app' for functions defined in non-test workspace files."""
+    path = code.co_filename
+    if not path.startswith(_ROOT + os.sep):
+        return None
+    relative = os.path.relpath(path, _ROOT).replace(os.sep, '/')
+    base = os.path.basename(relative)
+    if base.startswith(('test_', '_sandbox')) or base == 'conftest.py':
+        return None
+    return f"{relative}:{code.co_name}"
+
+
+def pytest_collection_modifyitems(session, config, items):
+    shard = os.environ.get('SANDBOX_TEST_SHARD')
+    if shard:
+        index, count = (int(part) for part in shard.split('/'))
+        kept = items[index::count]
+        config.hook.pytest_deselected(items=[item for item in items if item not in kept])
+        items[:] = kept
+
+
+def pytest_runtest_protocol(item, nextitem):
+    covered = set()
+    seen = {}
+
+    def profile(frame, event, arg):
+        if event == 'call':
+            code = frame.f_code
+            name = seen.get(code, False)
+            if name is False:
+                name = seen[code] = _covered_name(code)
+            if name is not None:
+                covered.add(name)
+
+    _results[item.nodeid] = {'outcome': 'passed', 'duration': 0.0, 'covered': []}
+    start = time.perf_counter()
+    sys.setprofile(profile)
+    try:
+        # Run the default protocol with the profiler active
+        item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+        from _pytest.runner import runtestprotocol
+        runtestprotocol(item, nextitem=nextitem, log=True)
+        item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    finally:
+        sys.setprofile(None)
+    _results[item.nodeid]['duration'] = time.perf_counter() - start
+    _results[item.nodeid]['covered'] = sorted(covered)
+    return True
+
+
+def pytest_runtest_logreport(report):
+    if report.failed and report.nodeid in _results:
+        _results[report.nodeid]['outcome'] = 'failed'
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = os.environ.get('SANDBOX_TEST_REPORT')
+    if path:
+        with open(path, 'w') as f:
+            json.dump(_results, f)
+
+
+def _shard(tests, shards, durations):
+    """Longest-processing-time-first assignment to the least loaded shard."""
+    known = [durations[test] for test in tests if test in durations]
+    default = sorted(known)[len(known) // 2] if known else 1.0
+    expected = sum(durations.get(test, default) for test in tests)
+    shards = min(shards, len(tests), int(expected / MIN_SHARD_SECONDS) or 1)
+    buckets = [[0.0, []] for _ in range(max(1, shards))]
+    for test in sorted(tests, key=lambda test: durations.get(test, default), reverse=True):
+        bucket = min(buckets, key=lambda bucket: bucket[0])
+        bucket[0] += durations.get(test, default)
+        bucket[1].append(test)
+    return [bucket[1] for bucket in buckets if bucket[1]]
+
+
+def _plan(tests, shards, durations):
+    """Test ids per shard; empty lists when shards keep every n-th collected test instead."""
+    if tests is not None:
+        return _shard(tests, shards, durations)
+    # Every shard collects the suite and keeps its share of it
+    expected = sum(durations.values())
+    return [[] for _ in range(max(1, min(shards, int(expected / MIN_SHARD_SECONDS))))]
+
+
+def main():
+    with open(CONFIG_FILE) as f:
+        config = json.load(f)
+    start = time.perf_counter()
+    shards = max(1, config.get('shards', 1))
+    tests = config.get('select')
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    plan = _plan(tests, shards, config.get('durations', {}))
+
+    report_dir = tempfile.mkdtemp()
+    processes = []
+    for index, shard in enumerate(plan):
+        shard_env = dict(env, SANDBOX_TEST_REPORT=os.path.join(report_dir, f"{index}.json"))
+        if tests is None and len(plan) > 1:
+            shard_env['SANDBOX_TEST_SHARD'] = f"{index}/{len(plan)}"
+        processes.append((shard_env['SANDBOX_TEST_REPORT'], subprocess.Popen(
+            [sys.executable, '-m', 'pytest', '-q', '-p', PLUGIN, '-p', 'no:cacheprovider'] + shard,
+            env=shard_env
+        )))
+
+    results = {}
+    exit_code = 0
+    for path, process in processes:
+        code = process.wait()
+        # 5 (no tests) is expected only of a shard whose every n-th share was empty
+        if code != 0 and not (code == 5 and tests is None and len(plan) > 1):
+            exit_code = exit_code or code
+        if os.path.exists(path):
+            with open(path) as f:
+                results.update(json.load(f))
+    if tests is None and not results:
+        # No shard collected anything: the suite itself is empty
+        exit_code = exit_code or 5
+    report = {
+        'tests': results,
+        'shards': len(processes),
+        'wall_seconds': time.perf_counter() - start
+    }
+    print(REPORT_MARKER + json.dumps(report), flush=True)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
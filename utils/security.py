@@ -1,30 +1,90 @@
-from typing import Dict, List
-import docker
-import os
+from typing import Callable, Dict, List, Optional
+from collections import OrderedDict
+import copy
+import hashlib
 import subprocess
-from pathlib import Path
-import tempfile
 import json
-import bandit
-from safety.safety import check as safety_check
+import threading
+import time
+import uuid
+from utils import metrics
+from utils.lazy_import import lazy_import
+from utils.parsed_code import ParsedCode, parse_code
+from utils.sandbox import SANDBOX_TMPFS, build_workspace_archive
+from utils.tracing import set_attributes, span, traced
+
+docker = lazy_import('docker')
+
+# Image the validator runs generated code in
+SANDBOX_IMAGE = 'python:3.9-slim'
+
+# Bandit results kept by code hash, so re-validating the same code skips the subprocess
+BANDIT_CACHE_SIZE = 128
+
+# Seconds a Docker posture is reused before the image and daemon are fingerprinted again
+DOCKER_POSTURE_TTL = 60.0
+
+# Daemon settings the posture checks depend on, plus its identity
+DAEMON_FINGERPRINT_FIELDS = ('ID', 'ServerVersion', 'MemoryLimit', 'CpuCfsQuota', 'SecurityOptions')
+
+CHECK_SECONDS = metrics.histogram('security_check_seconds', 'Duration of each security scan step', ['check'])
+POSTURE_LOOKUPS = metrics.counter(
+    'security_posture_lookups_total',
+    'Docker posture lookups: reused, revalidated against fingerprints, or inspected',
+    ['result']
+)
 
 class SecurityManager:
     """Manages security aspects of code execution and validation."""
     
-    def __init__(self):
-        self.docker_client = docker.from_env()
+    def __init__(
+        self,
+        docker_client=None,
+        command_runner: Optional[Callable] = None,
+        posture_ttl: float = DOCKER_POSTURE_TTL
+    ):
+        """
+        Args:
+            docker_client: Docker client; defaults to one configured from the environment
+            command_runner: subprocess.run compatible callable used to run bandit and safety
+            posture_ttl: Seconds the Docker posture is reused before checking
+                whether the image or daemon changed; 0 checks on every scan
+        """
+        self.docker_client = docker_client or docker.from_env()
+        self.run_command = command_runner or subprocess.run
+        self.posture_ttl = posture_ttl
+        # Shared by parallel validations
+        self._bandit_cache: OrderedDict = OrderedDict()
+        self._bandit_lock = threading.Lock()
+        # (fingerprint, findings, time verified) of the last Docker posture inspection
+        self._posture: Optional[tuple] = None
+        self._posture_lock = threading.Lock()
         
-    def create_secure_environment(self, code_package: Dict) -> Path:
-        """Create a secure environment for code execution."""
-        # Create isolated directory
-        env_path = Path('/tmp/secure_env')
-        env_path.mkdir(exist_ok=True)
+    def create_secure_environment(self, code_package: Dict) -> Dict:
+        """
+        Create an isolated per-job environment for code execution.
         
-        # Set up environment
-        self._setup_environment(env_path, code_package)
+        The code is packed into an in-memory archive for /app/code and
+        /app/data is a private tmpfs, so concurrent jobs never share a path
+        and nothing is written to the host disk.
         
-        return env_path
+        Returns:
+            workspace_id, the tar ``archive`` to put at '/' and the
+            ``container_options`` to create the container with
+        """
+        workspace_id = uuid.uuid4().hex[:12]
+        return {
+            'workspace_id': workspace_id,
+            'archive': build_workspace_archive({'code/app.py': code_package.get('code', '')}),
+            'container_options': {
+                'name': f"sandbox-{workspace_id}",
+                'working_dir': '/app/code',
+                'network_disabled': True,
+                'tmpfs': {**SANDBOX_TMPFS, '/app/data': 'rw,noexec,nosuid,size=64m'}
+            }
+        }
         
+    @traced('security_scan')
     def run_security_scan(self, code_package: Dict) -> Dict:
         """Run comprehensive security scan."""
         results = {
@@ -33,38 +93,110 @@ class SecurityManager:
             'dependency_issues': [],
             'code_issues': []
         }
+        parsed = parse_code(code_package.get('code', ''))
         
         # Run security checks
-        self._check_dependencies(code_package, results)
-        self._run_bandit_scan(code_package['code'], results)
-        self._check_docker_security(results)
+        with span('security_scan.dependencies'), CHECK_SECONDS.labels(check='safety').time():
+            self._check_dependencies(code_package, results)
+        with span('security_scan.bandit'), CHECK_SECONDS.labels(check='bandit').time():
+            self._run_bandit_scan(parsed, results)
+        with span('security_scan.docker'), CHECK_SECONDS.labels(check='docker').time():
+            self._check_docker_security(results)
+        with span('security_scan.patterns'), CHECK_SECONDS.labels(check='patterns').time():
+            self._scan_for_vulnerabilities(parsed, results)
+            self._check_permissions(parsed, results)
         
+        set_attributes(
+            vulnerabilities=len(results['vulnerabilities']),
+            code_issues=len(results['code_issues'])
+        )
         return results
     
-    def _run_bandit_scan(self, code: str, results: Dict) -> None:
+    def _run_bandit_scan(self, parsed: ParsedCode, results: Dict) -> None:
         """Run Bandit security scanner on code."""
+        with self._bandit_lock:
+            cached = self._bandit_cache.get(parsed.sha256)
+            if cached is not None:
+                self._bandit_cache.move_to_end(parsed.sha256)
+        if cached is not None:
+            results['code_issues'].extend(copy.deepcopy(cached))
+            return
+        
         try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py') as temp_file:
-                temp_file.write(code)
-                temp_file.flush()
-                
-                # Run Bandit scan
-                cmd = f"bandit -r {temp_file.name} -f json"
-                output = subprocess.check_output(cmd, shell=True)
-                scan_results = json.loads(output)
-                
-                # Process results
-                for issue in scan_results['results']:
-                    results['code_issues'].append({
-                        'severity': issue['issue_severity'],
-                        'confidence': issue['issue_confidence'],
-                        'description': issue['issue_text']
-                    })
+            # Code is piped on stdin ('-'), so no copy is written to the host disk.
+            # Bandit exits non-zero when it finds issues.
+            process = self.run_command(
+                ['bandit', '-f', 'json', '-'],
+                input=parsed.source,
+                capture_output=True,
+                text=True
+            )
+            scan_results = json.loads(process.stdout)
+            
+            # Process results
+            issues = [{
+                'severity': issue['issue_severity'],
+                'confidence': issue['issue_confidence'],
+                'description': issue['issue_text']
+            } for issue in scan_results['results']]
         except Exception as e:
             results['vulnerabilities'].append(f"Bandit scan failed: {str(e)}")
+            return
+        
+        results['code_issues'].extend(issues)
+        with self._bandit_lock:
+            self._bandit_cache[parsed.sha256] = copy.deepcopy(issues)
+            if len(self._bandit_cache) > BANDIT_CACHE_SIZE:
+                self._bandit_cache.popitem(last=False)
     
     def _check_docker_security(self, results: Dict) -> None:
-        """Check Docker configuration security."""
+        """
+        Check Docker configuration security.
+        
+        The findings depend only on the sandbox image and the daemon, so they
+        are cached by image ID and daemon fingerprint. Within ``posture_ttl``
+        they are reused without contacting the daemon; after it, the two
+        fingerprints are fetched and the checks re-run only if one changed.
+        """
+        with self._posture_lock:
+            now = time.monotonic()
+            if self._posture is not None and now - self._posture[2] < self.posture_ttl:
+                POSTURE_LOOKUPS.labels(result='reused').inc()
+                findings = self._posture[1]
+            else:
+                fingerprint = self._docker_fingerprint()
+                if self._posture is not None and fingerprint is not None and fingerprint == self._posture[0]:
+                    POSTURE_LOOKUPS.labels(result='revalidated').inc()
+                    findings = self._posture[1]
+                else:
+                    POSTURE_LOOKUPS.labels(result='inspected').inc()
+                    findings = self._inspect_docker_security()
+                    # A failed check says nothing about the posture; try again next scan
+                    if not findings['complete']:
+                        fingerprint = None
+                self._posture = (fingerprint, findings, now) if fingerprint is not None else None
+        
+        results['vulnerabilities'].extend(findings['vulnerabilities'])
+        results['security_score'] *= findings['security_score']
+    
+    def invalidate_docker_posture(self) -> None:
+        """Inspect the Docker configuration again on the next scan."""
+        with self._posture_lock:
+            self._posture = None
+    
+    def _docker_fingerprint(self) -> Optional[str]:
+        """Sandbox image ID plus a digest of the daemon settings the checks read."""
+        try:
+            image_id = self.docker_client.images.get(SANDBOX_IMAGE).id
+            info = self.docker_client.info()
+        except Exception:
+            return None
+        daemon = json.dumps({field: info.get(field) for field in DAEMON_FINGERPRINT_FIELDS}, sort_keys=True)
+        return f"{image_id}:{hashlib.sha256(daemon.encode()).hexdigest()}"
+    
+    def _inspect_docker_security(self) -> Dict:
+        """Run the Docker checks; their findings, score factor and whether all of them ran."""
+        results = {'vulnerabilities': [], 'security_score': 1.0, 'complete': True}
         security_checks = [
             ('User directive', self._check_docker_user),
             ('Resource limits', self._check_resource_limits),
@@ -78,26 +210,41 @@ class SecurityManager:
                 results['vulnerabilities'].append(
                     f"Docker security check '{check_name}' failed: {str(e)}"
                 )
+                results['complete'] = False
+        return results
+    
+    def _check_docker_user(self, results: Dict) -> None:
+        """Flag a sandbox image that runs as root."""
+        image = self.docker_client.images.get(SANDBOX_IMAGE)
+        user = image.attrs.get('Config', {}).get('User') or 'root'
+        if user.split(':')[0] in ('root', '0'):
+            results['vulnerabilities'].append(f"Sandbox image {SANDBOX_IMAGE} runs as root")
+            results['security_score'] *= 0.9
+    
+    def _check_resource_limits(self, results: Dict) -> None:
+        """Flag a daemon that cannot enforce container memory and CPU limits."""
+        info = self.docker_client.info()
+        missing = [feature for feature in ('MemoryLimit', 'CpuCfsQuota') if not info.get(feature)]
+        if missing:
+            results['vulnerabilities'].append(
+                f"Docker daemon cannot enforce resource limits: {', '.join(missing)}"
+            )
+            results['security_score'] *= 0.9
+    
+    def _check_security_opts(self, results: Dict) -> None:
+        """Flag a daemon running containers without a seccomp profile."""
+        options = self.docker_client.info().get('SecurityOptions') or []
+        if not any('seccomp' in option for option in options):
+            results['vulnerabilities'].append("Docker daemon has no seccomp profile enabled")
+            results['security_score'] *= 0.9
     
-    def _setup_environment(self, env_path: Path, code_package: Dict) -> None:
-        """Set up secure environment with necessary restrictions."""
-        # Create necessary files
-        (env_path / 'code').mkdir(exist_ok=True)
-        (env_path / 'data').mkdir(exist_ok=True)
-        
-        # Set up Docker volume mounts
-        self.volume_config = {
-            str(env_path / 'code'): {'bind': '/app/code', 'mode': 'ro'},
-            str(env_path / 'data'): {'bind': '/app/data', 'mode': 'rw'}
-        }
-        
     def _check_dependencies(self, code_package: Dict, results: Dict) -> None:
         """Check dependencies for known vulnerabilities."""
         try:
             # Run safety check on dependencies
             deps = code_package.get('dependencies', {}).get('requirements', [])
             for dep in deps:
-                process = subprocess.run(
+                process = self.run_command(
                     ['safety', 'check', dep],
                     capture_output=True,
                     text=True
@@ -111,8 +258,8 @@ class SecurityManager:
             results['vulnerabilities'].append(f"Dependency check failed: {str(e)}")
             results['security_score'] *= 0.7
             
-    def _scan_for_vulnerabilities(self, code_package: Dict, results: Dict) -> None:
-        """Scan code for potential security vulnerabilities."""
+    def _scan_for_vulnerabilities(self, parsed: ParsedCode, results: Dict) -> None:
+        """Scan code for calls to potentially dangerous functions."""
         dangerous_patterns = [
             'eval(',
             'exec(',
@@ -123,16 +270,16 @@ class SecurityManager:
             'pickle.loads('
         ]
         
-        code = code_package.get('code', '')
         for pattern in dangerous_patterns:
-            if pattern in code:
+            line = parsed.first_use(pattern)
+            if line is not None:
                 results['vulnerabilities'].append(
-                    f"Potentially dangerous function used: {pattern}"
+                    f"Potentially dangerous function used: {pattern} (line {line})"
                 )
                 results['security_score'] *= 0.9
                 
-    def _check_permissions(self, code_package: Dict, results: Dict) -> None:
-        """Check for excessive permission requirements."""
+    def _check_permissions(self, parsed: ParsedCode, results: Dict) -> None:
+        """Check for calls and attribute uses needing extra permissions."""
         sensitive_operations = [
             'os.chmod(',
             'os.access(',
@@ -142,10 +289,10 @@ class SecurityManager:
             'socket.'
         ]
         
-        code = code_package.get('code', '')
         for op in sensitive_operations:
-            if op in code:
+            line = parsed.first_use(op)
+            if line is not None:
                 results['vulnerabilities'].append(
-                    f"Sensitive operation detected: {op}"
+                    f"Sensitive operation detected: {op} (line {line})"
                 )
                 results['security_score'] *= 0.95 
\ No newline at end of file
@@ -0,0 +1,243 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+import logging
+import math
+import threading
+from utils import metrics
+from utils.profiling import run_sampled
+
+RUNS = metrics.counter('speculative_runs_total', 'Speculative generate-and-validate runs by outcome', ['result'])
+CANDIDATES = metrics.counter('speculative_candidates_total', 'Speculative candidates by outcome', ['outcome'])
+CANDIDATE_COUNT = metrics.histogram(
+    'speculative_candidate_count',
+    'Candidates generated per speculative run',
+    buckets=(1, 2, 3, 4, 6, 8)
+)
+
+# Chance of at least one passing candidate the tuner sizes runs for
+TARGET_PASS_PROBABILITY = 0.9
+MAX_CANDIDATES = 4
+# Recent outcomes per app kind the pass rate is estimated from
+PASS_RATE_WINDOW = 50
+
+
+class Cancelled(Exception):
+    """Work was abandoned because its CancelToken was cancelled."""
+
+
+class CancelToken:
+    """
+    Shared flag telling concurrent work that its result is no longer needed.
+
+    Long-running steps register a callback, e.g. killing their container,
+    that runs as soon as the token is cancelled; short steps just call
+    ``raise_if_cancelled`` between stages.
+    """
+
+    def __init__(self):
+        self._cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.warning(f"Cancel callback failed: {str(e)}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run ``callback`` on cancel, at once if already cancelled.
+
+        Returns:
+            A function unregistering the callback, for when the work ends first
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled:
+            raise Cancelled("Cancelled: another candidate passed")
+
+    def _unregister(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class PassRateTuner:
+    """
+    Chooses how many candidates to generate from measured pass rates.
+
+    Keeps the last ``window`` validation outcomes per app kind and picks the
+    smallest N with 1 - (1 - p)^N >= ``target``, p being the pass rate
+    smoothed towards 1/2 while there are few outcomes. Only candidates that
+    finished are counted; cancelled ones never report.
+    """
+
+    def __init__(
+        self,
+        target: float = TARGET_PASS_PROBABILITY,
+        max_candidates: int = MAX_CANDIDATES,
+        window: int = PASS_RATE_WINDOW
+    ):
+        self.target = target
+        self.max_candidates = max_candidates
+        self.window = window
+        self._outcomes: Dict[Tuple, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: Tuple, passed: bool) -> None:
+        with self._lock:
+            outcomes = self._outcomes.setdefault(kind, deque(maxlen=self.window))
+            outcomes.append(passed)
+
+    def pass_rate(self, kind: Tuple) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes.get(kind, ()))
+        # One pass and one failure as a prior
+        return (sum(outcomes) + 1) / (len(outcomes) + 2)
+
+    def candidates(self, kind: Tuple) -> int:
+        pass_rate = self.pass_rate(kind)
+        if pass_rate >= self.target:
+            return 1
+        needed = math.ceil(math.log(1 - self.target) / math.log(1 - pass_rate))
+        return max(1, min(self.max_candidates, needed))
+
+
+class SpeculativeValidator:
+    """
+    Generates several candidate packages and validates them concurrently.
+
+    The first candidate to pass wins and the others are cancelled: queued
+    validations never start, running ones stop at their next check and
+    their sandbox containers are killed. If none passes, the candidate with
+    the fewest errors is returned. Replaces one generate_code call followed
+    by validate_code, whose failures cost a serial fix-and-revalidate cycle.
+    """
+
+    def __init__(
+        self,
+        generator,
+        validator,
+        candidates: Optional[int] = None,
+        tuner: Optional[PassRateTuner] = None
+    ):
+        """
+        Args:
+            generator: CodeGenerator producing the candidates
+            validator: CodeValidator checking them; must accept ``cancel``
+            candidates: Fixed candidate count; tuned from pass rates when omitted
+            tuner: Pass-rate tuner, shared by the runs of a process
+        """
+        self.logger = logging.getLogger(__name__)
+        self.generator = generator
+        self.validator = validator
+        self.fixed_candidates = candidates
+        self.tuner = tuner or PassRateTuner()
+        max_workers = candidates or self.tuner.max_candidates
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='speculative')
+
+    def candidate_count(self, requirements: Dict) -> int:
+        """Candidates to generate: the configured or tuned count, capped at the distinct variants."""
+        count = self.fixed_candidates or self.tuner.candidates(self._kind(requirements))
+        return min(count, len(self.generator.candidate_variants(requirements)))
+
+    def generate(self, requirements: Dict, structured_data: Dict) -> List[Dict]:
+        """Generate the candidates concurrently, in variant order."""
+        count = self.candidate_count(requirements)
+        CANDIDATE_COUNT.observe(count)
+        futures = [
+            self._submit(self.generator.generate_code, requirements, structured_data, variant)
+            for variant in range(count)
+        ]
+        return [future.result() for future in futures]
+
+    def validate(self, candidates: List[Dict]) -> Tuple[Dict, Dict]:
+        """
+        Validate ``candidates`` concurrently until one passes.
+
+        Args:
+            candidates: Code packages from ``generate``
+
+        Returns:
+            The chosen package and its validation results; the results carry
+            a 'speculation' summary of the run
+        """
+        try:
+            token = CancelToken()
+            futures = {
+                self._submit(self.validator.validate_code, candidate, cancel=token): index
+                for index, candidate in enumerate(candidates)
+            }
+            finished: Dict[int, Dict] = {}
+            winner = None
+            pending = set(futures)
+            while pending and winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=futures.get):
+                    index = futures[future]
+                    results = future.result()
+                    finished[index] = results
+                    self.tuner.record(self._kind(candidates[index]), results['valid'])
+                    CANDIDATES.labels(outcome='passed' if results['valid'] else 'failed').inc()
+                    if results['valid'] and winner is None:
+                        winner = index
+
+            # Losers still queued never start; running ones stop at their next check
+            token.cancel()
+            for future in pending:
+                future.cancel()
+            CANDIDATES.labels(outcome='cancelled').inc(len(pending))
+
+            if winner is None:
+                winner = min(finished, key=lambda index: (len(finished[index]['errors']), index))
+            RUNS.labels(result='valid' if finished[winner]['valid'] else 'invalid').inc()
+            results = dict(finished[winner])
+            results['speculation'] = {
+                'candidates': len(candidates),
+                'validated': len(finished),
+                'cancelled': len(pending),
+                'winner': winner
+            }
+            return candidates[winner], results
+
+        except Exception as e:
+            RUNS.labels(result='error').inc()
+            self.logger.error(f"Error in speculative validation: {str(e)}")
+            raise
+
+    def close(self) -> None:
+        """Shut the candidate pool down; queued candidates are cancelled."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _submit(self, func: Callable, *args, **kwargs):
+        """Run ``func`` on the pool in a copy of the caller's context (trace span, sandbox priority, cpu profile)."""
+        return self._executor.submit(copy_context().run, run_sampled, func, *args, **kwargs)
+
+    def _kind(self, requirements_or_package: Dict) -> Tuple:
+        """(framework, type) of a requirements dict or a generated package."""
+        if 'framework' in requirements_or_package:
+            return requirements_or_package['framework'], requirements_or_package['type']
+        return (
+            requirements_or_package['framework_preferences']['backend'],
+            requirements_or_package['specifications']['type']
+        )
@@ -0,0 +1,148 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from pathlib import Path
+import logging
+import os
+import re
+import threading
+import time
+
+# {{name}} slots; whitespace inside the braces is allowed
+SLOT_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+# "Framework: flask" / "Type: web_app" lines in a template's header docstring
+METADATA_PATTERN = re.compile(r'^(Framework|Type):\s*(\S+)\s*$', re.MULTILINE)
+
+
+class CompiledTemplate:
+    """A template parsed once into literal segments and slot names.
+
+    The template's header docstring describes the template rather than the
+    generated code, so it is read for metadata and left out of the output.
+    Rendering interleaves the pre-split literals with the slot values and
+    joins them; no scanning of the template text happens per render.
+    """
+
+    def __init__(self, source: str, name: str = '<string>', mtime: int = 0):
+        self.name = name
+        self.mtime = mtime
+        header, body = _split_header(source)
+        pieces = SLOT_PATTERN.split(body)
+        self.literals: Tuple[str, ...] = tuple(pieces[0::2])
+        self.slots: Tuple[str, ...] = tuple(pieces[1::2])
+        self.slot_names = frozenset(self.slots)
+
+        metadata = dict(METADATA_PATTERN.findall(header))
+        self.framework = metadata.get('Framework')
+        self.type = metadata.get('Type')
+
+    def render(self, values: Dict[str, object]) -> str:
+        """
+        Fill every slot from ``values``.
+
+        Raises:
+            KeyError: If a slot has no value
+        """
+        try:
+            rendered = [str(values[slot]) for slot in self.slots]
+        except KeyError:
+            missing = sorted(self.slot_names - values.keys())
+            raise KeyError(f"Missing values for template {self.name}: {', '.join(missing)}")
+
+        parts: List[str] = [''] * (len(self.literals) + len(rendered))
+        parts[0::2] = self.literals
+        parts[1::2] = rendered
+        return ''.join(parts)
+
+
+class TemplateEngine:
+    """Compiles the templates in a directory and serves them by (framework, type).
+
+    A template's key comes from ``Framework:`` and ``Type:`` lines in its
+    header docstring, falling back to the ``<framework>_<type>.py`` file name.
+    Files are re-read when their mtime changes; stat calls are throttled to
+    one pass per ``reload_interval`` seconds.
+    """
+
+    def __init__(self, templates_dir: Path, reload_interval: float = 1.0):
+        self.templates_dir = Path(templates_dir)
+        self.reload_interval = reload_interval
+        self.logger = logging.getLogger(__name__)
+        self._templates: Dict[Tuple[str, str], CompiledTemplate] = {}
+        # path -> (key, mtime_ns) of the version currently compiled
+        self._paths: Dict[Path, Tuple[Tuple[str, str], int]] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh(force=True)
+
+    def get(self, framework: str, template_type: str) -> Optional[CompiledTemplate]:
+        """Return the compiled template for a framework and type, if any."""
+        self._refresh()
+        return self._templates.get((framework, template_type))
+
+    def render(self, framework: str, template_type: str, values: Dict[str, object]) -> str:
+        """
+        Render the template for a framework and type.
+
+        Raises:
+            LookupError: If no template is indexed under that key
+        """
+        template = self.get(framework, template_type)
+        if template is None:
+            raise LookupError(f"No template for framework '{framework}' and type '{template_type}'")
+        return template.render(values)
+
+    def keys(self) -> Iterable[Tuple[str, str]]:
+        """Indexed (framework, type) keys."""
+        self._refresh()
+        return list(self._templates)
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+
+            seen = set()
+            for path in self.templates_dir.glob('*.py'):
+                seen.add(path)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                loaded = self._paths.get(path)
+                if loaded is not None and loaded[1] == mtime:
+                    continue
+                self._load(path, mtime)
+
+            for path in set(self._paths) - seen:
+                key, _ = self._paths.pop(path)
+                self._templates.pop(key, None)
+
+    def _load(self, path: Path, mtime: int) -> None:
+        template = CompiledTemplate(path.read_text(), name=path.name, mtime=mtime)
+        if template.framework and template.type:
+            key = (template.framework, template.type)
+        else:
+            framework, _, template_type = path.stem.partition('_')
+            key = (framework, template_type)
+
+        previous = self._paths.get(path)
+        if previous is not None and previous[0] != key:
+            self._templates.pop(previous[0], None)
+        self._paths[path] = (key, mtime)
+        self._templates[key] = template
+        self.logger.debug(f"Compiled template {path.name} as {key}")
+
+
+def _split_header(source: str) -> Tuple[str, str]:
+    """Split a leading triple-quoted docstring from the rest of the template."""
+    stripped = source.lstrip()
+    if not stripped.startswith('"""'):
+        return '', source
+    end = stripped.find('"""', 3)
+    if end == -1:
+        return '', source
+    return stripped[3:end], stripped[end + 3:].lstrip('\n')
@@ -0,0 +1,159 @@
+from typing import Dict, List, Optional
+from functools import lru_cache
+from pathlib import Path
+import ast
+import copy
+import hashlib
+import json
+
+# Shipped into the sandbox workspace next to the code under test
+RUNNER_SOURCE_PATH = Path(__file__).parent / 'sandbox_pytest.py'
+RUNNER_FILE = '_sandbox_pytest.py'
+CONFIG_FILE = '_impact.json'
+REPORT_MARKER = '@@SANDBOX_TEST_REPORT@@'  # As in sandbox_pytest; that module imports pytest
+
+# Key for everything in a module outside function bodies
+MODULE_KEY = '<module>'
+
+
+@lru_cache(maxsize=1)
+def runner_source() -> str:
+    return RUNNER_SOURCE_PATH.read_text()
+
+
+def _is_test_file(path: str) -> bool:
+    name = path.rsplit('/', 1)[-1]
+    return name.startswith('test_') or name == 'conftest.py'
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def fingerprint(files: Dict[str, str]) -> Dict[str, str]:
+    """
+    Hash each function body and each module's remaining code.
+
+    Functions are keyed like the coverage the runner records, e.g.
+    'app.py:create_app'; functions sharing a name in one file share a key.
+    Each module also gets 'app.py:<module>', covering imports, module
+    statements, class bodies and signatures, which every test may depend on.
+    Test files are hashed whole.
+    """
+    fingerprints: Dict[str, str] = {}
+    for path, source in files.items():
+        if not path.endswith('.py'):
+            fingerprints[path] = _digest(source)
+            continue
+        if _is_test_file(path):
+            fingerprints[f"{path}:{MODULE_KEY}"] = _digest(source)
+            continue
+        try:
+            tree = ast.parse(source)
+        except SyntaxError:
+            fingerprints[f"{path}:{MODULE_KEY}"] = _digest(source)
+            continue
+
+        bodies: Dict[str, List[str]] = {}
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                bodies.setdefault(f"{path}:{node.name}", []).append(
+                    ast.dump(ast.Module(body=node.body, type_ignores=[]))
+                )
+        for key, dumps in bodies.items():
+            fingerprints[key] = _digest('\n'.join(sorted(dumps)))
+
+        # The module with every function body emptied
+        skeleton = copy.deepcopy(tree)
+        for node in ast.walk(skeleton):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                node.body = [ast.Pass()]
+        fingerprints[f"{path}:{MODULE_KEY}"] = _digest(ast.dump(skeleton))
+    return fingerprints
+
+
+def parse_report(output: str) -> Optional[Dict]:
+    """The runner's report from the container output, if it got that far."""
+    for line in reversed(output.splitlines()):
+        if line.startswith(REPORT_MARKER):
+            return json.loads(line[len(REPORT_MARKER):])
+    return None
+
+
+def strip_report(output: str) -> str:
+    return '\n'.join(line for line in output.splitlines() if not line.startswith(REPORT_MARKER))
+
+
+class TestImpact:
+    """Test selection across the fix attempts of one validation.
+
+    After each run it keeps every test's outcome, duration and the functions
+    it called. The next attempt re-runs only tests that failed, that call a
+    function whose body changed, or whose test file changed; any change
+    outside function bodies, or a missing report, runs everything.
+    """
+
+    __test__ = False  # Not a pytest test class
+
+    def __init__(self):
+        self.fingerprints: Optional[Dict[str, str]] = None
+        self.tests: Dict[str, Dict] = {}
+
+    def select(self, files: Dict[str, str]) -> Optional[List[str]]:
+        """
+        Tests to run for ``files``.
+
+        Returns:
+            Node ids and test file paths, possibly empty; None to run all
+        """
+        if self.fingerprints is None or not self.tests:
+            return None
+        current = fingerprint(files)
+        changed = {
+            key for key in set(current) | set(self.fingerprints)
+            if current.get(key) != self.fingerprints.get(key)
+        }
+        if any(key.endswith(f":{MODULE_KEY}") and not _is_test_file(key.split(':')[0]) for key in changed):
+            return None
+
+        changed_test_files = sorted(
+            key.split(':')[0] for key in changed
+            if key.endswith(f":{MODULE_KEY}") and _is_test_file(key.split(':')[0])
+        )
+        selected = list(changed_test_files)
+        for node_id, test in sorted(self.tests.items()):
+            if node_id.split('::')[0] in changed_test_files:
+                continue
+            if test['outcome'] != 'passed' or changed.intersection(test['covered']):
+                selected.append(node_id)
+        return selected
+
+    def skipped_seconds(self, selected: Optional[List[str]]) -> float:
+        """Previous duration of the tests ``selected`` leaves out."""
+        if selected is None:
+            return 0.0
+        chosen = set(selected)
+        return sum(
+            test['duration'] for node_id, test in self.tests.items()
+            if node_id not in chosen and node_id.split('::')[0] not in chosen
+        )
+
+    def durations(self) -> Dict[str, float]:
+        return {node_id: test['duration'] for node_id, test in self.tests.items()}
+
+    def record(self, files: Dict[str, str], report: Optional[Dict], selected: Optional[List[str]]) -> None:
+        """Merge a run's report; tests that were not re-run keep their results."""
+        if report is None:
+            self.fingerprints = None
+            self.tests = {}
+            return
+        if selected is None:
+            self.tests = {}
+        else:
+            rerun_files = {entry for entry in selected if '::' not in entry}
+            self.tests = {
+                node_id: test for node_id, test in self.tests.items()
+                if node_id.split('::')[0] not in rerun_files
+            }
+        self.tests.update(report['tests'])
+        self.fingerprints = fingerprint(files)
@@ -0,0 +1,211 @@
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+import atexit
+import json
+import os
+import threading
+import time
+
+# Span that is active in the current thread or asyncio task
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation with attributes, linked to its parent span."""
+
+    __slots__ = (
+        'name', 'trace_id', 'span_id', 'parent_id', 'attributes',
+        'start_time_ns', 'start_ns', 'end_ns', 'thread_id'
+    )
+
+    def __init__(self, name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.thread_id = threading.get_ident()
+        self.start_time_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        """Elapsed seconds, up to now while the span is still open."""
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e9
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_us': self.start_time_ns // 1000,
+            'duration_us': (self.end_ns - self.start_ns) // 1000,
+            'pid': os.getpid(),
+            'tid': self.thread_id,
+            'attributes': self.attributes
+        }
+
+
+class JsonlSpanExporter:
+    """Appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._file = open(path, 'a', buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ChromeTraceExporter:
+    """Writes spans as complete events in the Chrome trace JSON array format.
+
+    Events are streamed as they finish; the closing bracket written by
+    ``close`` is optional for chrome://tracing and Perfetto, so a trace of a
+    process that crashed can still be opened.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._file = open(path, 'w', buffering=1)
+        self._file.write('[\n')
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        data = span.to_dict()
+        event = {
+            'name': data['name'],
+            'ph': 'X',
+            'ts': data['start_us'],
+            'dur': data['duration_us'],
+            'pid': data['pid'],
+            'tid': data['tid'],
+            'args': {**data['attributes'], 'span_id': data['span_id'], 'parent_id': data['parent_id']}
+        }
+        line = json.dumps(event, default=str) + ',\n'
+        with self._lock:
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            metadata = {'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': 'agent_system'}}
+            self._file.write(json.dumps(metadata) + '\n]\n')
+            self._file.close()
+
+
+class Tracer:
+    """Creates spans and hands finished spans to the configured exporters."""
+
+    def __init__(self):
+        self.exporters: List = []
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        span = Span(name, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes['error'] = type(e).__name__
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(token)
+            for exporter in self.exporters:
+                exporter.export(span)
+
+
+_tracer = Tracer()
+
+
+def span(name: str, **attributes):
+    """Context manager timing a block as a child of the current span."""
+    return _tracer.span(name, **attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator that runs each call of the function inside a span."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attributes(**attributes) -> None:
+    """Add attributes to the current span, if there is one."""
+    active = _current_span.get()
+    if active is not None:
+        active.attributes.update(attributes)
+
+
+def configure_tracing(
+    trace_dir: Optional[Path] = None,
+    trace_format: Optional[str] = None,
+    run_id: Optional[str] = None
+) -> Optional[Path]:
+    """
+    Export spans to a local file.
+
+    Args:
+        trace_dir: Output directory; defaults to the TRACE_DIR environment
+            variable. Tracing stays export-free when neither is set.
+        trace_format: 'jsonl' (default, or TRACE_FORMAT) or 'chrome'
+        run_id: Included in the file name; defaults to a timestamp
+
+    Returns:
+        Path of the trace file, or None when tracing is not enabled
+    """
+    trace_dir = trace_dir or os.getenv('TRACE_DIR')
+    if not trace_dir:
+        return None
+    trace_format = trace_format or os.getenv('TRACE_FORMAT', 'jsonl')
+    run_id = run_id or time.strftime('%Y%m%d-%H%M%S')
+
+    if trace_format == 'chrome':
+        # One file per process; the array format cannot be appended to safely
+        exporter = ChromeTraceExporter(Path(trace_dir) / f"trace-{run_id}-{os.getpid()}.json")
+    elif trace_format == 'jsonl':
+        exporter = JsonlSpanExporter(Path(trace_dir) / f"trace-{run_id}.jsonl")
+    else:
+        raise ValueError(f"Unknown trace format: {trace_format}")
+
+    _tracer.exporters.append(exporter)
+    return exporter.path
+
+
+def shutdown_tracing() -> None:
+    """Close and remove all exporters."""
+    exporters, _tracer.exporters = _tracer.exporters, []
+    for exporter in exporters:
+        exporter.close()
+
+
+atexit.register(shutdown_tracing)